@@ -15,6 +15,7 @@ if __name__ == "__main__":
     parser.add_argument("--stub", default=False, action="store_true", help="Run paper trading mode.")
     parser.add_argument("--demo", default=False, action="store_true", help="Use demo account.")
     parser.add_argument("--hyperopt", default=False, action="store_true", help="Use hyperopt strategy.")
+    parser.add_argument("--hyperopt-workers", type=int, dest="hyperopt_workers", default=1, help="Worker processes evaluating hyperopt trials in parallel, 0 uses all CPUs.")
     parser.add_argument("--spot", default=False, action="store_true", help="Trade spot market.")
     parser.add_argument("--account", type=str, default="binanceaccount1", help="Account name.")
     parser.add_argument("--exchange", type=str, default="binance", help="Exchange name.")
@@ -388,18 +388,149 @@ def resample(data_frame, bin_size, minute_granularity=False, label="right", clos
         "low": "min",
         "close": "last",
         "volume": "sum",
-    })   
+    })
+
+
+def to_ohlcv_arrays(data_frame):
+    """
+    Converts an OHLCV DataFrame to contiguous NumPy arrays.
+
+    Args:
+        data_frame (pandas.DataFrame): The OHLCV DataFrame with a DatetimeIndex.
+    Returns:
+        dict: A dictionary with an int64 "timestamp" array (nanoseconds since epoch, UTC)
+            and float64 "open", "high", "low", "close" and "volume" arrays.
+    """
+    index = pd.DatetimeIndex(data_frame.index)
+    if index.unit != "ns":
+        index = index.as_unit("ns")
+    arrays = {"timestamp": np.ascontiguousarray(index.asi8)}
+    for column in ["open", "high", "low", "close", "volume"]:
+        arrays[column] = np.ascontiguousarray(data_frame[column].to_numpy(dtype=np.float64))
+    return arrays
+
+
+class CandleReport:
+    """
+    Result of `scan_candles`: the missing, duplicate and out of order candles of OHLCV data.
+
+    Attributes:
+        rows (int): The number of candles.
+        start (pd.Timestamp): The time of the first candle, None without candles.
+        end (pd.Timestamp): The time of the last candle, None without candles.
+        interval (pd.Timedelta): The candle interval, None with less than two candles.
+        gaps (list): A (first, last) tuple of pd.Timestamp per run of missing candles, both inclusive.
+        missing (int): The total number of missing candles.
+        duplicates (list): The times of candles repeating the time of the previous candle.
+        unordered (list): The times of candles older than the previous candle.
+    """
+
+    def __init__(self, rows, start, end, interval, gaps, missing, duplicates, unordered):
+        self.rows = rows
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.gaps = gaps
+        self.missing = missing
+        self.duplicates = duplicates
+        self.unordered = unordered
+
+    def is_continuous(self):
+        """
+        Check whether no candle is missing, duplicated or out of order.
+
+        Returns:
+            bool: True if the candles are continuous.
+        """
+        return not (self.gaps or self.duplicates or self.unordered)
+
+    def log(self):
+        """
+        Log a summary of the report.
+        """
+        logger.info("-------")
+        logger.info(f"Checking Candles:")
+        logger.info("-------")
+        logger.info(f"Start: {self.start}")
+        logger.info(f"End: {self.end}")
+        logger.info("-------")
+        logger.info(f"Interval: {self.interval.total_seconds() if self.interval is not None else None}s")
+        logger.info("-------")
+        for first, last in self.gaps[:10]:
+            logger.info(f"Missing Candles: {first} - {last}")
+        if len(self.gaps) > 10:
+            logger.info(f"... {len(self.gaps) - 10} more gaps")
+        for time in self.duplicates[:10]:
+            logger.info(f"Duplicate Candle: {time}")
+        if len(self.duplicates) > 10:
+            logger.info(f"... {len(self.duplicates) - 10} more duplicates")
+        if self.unordered:
+            logger.info(f"Out of Order Candles: {len(self.unordered)}")
+        logger.info(f"Total Gaps = {len(self.gaps)}")
+        logger.info(f"Total Duplicate Candles = {len(self.duplicates)}")
+        logger.info(f"Total Missing Candles = {self.missing}")
+        logger.info("-------")
+
+
+def scan_candles(times, interval=None):
+    """
+    Finds missing, duplicate and out of order candles.
+
+    Args:
+        times (array-like): The candle times, e.g. a DatetimeIndex or a column of ISO 8601 strings.
+        interval (pd.Timedelta, optional): The candle interval. Defaults to the most common
+            interval between consecutive candles.
+    Returns:
+        CandleReport: The report of the scan.
+    """
+    if not isinstance(times, pd.DatetimeIndex):
+        times = pd.Series(times)
+        # parsing UTC offsets is slow, strip them when all times are UTC like the saved OHLCV data
+        if pd.api.types.infer_dtype(times) == "string" and times.str.endswith("+00:00").all():
+            times = pd.to_datetime(times.str.slice(0, -6), format="ISO8601")
+        times = pd.DatetimeIndex(pd.to_datetime(times, utc=True))
+    if times.tz is None:
+        times = times.tz_localize("UTC")
+    if times.unit != "ns":
+        times = times.as_unit("ns")
+    timestamps = times.asi8
+    rows = len(timestamps)
+
+    if rows == 0:
+        return CandleReport(0, None, None, None, [], 0, [], [])
+
+    diffs = np.diff(timestamps)
+    if interval is None:
+        positive = diffs[diffs > 0]
+        if len(positive) > 0:
+            values, counts = np.unique(positive, return_counts=True)
+            interval = pd.Timedelta(int(values[np.argmax(counts)]), unit="ns")
+    step = interval.value if interval is not None else None
+
+    gaps = []
+    missing = 0
+    if step is not None:
+        gap = np.flatnonzero(diffs > step)
+        # the missing candles are the interval steps after a candle before the next one
+        counts = (diffs[gap] - 1) // step
+        firsts = timestamps[gap] + step
+        lasts = timestamps[gap] + counts * step
+        missing = int(counts.sum())
+        gaps = [(pd.Timestamp(int(first), tz="UTC"), pd.Timestamp(int(last), tz="UTC"))
+                for first, last in zip(firsts, lasts)]
+
+    duplicates = list(times[1:][diffs == 0])
+    unordered = list(times[1:][diffs < 0])
+
+    return CandleReport(rows, times[0], times[-1], interval, gaps, missing, duplicates, unordered)
 
 
 def retry(func, count=5):
     err = None
     for i in range(count):
         try:           
+            # the rate limit is kept by the rate limiter of the client (src.rate_limiter)
             ret, res = func()            
-            rate_limit = int(res.headers['X-RateLimit-Limit'])
-            rate_remain = int(res.headers['X-RateLimit-Remaining'])
-            if rate_remain < 10:
-                time.sleep(5 * 60 * (1 + rate_limit - rate_remain) / rate_limit)
             return ret
         except HTTPError as error:
             status_code = error.status_code
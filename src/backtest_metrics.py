@@ -0,0 +1,248 @@
+# coding: UTF-8
+
+import numpy as np
+import pandas as pd
+
+
+#############            Back Test Metrics            ######################################################################
+############################################################################################################################
+#
+# Performance metrics of an equity curve and of the trades of a back test, computed with whole-array NumPy operations
+# (no Python loop over the bars or the trades), so they stay fast on equity curves of millions of bars.
+# They work on plain arrays, e.g. the balance history and the trade journal of a back test (`backtest_metrics`)
+# or the result of `vectorized_backtest`.
+
+# Trading days of a year, crypto markets trade every day
+DAYS_PER_YEAR = 365
+
+
+def periods_per_year(index):
+    """
+    Get the number of bars in a year of a time index.
+    Args:
+        index (pd.DatetimeIndex or ndarray): The times of the bars.
+    Returns:
+        float: The number of bars per year, from the median interval of the bars. None with less than 2 bars.
+    """
+    times = np.asarray(pd.DatetimeIndex(index).asi8)
+    if len(times) < 2:
+        return None
+    interval = np.median(np.diff(times))
+    return DAYS_PER_YEAR * 86400 * 10**9 / interval if interval > 0 else None
+
+
+def returns(equity):
+    """
+    Get the simple returns of an equity curve.
+    Args:
+        equity (ndarray): The equity (or balance) of every bar.
+    Returns:
+        ndarray: The return of every bar from the previous one, one element shorter than `equity`.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    previous = equity[:-1]
+    return np.divide(np.diff(equity), previous, out=np.zeros(len(previous)), where=previous != 0)
+
+
+def drawdown(equity):
+    """
+    Get the drawdown of an equity curve.
+    Args:
+        equity (ndarray): The equity (or balance) of every bar.
+    Returns:
+        tuple: The drawdown from the highest equity so far of every bar, in quote currency and in percentage.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum.accumulate(equity)
+    draw_down = peak - equity
+    draw_down_perc = np.divide(draw_down, peak, out=np.zeros(len(peak)), where=peak > 0) * 100
+    return draw_down, draw_down_perc
+
+
+def equity_metrics(equity, periods_per_year=None, risk_free_rate=0.0):
+    """
+    Compute the metrics of an equity curve.
+    Args:
+        equity (ndarray): The equity (or balance) of every bar.
+        periods_per_year (float, optional): The number of bars in a year, to annualize the return and the ratios.
+            Defaults to None, the ratios are then per bar and the Calmar ratio uses the total return.
+        risk_free_rate (float, optional): The risk-free rate of return of a year
+            (of a bar without `periods_per_year`). Defaults to 0.
+    Returns:
+        dict: total_return and annual_return (%), volatility, sharpe, sortino and calmar ratios,
+            max_draw_down (quote currency), max_draw_down_perc (%) and max_draw_down_duration (bars below a previous high).
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return {"total_return": 0.0, "annual_return": 0.0, "volatility": 0.0, "sharpe": np.nan, "sortino": np.nan,
+                "calmar": np.nan, "max_draw_down": 0.0, "max_draw_down_perc": 0.0, "max_draw_down_duration": 0}
+
+    bar_returns = returns(equity)
+    scale = np.sqrt(periods_per_year) if periods_per_year else 1.0
+    excess = bar_returns - (risk_free_rate / periods_per_year if periods_per_year else risk_free_rate)
+    mean = excess.mean()
+    std = bar_returns.std()
+    downside = np.sqrt(np.mean(np.square(np.minimum(excess, 0))))
+
+    total_return = (equity[-1] / equity[0] - 1) * 100 if equity[0] != 0 else 0.0
+    if periods_per_year and equity[0] > 0 and equity[-1] > 0:
+        annual_return = ((equity[-1] / equity[0]) ** (periods_per_year / len(bar_returns)) - 1) * 100
+    else:
+        annual_return = total_return
+
+    draw_down, draw_down_perc = drawdown(equity)
+    max_draw_down_perc = draw_down_perc.max()
+
+    return {
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "volatility": std * scale,
+        "sharpe": _ratio(mean, std) * scale,
+        "sortino": _ratio(mean, downside) * scale,
+        "calmar": _ratio(annual_return, max_draw_down_perc),
+        "max_draw_down": draw_down.max(),
+        "max_draw_down_perc": max_draw_down_perc,
+        "max_draw_down_duration": _longest_run(draw_down > 0)
+    }
+
+
+def trade_metrics(profits):
+    """
+    Compute the distribution of the profits of the trades.
+    Args:
+        profits (ndarray): The profit of every closed trade, in the order they were closed.
+    Returns:
+        dict: count, win_rate (%), profit_factor, expectancy (mean profit), median, std, best, worst,
+            average_win, average_loss, percentiles (5th, 25th, 75th and 95th)
+            and the max_consecutive_wins and max_consecutive_losses.
+    """
+    profits = np.asarray(profits, dtype=np.float64)
+    profits = profits[~np.isnan(profits)]
+    if len(profits) == 0:
+        return {"count": 0, "win_rate": 0.0, "profit_factor": np.nan, "expectancy": 0.0, "median": 0.0, "std": 0.0,
+                "best": 0.0, "worst": 0.0, "average_win": 0.0, "average_loss": 0.0,
+                "percentiles": dict.fromkeys([5, 25, 75, 95], 0.0),
+                "max_consecutive_wins": 0, "max_consecutive_losses": 0}
+
+    wins = profits > 0
+    losses = profits < 0
+    win_profit = profits[wins].sum()
+    lose_loss = -profits[losses].sum()
+
+    return {
+        "count": len(profits),
+        "win_rate": wins.mean() * 100,
+        "profit_factor": win_profit if lose_loss == 0 else win_profit / lose_loss,
+        "expectancy": profits.mean(),
+        "median": np.median(profits),
+        "std": profits.std(),
+        "best": profits.max(),
+        "worst": profits.min(),
+        "average_win": profits[wins].mean() if wins.any() else 0.0,
+        "average_loss": profits[losses].mean() if losses.any() else 0.0,
+        "percentiles": dict(zip([5, 25, 75, 95], np.percentile(profits, [5, 25, 75, 95]))),
+        "max_consecutive_wins": _longest_run(wins),
+        "max_consecutive_losses": _longest_run(losses)
+    }
+
+
+def exposure(position):
+    """
+    Get the share of the bars spent in a position.
+    Args:
+        position (ndarray): The position size at every bar.
+    Returns:
+        float: The percentage of the bars with an open position.
+    """
+    position = np.asarray(position)
+    return np.count_nonzero(position) / len(position) * 100 if len(position) > 0 else 0.0
+
+
+def rolling_metrics(equity, window, periods_per_year=None):
+    """
+    Compute rolling metrics of an equity curve in O(n) with cumulative sums.
+    Args:
+        equity (ndarray): The equity (or balance) of every bar.
+        window (int): The number of returns in a window.
+        periods_per_year (float, optional): The number of bars in a year, to annualize the volatility and the ratios.
+            Defaults to None.
+    Returns:
+        dict: return (%), volatility, sharpe and sortino of the window ending at every bar,
+            arrays aligned with `equity` with NaN for the first `window` bars.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    n = len(equity)
+    result = {key: np.full(n, np.nan) for key in ["return", "volatility", "sharpe", "sortino"]}
+    if window < 1 or n <= window:
+        return result
+
+    bar_returns = returns(equity)
+    scale = np.sqrt(periods_per_year) if periods_per_year else 1.0
+
+    def window_sum(values):
+        cumsum = np.concatenate([[0.0], np.cumsum(values)])
+        return cumsum[window:] - cumsum[:-window]
+
+    mean = window_sum(bar_returns) / window
+    variance = np.maximum(window_sum(np.square(bar_returns)) / window - np.square(mean), 0)
+    std = np.sqrt(variance)
+    downside = np.sqrt(window_sum(np.square(np.minimum(bar_returns, 0))) / window)
+
+    start = equity[:-window]
+    result["return"][window:] = np.divide(equity[window:], start, out=np.full(len(start), np.nan),
+                                          where=start != 0) * 100 - 100
+    result["volatility"][window:] = std * scale
+    result["sharpe"][window:] = np.divide(mean, std, out=np.full(len(std), np.nan), where=std > 0) * scale
+    result["sortino"][window:] = np.divide(mean, downside, out=np.full(len(downside), np.nan),
+                                           where=downside > 0) * scale
+    return result
+
+
+def backtest_metrics(exchange, window=None, risk_free_rate=0.0):
+    """
+    Compute the metrics of a back test from its balance history and its trade journal.
+    Args:
+        exchange: The back test, e.g. an instance of BinanceFuturesBackTest after `crawler_run`.
+        window (int, optional): The number of bars of the rolling metrics. Defaults to None, no rolling metrics.
+        risk_free_rate (float, optional): The risk-free rate of return of a year. Defaults to 0.
+    Returns:
+        dict: The `equity_metrics` with the `trades` (`trade_metrics`), the `exposure`
+            and the `rolling` metrics (with a window).
+    """
+    index = exchange.df_ohlcv.index
+    equity = exchange.start_balance + np.asarray(exchange.balance_history, dtype=np.float64)
+    bars_per_year = periods_per_year(index[:len(equity)])
+
+    journal = exchange.order_log.to_data_frame()
+    position = np.zeros(len(equity))
+    if len(journal) > 0:
+        # position at the close of every bar, from the last fill of the bar or of the bars before
+        fill_times = pd.DatetimeIndex(pd.to_datetime(journal["time"], utc=True)).asi8
+        bar_times = pd.DatetimeIndex(index[:len(equity)]).asi8
+        last_fill = np.searchsorted(fill_times, bar_times, side="right") - 1
+        positions = journal["position"].to_numpy()
+        position = np.where(last_fill >= 0, positions[np.maximum(last_fill, 0)], 0)
+
+    metrics = equity_metrics(equity, bars_per_year, risk_free_rate)
+    metrics["trades"] = trade_metrics(journal["pnl"].to_numpy())
+    metrics["exposure"] = exposure(position)
+    if window:
+        metrics["rolling"] = rolling_metrics(equity, window, bars_per_year)
+    return metrics
+
+
+def _ratio(numerator, denominator):
+    """
+    Divide two metrics, NaN when the denominator is 0.
+    """
+    return numerator / denominator if denominator != 0 else np.nan
+
+
+def _longest_run(mask):
+    """
+    Get the length of the longest run of True values of a boolean array.
+    """
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate([[0], mask.view(np.int8), [0]]))
+    return int((np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)).max())
@@ -6,7 +6,12 @@ from datetime import datetime, timezone
 from time import sleep
 
 import json #pickle #jsonpickle #json
-from hyperopt import fmin, tpe, STATUS_OK, STATUS_FAIL, Trials
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from hyperopt import base, fmin, space_eval, tpe, STATUS_OK, STATUS_FAIL, Trials
+from hyperopt.utils import coarse_utcnow
 
 from src.config import config as conf
 
@@ -25,6 +30,25 @@ from src.exchange.binance_futures.binance_futures_backtest import BinanceFutures
 from src.exchange.ftx.ftx_backtest import FtxBackTest
 
 
+# The bot evaluated by the hyperopt worker processes, inherited when they are forked
+_hyperopt_bot = None
+
+
+def _hyperopt_worker_init():
+    """
+    Initialize a hyperopt worker process.
+    The order logs of the trials are discarded so the workers do not write to the same file.
+    """
+    conf["args"].order_log = os.devnull
+
+
+def _hyperopt_worker_objective(args):
+    """
+    Evaluate one set of parameters in a hyperopt worker process.
+    """
+    return _hyperopt_bot.hyperopt_objective(args)
+
+
 class Session:
     def __init__(self):
         self.__session_type__ = "object"
@@ -57,6 +81,12 @@ class Bot:
     spot = False
     # Parameter optimization?
     hyperopt = False
+    # Number of parameter sets to evaluate
+    hyperopt_max_evals = 200
+    # Worker processes evaluating parameter sets in parallel, 1 runs serially and 0 uses all CPUs
+    hyperopt_workers = 1
+    # Back test data prepared by the first trial and replayed by the others
+    hyperopt_dataset = None
     # Show Plot after back test
     plot = True
     # Session Persistence
@@ -73,6 +103,9 @@ class Bot:
             bin_size (str): The time frame for trading data.
         """
         self.bin_size = bin_size
+        # Indicators declared by `indicators` and the arguments of the current strategy call
+        self.__indicators = None
+        self.__bar = None
 
     def __del__(self):
         """
@@ -152,68 +185,181 @@ class Bot:
         """
         pass
 
+    def indicators(self):
+        """
+        Declare the indicators of the strategy, override it to opt in.
+
+        Each indicator is a function of the (open, close, high, low, volume) arrays returning an array
+        (or a tuple of arrays) of the same length, whose value at a bar only depends on that bar and the bars before it.
+        Back tests compute each indicator once over the whole history instead of on every bar,
+        the strategy gets its values for the current window with `indicator`.
+        Recursive indicators (e.g. EMA, RSI) are then computed from the start of the history
+        instead of the start of the window, so their values can differ slightly from live trading.
+
+        Returns:
+            dict: The indicator functions by name, None if the strategy does not declare indicators.
+        """
+        return None
+
+    def indicator(self, name):
+        """
+        Get the values of a declared indicator for the data passed to the current strategy call.
+
+        Args:
+            name (str): The name of the indicator in `indicators`.
+
+        Returns:
+            np.ndarray or tuple: The values of the indicator, the last one is the value of the current bar.
+        """
+        action, open, close, high, low, volume = self.__bar
+        values = None
+        if hasattr(self.exchange, "get_indicator"):
+            values = self.exchange.get_indicator(name, action)
+        if values is None:
+            values = self.__indicators[name](open, close, high, low, volume)
+        return values
+
+    def __strategy(self, action, open, close, high, low, volume):
+        """
+        Call the strategy, keeping its arguments for `indicator`.
+        """
+        self.__bar = (action, open, close, high, low, volume)
+        self.strategy(action, open, close, high, low, volume)
+
+    def __on_update(self):
+        """
+        Register the strategy with the exchange, passing the declared indicators to back tests.
+        """
+        self.__indicators = self.indicators()
+        if self.__indicators is None:
+            self.exchange.on_update(self.bin_size, self.strategy)
+            return
+        if self.back_test or self.hyperopt:
+            self.exchange.indicators = self.__indicators
+        self.exchange.on_update(self.bin_size, self.__strategy)
+
+    def hyperopt_objective(self, args):
+        """
+        Evaluate one set of parameters with a back test.
+
+        The data prepared by the first back test is kept in `hyperopt_dataset` and replayed
+        by the following ones, which skip loading, checking and resampling it.
+
+        Args:
+            args (dict): The parameters to evaluate.
+
+        Returns:
+            dict: The hyperopt result, the loss is the inverse of the profit factor.
+        """
+        logger.info(f"Params : {args}")
+        try:
+            if self.exchange_arg == "bitmex":
+                backtest = BitMexBackTest
+            elif self.exchange_arg == "binance":
+                backtest = BinanceFuturesBackTest
+            elif self.exchange_arg == "ftx":
+                backtest = FtxBackTest
+            elif self.exchange_arg == "bybit":
+                backtest = BybitBackTest
+            else:
+                raise Exception(f"--exchange argument missing or invalid")
+
+            self.params = args
+            self.exchange = backtest(account=self.account, pair=self.pair)
+            self.exchange.dataset = self.hyperopt_dataset
+            self.__on_update()
+            self.hyperopt_dataset = getattr(self.exchange, "dataset", None)
+            profit_factor = self.exchange.win_profit/self.exchange.lose_loss
+            logger.info(f"Profit Factor : {profit_factor}")
+            ret = {
+                'status': STATUS_OK,
+                'loss': 1/profit_factor
+            }
+        except Exception as e:
+            ret = {
+                'status': STATUS_FAIL
+            }
+
+        return ret
+
     def params_search(self):
         """
         Function to search for parameters.
 
+        With `hyperopt_workers` greater than 1 the trials are evaluated in parallel
+        by a pool of worker processes, see `__params_search_parallel`.
+
         Returns:
             None
         """
-        def objective(args):
-            logger.info(f"Params : {args}")
-            try:
-                if self.exchange_arg == "bitmex":
-                    self.params = args
-                    self.exchange = BitMexBackTest(account=self.account, pair=self.pair)
-                    self.exchange.on_update(self.bin_size, self.strategy)
-                    profit_factor = self.exchange.win_profit/self.exchange.lose_loss
-                    logger.info(f"Profit Factor : {profit_factor}")
-                    ret = {
-                        'status': STATUS_OK,
-                        'loss': 1/profit_factor
-                    }
-                if self.exchange_arg == 'binance':
-                    self.params = args
-                    self.exchange = BinanceFuturesBackTest(account=self.account, pair=self.pair)
-                    self.exchange.on_update(self.bin_size, self.strategy)
-                    profit_factor = self.exchange.win_profit/self.exchange.lose_loss
-                    logger.info(f"Profit Factor : {profit_factor}")
-                    ret = {
-                        'status': STATUS_OK,
-                        'loss': 1/profit_factor
-                    }
-                if self.exchange_arg == 'ftx':
-                    self.params = args
-                    self.exchange = FtxBackTest(account=self.account, pair=self.pair)
-                    self.exchange.on_update(self.bin_size, self.strategy)
-                    profit_factor = self.exchange.win_profit/self.exchange.lose_loss
-                    logger.info(f"Profit Factor : {profit_factor}")
-                    ret = {
-                        'status': STATUS_OK,
-                        'loss': 1/profit_factor
-                    }
-                if self.exchange_arg == 'bybit':
-                    self.params = args
-                    self.exchange = BybitBackTest(account=self.account, pair=self.pair)
-                    self.exchange.on_update(self.bin_size, self.strategy)
-                    profit_factor = self.exchange.win_profit/self.exchange.lose_loss
-                    logger.info(f"Profit Factor : {profit_factor}")
-                    ret = {
-                        'status': STATUS_OK,
-                        'loss': 1/profit_factor
-                    }
-            except Exception as e:
-                ret = {
-                    'status': STATUS_FAIL
-                }
-
-            return ret
+        workers = self.hyperopt_workers if self.hyperopt_workers > 0 else (os.cpu_count() or 1)
 
-        trials = Trials()
-        best_params = fmin(objective, self.options(), algo=tpe.suggest, trials=trials, max_evals=200)
+        if workers > 1:
+            trials = self.__params_search_parallel(workers)
+            best_params = trials.argmin
+        else:
+            trials = Trials()
+            best_params = fmin(self.hyperopt_objective, self.options(), algo=tpe.suggest,
+                               trials=trials, max_evals=self.hyperopt_max_evals)
         logger.info(f"Best params is {best_params}")
         logger.info(f"Best profit factor is {1/trials.best_trial['result']['loss']}")
 
+    def __params_search_parallel(self, workers):
+        """
+        Search for parameters with a pool of worker processes.
+
+        TPE suggests a batch of `workers` trials at a time from the results of all finished trials,
+        the batch is evaluated in parallel and its results are inserted before the next batch is suggested.
+        The first trial runs in this process and loads and prepares the data once,
+        the workers are forked afterwards and share the prepared dataset copy-on-write.
+
+        Args:
+            workers (int): The number of worker processes.
+
+        Returns:
+            Trials: The evaluated trials.
+        """
+        global _hyperopt_bot
+        _hyperopt_bot = self
+
+        space = self.options()
+        domain = base.Domain(self.hyperopt_objective, space)
+        trials = Trials()
+        rstate = np.random.default_rng()
+
+        logger.info(f"Hyperopt Workers : {workers}")
+
+        pool = None
+        try:
+            while len(trials.trials) < self.hyperopt_max_evals:
+                n = min(workers if pool is not None else 1, self.hyperopt_max_evals - len(trials.trials))
+                trials.refresh()
+                # TPE suggests one trial per call, each batch slot gets its own seed
+                new_trials = []
+                for new_id in trials.new_trial_ids(n):
+                    new_trials.extend(tpe.suggest([new_id], domain, trials, rstate.integers(2 ** 31 - 1)))
+                params = [space_eval(space, base.spec_from_misc(trial["misc"])) for trial in new_trials]
+
+                if pool is None:
+                    results = [self.hyperopt_objective(params[0])]
+                    pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context("fork"),
+                                               initializer=_hyperopt_worker_init)
+                else:
+                    results = list(pool.map(_hyperopt_worker_objective, params))
+
+                for trial, result in zip(new_trials, results):
+                    trial["state"] = base.JOB_STATE_DONE
+                    trial["result"] = result
+                    trial["refresh_time"] = coarse_utcnow()
+                trials.insert_trial_docs(new_trials)
+                trials.refresh()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return trials
+
     def run(self):
         """
         Function to run the bot.
@@ -273,7 +419,7 @@ class Bot:
             self.exchange.update_data = conf["args"].update_ohlcv
         
         self.exchange.ohlcv_len = self.ohlcv_len()
-        self.exchange.on_update(self.bin_size, self.strategy)
+        self.__on_update()
 
         logger.info(f"Starting Bot")
         logger.info(f"Strategy : {type(self).__name__}")
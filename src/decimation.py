@@ -0,0 +1,91 @@
+# coding: UTF-8
+
+import numpy as np
+
+
+#############            Plot Decimation            ########################################################################
+############################################################################################################################
+#
+# Reduce a long series to a few thousand points before it is drawn, keeping its visual shape.
+# Both functions return the (sorted) positions of the points to keep, so the caller can index any x axis
+# (e.g. a DatetimeIndex) and y values with them. NaN values (bars without a value) stay NaN in the kept points,
+# so the gaps of a series are still drawn as gaps.
+
+
+def min_max_indices(y, points):
+    """
+    Decimate a series keeping the lowest and the highest value of every bucket of bars.
+    Preserves every peak and trough of the series (price extremes, drawdowns), computed without a Python loop.
+    Args:
+        y (ndarray): The values of the series.
+        points (int): The maximum number of points to keep.
+    Returns:
+        ndarray: The positions of the points to keep, all of them if the series has no more than `points` values.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = max((points - 2) // 2, 1)
+    if n <= points or n < 3:
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    nan = np.isnan(padded)
+    # a bucket with only NaN values keeps one of them
+    low = np.where(nan, np.inf, padded).argmin(axis=1)
+    high = np.where(nan, -np.inf, padded).argmax(axis=1)
+    offsets = np.arange(buckets) * size
+    indices = np.concatenate([[0, n - 1], low + offsets, high + offsets])
+    return np.unique(indices[indices < n])
+
+
+def lttb_indices(x, y, points):
+    """
+    Decimate a series with the Largest-Triangle-Three-Buckets algorithm,
+    which keeps in every bucket the point forming the largest triangle with the point kept in the previous bucket
+    and the average of the next bucket. Closer to the shape of the series than min-max for smooth series.
+    Args:
+        x (ndarray): The x values of the series (e.g. int64 timestamps).
+        y (ndarray): The values of the series.
+        points (int): The number of points to keep.
+    Returns:
+        ndarray: The positions of the points to keep, all of them if the series has no more than `points` values.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+
+    # the first and the last points are kept, the others are split into points - 2 buckets
+    edges = (np.arange(points - 1) * ((n - 2) / (points - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    finite = ~np.isnan(y)
+
+    indices = np.empty(points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_finite = finite[end:next_end]
+        if next_finite.any():
+            average_x = x[end:next_end][next_finite].mean()
+            average_y = y[end:next_end][next_finite].mean()
+        else:
+            average_x, average_y = x[end:next_end].mean(), y[previous]
+
+        area = np.abs((x[previous] - average_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (average_y - y[previous]))
+        if np.isnan(y[previous]):
+            # after a gap, keep the first value of the series again
+            area = np.where(finite[start:end], -np.arange(end - start), np.nan)
+        if np.isnan(area).all():
+            previous = start
+        else:
+            previous = start + np.nanargmax(area)
+        indices[bucket + 1] = previous
+    return indices
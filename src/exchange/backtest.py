@@ -13,9 +13,12 @@ import pandas as pd
 from src import (logger, allowed_range,
                  allowed_range_minute_granularity, 
                  retry, delta, load_data, resample, symlink,
-                find_timeframe_string, sync_obj_with_config)
-from src.indicators import sharpe_ratio
+                find_timeframe_string, sync_obj_with_config, to_ohlcv_arrays, scan_candles)
+from src.backtest_metrics import backtest_metrics
+from src.decimation import lttb_indices, min_max_indices
+from src.resampler import IncrementalResampler
 from src.exchange.stub import Stub
+from src.exchange.ohlcv_store import OHLCVStore
 from src.exchange_config import exchange_config
 from src.exchange.binance_futures.binance_futures_stub import BinanceFuturesStub
 
@@ -25,6 +28,51 @@ OHLC_DIRNAME = os.path.join(os.path.dirname(__file__), "./ohlc/{}/{}/{}")
 OHLC_FILENAME = os.path.join(os.path.dirname(__file__), "./ohlc/{}/{}/{}/data.csv")
 
 
+class BackTestDataset:
+    """
+    OHLCV data prepared for a back test: loaded, checked, cut to the --from/--to range and resampled to every timeframe.
+
+    A back test only reads the dataset, so it can be passed to any number of back tests of the same
+    pair, timeframes and `ohlcv_len` (e.g. hyperopt trials), which then skip loading and preprocessing
+    and only replay the strategy. Neither the data frames nor the arrays of a dataset may be modified.
+    """
+
+    def __init__(self, bin_size, minute_granularity, warmup_tf, ohlcv_len, df_ohlcv, timeframe_data):
+        """
+        Constructor for BackTestDataset class.
+        Args:
+            bin_size (list): The timeframes of the data, including "1m" with minute granularity.
+            minute_granularity (bool): Whether the data has minute granularity.
+            warmup_tf (str): The timeframe used for the warmup.
+            ohlcv_len (int): The OHLCV length the warmup was computed for.
+            df_ohlcv (pd.DataFrame): The OHLCV data indexed by time.
+            timeframe_data (dict): The OHLCV data of every timeframe.
+        """
+        self.bin_size = bin_size
+        self.minute_granularity = minute_granularity
+        self.warmup_tf = warmup_tf
+        self.ohlcv_len = ohlcv_len
+        self.df_ohlcv = df_ohlcv
+        self.timeframe_data = timeframe_data
+        # NumPy arrays of the OHLCV data for the array mode, by timeframe
+        self.arrays = {}
+
+    def ohlcv_arrays(self, t=None):
+        """
+        Get the OHLCV data of a timeframe as read-only NumPy arrays, converting it on first use.
+        Args:
+            t (str, optional): The timeframe, None for the OHLCV data the bar loop runs on. Defaults to None.
+        Returns:
+            dict: An int64 "timestamp" array and a float64 array per OHLCV column.
+        """
+        if t not in self.arrays:
+            arrays = to_ohlcv_arrays(self.df_ohlcv if t is None else self.timeframe_data[t])
+            for array in arrays.values():
+                array.flags.writeable = False
+            self.arrays[t] = arrays
+        return self.arrays[t]
+
+
 class BackTest(Stub):   
     # Update Data before Backtest
     update_data = True
@@ -42,6 +90,24 @@ class BackTest(Stub):
     start_balance = 0
     # Warmup timeframe - used for loading warmup candles for indicators when minute granularity is need
     warmup_tf = None # highest tf, if None its going to find it automatically based on highest tf and ohlcv_len
+    # Array mode - run the bar loop over NumPy arrays and pass window views to the strategy instead of slicing DataFrames
+    array_mode = False
+    # Keep historical data in the columnar binary store instead of data.csv (an existing data.csv is migrated once)
+    use_ohlcv_store = True
+    # Memory-map the OHLCV store read-only, parallel backtests on the same pair then share one copy of the history
+    ohlcv_mmap = False
+    # Download the candles missing in the OHLCV store and insert them (needs the OHLCV store)
+    repair_data = False
+    # Indicators declared by the strategy (`Bot.indicators`), computed once over the whole history
+    indicators = None
+    # Fills buffered by the trade journal before they are written to the order log (it is flushed at the end of the test)
+    order_log_buffer = 4096
+    # Keep the fills in the trade journal for the metrics of `show_result` and `order_log.to_data_frame()`
+    keep_order_log = True
+    # Maximum number of points drawn per series by `show_result`, longer series are decimated (0 draws every point)
+    plot_points = 4000
+    # Decimation of the plotted series: "min_max" keeps the extremes of every bucket of bars, "lttb" the visual shape
+    plot_decimation = "min_max"
 
     def __init__(self):
         """
@@ -59,6 +125,10 @@ class BackTest(Stub):
         self.df_ohlcv = None
         # Current time axis
         self.index = None
+        # Position of the current time axis in the OHLCV data
+        self.bar_index = None
+        # Time of the bar currently processed by the crawler
+        self.bar_time = None
         # Current time
         self.time = None
         # Order count
@@ -69,14 +139,25 @@ class BackTest(Stub):
         self.sell_signals = []
         # EXIT history
         self.close_signals = []
-        # Balance history
-        self.balance_history = []        
-        # Drawdown history
-        self.draw_down_history = []
-        # Plot data
+        # Balance history, profit of every bar (float64 array preallocated by `crawler_run`)
+        self.balance_history = np.empty(0)
+        # Drawdown history, session max drawdown percentage of every bar
+        self.draw_down_history = np.empty(0)
+        # Number of bars recorded in the histories
+        self.history_len = 0
+        # Plot data, color, overlay and the series (float64 arrays over the OHLCV data) of every plot
         self.plot_data = {}
         # Resample data
         self.resample_data = {}
+        # Incremental resamplers of `security` and their position in the data of the lowest timeframe, by timeframe
+        self.resamplers = {}
+        self.resampler_positions = {}
+        # Report of the last candle check
+        self.candle_report = None
+        # Prepared data of this back test, a dataset set before `on_update` is replayed instead of loading the data
+        self.dataset = None
+        # Values of the declared indicators over the whole history, by timeframe and name
+        self.indicator_values = {}
 
     def get_market_price(self):
         """
@@ -113,6 +194,14 @@ class BackTest(Stub):
         self.OHLC_DIRNAME = OHLC_DIRNAME.format(exchange, pair, bin_size)    
         self.OHLC_FILENAME = OHLC_FILENAME.format(exchange, pair, bin_size)
 
+    def has_history(self):
+        """
+        Check whether historical data is stored at the paths, so `download_data` only updates it.
+        Returns:
+            bool: True if the OHLCV store or the CSV file exists.
+        """
+        return OHLCVStore(self.OHLC_DIRNAME).exists() or os.path.exists(self.OHLC_FILENAME)
+
     def commit(
         self, 
         id, 
@@ -183,51 +272,46 @@ class BackTest(Stub):
 
         This function iterates through the historical OHLC data and executes the trading strategy.
         It simulates the trading process for backtesting purposes.
+        The prepared data is kept in `dataset`, which can be set on other back tests to replay it.
         """      
-        self.df_ohlcv = self.df_ohlcv.set_index(self.df_ohlcv.columns[0])       
-        self.df_ohlcv.index = pd.to_datetime(self.df_ohlcv.index, errors='coerce')
-
-        #calculate warmup duration in minutes
-        warmup_duration = allowed_range_minute_granularity[self.warmup_tf][3] * self.ohlcv_len
-
-        if conf["args"].from_date != "epoch":
-            cut_off_time = pd.to_datetime(conf["args"].from_date, utc=True) - np.timedelta64(warmup_duration, 'm')
-            self.df_ohlcv = self.df_ohlcv.loc[(self.df_ohlcv.index >= cut_off_time)]
-            logger.info(f"OHLCV Buffer Start: {cut_off_time} - Strategy Start: {conf['args'].from_date} (Inclusive)")
-
-        if conf["args"].to_date != "now":
-            cut_off_time = pd.to_datetime(conf["args"].to_date, utc=True) 
-            self.df_ohlcv = self.df_ohlcv.loc[(self.df_ohlcv.index < cut_off_time)]
-            logger.info(f"Strategy End: {conf['args'].to_date} (Exclusive)")
-        
         start = time.time()
 
+        if self.dataset is None:
+            self.__prepare_dataset()
+
         # load and resample warmup data
         self.warmup_len = (allowed_range_minute_granularity[self.warmup_tf][3] * self.ohlcv_len) \
              if self.minute_granularity else self.ohlcv_len           
 
-        if self.timeframe_data is None: 
-            self.timeframe_data = {}          
-            for t in self.bin_size:            
-                self.timeframe_data[t] = resample(self.df_ohlcv, t, minute_granularity=self.minute_granularity) \
-                                        if self.minute_granularity else self.df_ohlcv # if a single timeframe is used without minute_granularity
-                                                                                      # it already resampled the data after downloading it 
-                self.timeframe_info[t] = {
-                    "allowed_range": allowed_range_minute_granularity[t][0] if self.minute_granularity else self.bin_size[0], #allowed_range[t][0],
-                    "ohlcv": self.timeframe_data[t][:-1], # Dataframe with closed candles,
-                    "last_action_index": math.ceil(self.warmup_len / allowed_range_minute_granularity[t][3]) \
-                                        if self.minute_granularity else self.warmup_len
-                }                     
+        for t in self.bin_size:
+            self.timeframe_info[t] = {
+                "allowed_range": allowed_range_minute_granularity[t][0] if self.minute_granularity else self.bin_size[0], #allowed_range[t][0],
+                "ohlcv": self.timeframe_data[t][:-1], # Dataframe with closed candles,
+                "last_action_index": math.ceil(self.warmup_len / allowed_range_minute_granularity[t][3]) \
+                                    if self.minute_granularity else self.warmup_len
+            }                     
 
         #logger.info(f"timeframe info: {self.timeframe_info}")
-        for i in range(self.warmup_len):
-            self.balance_history.append((self.get_balance() - self.start_balance))
-            self.draw_down_history.append(self. max_draw_down_session_perc)
+        # One bar of history per bar of the lowest timeframe, the warmup bars included
+        self.balance_history = np.empty(len(self.df_ohlcv), dtype=np.float64)
+        self.draw_down_history = np.empty(len(self.df_ohlcv), dtype=np.float64)
+        self.history_len = min(self.warmup_len, len(self.df_ohlcv))
+        self.balance_history[:self.history_len] = self.get_balance() - self.start_balance
+        self.draw_down_history[:self.history_len] = self.max_draw_down_session_perc
+
+        if self.array_mode:
+            self.__crawler_run_arrays()
+            self.__trim_history()
+            self.close_all()
+            self.order_log.flush()
+            logger.info(f"Back test time : {time.time() - start}")
+            return
 
         for i in range(len(self.df_ohlcv) - self.warmup_len):
             self.data = self.df_ohlcv.iloc[i:i + self.warmup_len + 1, :]
             index = self.data.iloc[-1].name
             new_data = self.data.iloc[-1:]              
+            self.bar_time = index
             
             # action is either the(only) key of self.timeframe_info dictionary, which is a single timeframe string
             # or "1m" when minute granularity is needed - multiple timeframes or self.minute_granularity = True
@@ -276,7 +360,8 @@ class BackTest(Stub):
                                  'close': close}
             
                     self.index = index
-                    self.balance_history.append((self.get_balance() - self.start_balance)) 
+                    self.bar_index = i + self.warmup_len
+                    self.__record_history()
 
                 #self.eval_sltp()
                 self.timestamp = tf_ohlcv_data.iloc[-1].name.isoformat().replace("T"," ")
@@ -287,9 +372,185 @@ class BackTest(Stub):
                 #self.eval_exit()
                 #self.eval_sltp()
 
+        self.__trim_history()
         self.close_all()
+        self.order_log.flush()
         logger.info(f"Back test time : {time.time() - start}")    
 
+    def __prepare_dataset(self):
+        """
+        Cut the loaded OHLCV data to the --from/--to range, resample it to every timeframe and keep the result
+        as the dataset of this back test.
+        """
+        if not isinstance(self.df_ohlcv.index, pd.DatetimeIndex): # the OHLCV store is already indexed by time
+            self.df_ohlcv = self.df_ohlcv.set_index(self.df_ohlcv.columns[0])       
+        self.df_ohlcv.index = pd.to_datetime(self.df_ohlcv.index, errors='coerce')
+
+        #calculate warmup duration in minutes
+        warmup_duration = allowed_range_minute_granularity[self.warmup_tf][3] * self.ohlcv_len
+
+        # Sorted data is cut with slices, which keep memory-mapped columns shared instead of copying them
+        is_sorted = self.df_ohlcv.index.is_monotonic_increasing
+
+        if conf["args"].from_date != "epoch":
+            cut_off_time = pd.to_datetime(conf["args"].from_date, utc=True) - np.timedelta64(warmup_duration, 'm')
+            self.df_ohlcv = self.df_ohlcv.iloc[self.df_ohlcv.index.searchsorted(cut_off_time, side="left"):] if is_sorted \
+                            else self.df_ohlcv.loc[(self.df_ohlcv.index >= cut_off_time)]
+            logger.info(f"OHLCV Buffer Start: {cut_off_time} - Strategy Start: {conf['args'].from_date} (Inclusive)")
+
+        if conf["args"].to_date != "now":
+            cut_off_time = pd.to_datetime(conf["args"].to_date, utc=True) 
+            self.df_ohlcv = self.df_ohlcv.iloc[:self.df_ohlcv.index.searchsorted(cut_off_time, side="left")] if is_sorted \
+                            else self.df_ohlcv.loc[(self.df_ohlcv.index < cut_off_time)]
+            logger.info(f"Strategy End: {conf['args'].to_date} (Exclusive)")
+
+        if self.timeframe_data is None: 
+            self.timeframe_data = {}          
+            for t in self.bin_size:            
+                self.timeframe_data[t] = resample(self.df_ohlcv, t, minute_granularity=self.minute_granularity) \
+                                        if self.minute_granularity else self.df_ohlcv # if a single timeframe is used without minute_granularity
+                                                                                      # it already resampled the data after downloading it 
+                # resampling gap free 1m data to 1m yields the same data, reuse it rather than holding a second copy
+                if self.minute_granularity and t == "1m" and self.__is_continuous_1m(self.df_ohlcv):
+                    self.timeframe_data[t] = self.df_ohlcv
+
+        self.dataset = BackTestDataset(self.bin_size, self.minute_granularity, self.warmup_tf, self.ohlcv_len,
+                                       self.df_ohlcv, self.timeframe_data)
+
+    def __load_dataset(self):
+        """
+        Use the data of the dataset set on this back test instead of loading it.
+        """
+        self.bin_size = self.dataset.bin_size
+        self.minute_granularity = self.dataset.minute_granularity
+        self.warmup_tf = self.dataset.warmup_tf
+        self.df_ohlcv = self.dataset.df_ohlcv
+        self.timeframe_data = dict(self.dataset.timeframe_data)
+
+    def __is_continuous_1m(self, data):
+        """
+        Check whether OHLCV data is continuous 1m data without missing values.
+
+        Args:
+            data (pd.DataFrame): The OHLCV data indexed by time.
+        Returns:
+            bool: True if every candle follows the previous one by one minute and no value is NaN.
+        """
+        arrays = to_ohlcv_arrays(data)
+        if len(arrays["timestamp"]) == 0:
+            return False
+        if not (np.diff(arrays["timestamp"]) == 60 * 10**9).all():
+            return False
+        return not any(np.isnan(arrays[c]).any() for c in ["open", "high", "low", "close", "volume"])
+
+    def __record_history(self):
+        """
+        Write the profit and the session max drawdown of the current bar into the next slot of the histories.
+        A bar is recorded once, before the strategy of its lowest timeframe (1m with minute granularity,
+        which multiple timeframes force), so the histories preallocated with one slot per bar never overflow.
+        """
+        i = self.history_len
+        self.balance_history[i] = self.get_balance() - self.start_balance
+        self.draw_down_history[i] = self.max_draw_down_session_perc
+        self.history_len = i + 1
+
+    def __trim_history(self):
+        """
+        Cut the histories to the recorded bars (views, no copy).
+        """
+        self.balance_history = self.balance_history[:self.history_len]
+        self.draw_down_history = self.draw_down_history[:self.history_len]
+
+    def __crawler_run_arrays(self):
+        """
+        Run the bar loop of `crawler_run` over NumPy arrays.
+
+        OHLCV data of every timeframe is converted to contiguous arrays once and the strategy
+        receives zero-copy window views of them, so no DataFrame is sliced per bar.
+        Produces the same trades as the DataFrame based loop.
+        """
+        # action is either the(only) key of self.timeframe_info dictionary, which is a single timeframe string
+        # or "1m" when minute granularity is needed - multiple timeframes or self.minute_granularity = True
+        action = "1m" if (self.minute_granularity or len(self.timeframe_info) > 1) else self.bin_size[0]
+
+        # Timeframes to be updated, sorted once as they do not change between bars
+        timeframes_to_process = [t for t in self.timeframe_info if self.timeframe_info[t]['allowed_range'] == action]
+        if self.timeframes_sorted == True:
+            timeframes_to_process.sort(key=lambda t: allowed_range_minute_granularity[t][3], reverse=True)
+        if self.timeframes_sorted == False:
+            timeframes_to_process.sort(key=lambda t: allowed_range_minute_granularity[t][3], reverse=False)
+
+        timeframe_arrays = {t: self.dataset.ohlcv_arrays(t) for t in timeframes_to_process}
+        bar_times = self.df_ohlcv.index
+        bar_timestamps = self.dataset.ohlcv_arrays()["timestamp"]
+
+        for i in range(self.warmup_len, len(self.df_ohlcv)):
+            bar_timestamp = bar_timestamps[i]
+            index = bar_times[i]
+            self.bar_time = index
+
+            for t in timeframes_to_process:
+                arrays = timeframe_arrays[t]
+                last_action_index = self.timeframe_info[t]["last_action_index"]
+
+                # Append the latest candle if new
+                if arrays["timestamp"][last_action_index] != bar_timestamp:
+                    continue
+
+                window = slice(last_action_index - self.ohlcv_len, last_action_index + 1)
+                close = arrays["close"][window]
+                open = arrays["open"][window]
+                high = arrays["high"][window]
+                low = arrays["low"][window]
+                volume = arrays["volume"][window]
+
+                if (t == "1m" and self.minute_granularity) or self.minute_granularity != True:
+                    if self.get_position_size() > 0 and low[-1] > self.get_trail_price():
+                        self.set_trail_price(low[-1])
+                    if self.get_position_size() < 0 and high[-1] < self.get_trail_price():
+                        self.set_trail_price(high[-1])
+                    self.market_price = close[-1]
+                    self.OHLC = {'open': open,
+                                 'high': high,
+                                 'low': low,
+                                 'close': close}
+
+                    self.index = index
+                    self.bar_index = i
+                    self.__record_history()
+
+                self.timestamp = self.timeframe_data[t].index[last_action_index].isoformat().replace("T"," ")
+                self.strategy(t, open, close, high, low, volume)
+                self.timeframe_info[t]['last_action_index'] += 1
+
+    def get_indicator(self, name, t):
+        """
+        Get the values of a declared indicator for the window passed to the strategy.
+
+        The indicator is computed once over the whole history of the timeframe on first use,
+        then every bar only slices the values up to the current one.
+
+        Args:
+            name (str): The name of the indicator in `indicators`.
+            t (str): The timeframe (action) of the strategy call.
+
+        Returns:
+            np.ndarray or tuple: The values of the indicator, None if it is not declared.
+        """
+        if not self.indicators or name not in self.indicators:
+            return None
+        values = self.indicator_values.setdefault(t, {})
+        if name not in values:
+            arrays = self.dataset.ohlcv_arrays(t)
+            result = self.indicators[name](arrays["open"], arrays["close"], arrays["high"],
+                                           arrays["low"], arrays["volume"])
+            values[name] = tuple(np.asarray(v) for v in result) if isinstance(result, tuple) else np.asarray(result)
+        index = self.timeframe_info[t]["last_action_index"]
+        window = slice(index - self.ohlcv_len, index + 1)
+        if isinstance(values[name], tuple):
+            return tuple(v[window] for v in values[name])
+        return values[name][window]
+
     def security(self, bin_size, data=None):
         """
         Recalculate and obtain data of a timeframe higher than the current timeframe without looking into the future.
@@ -301,66 +562,54 @@ class BackTest(Stub):
         Returns:
             pd.DataFrame: The recalculated data of the higher timeframe.
         """
-        if data == None and bin_size not in self.bin_size:           
+        if data is None and bin_size not in self.bin_size:           
             timeframe_list = [allowed_range_minute_granularity[t][3] for t in self.bin_size] # minute count of a timeframe for sorting when sorting is needed 
             timeframe_list.sort(reverse=True)
             t = find_timeframe_string(timeframe_list[-1])   
-            data = self.timeframe_data[t]
-          
+            self.resample_data[bin_size] = self.__security_incremental(bin_size, t)
+            return self.resample_data[bin_size]
         self.resample_data[bin_size] = resample(data, bin_size)
-        return self.resample_data[bin_size][:self.data.iloc[-1].name].iloc[-1 * self.ohlcv_len:, :]
+        return self.resample_data[bin_size][:self.bar_time].iloc[-1 * self.ohlcv_len:, :]
+
+    def __security_incremental(self, bin_size, t):
+        """
+        Get the closed candles of a higher timeframe from an incremental resampler fed with the lowest timeframe.
+        Only the candles up to the current bar are added, each of them once during the back test.
+        """
+        resampler = self.resamplers.get(bin_size)
+        if resampler is None:
+            resampler = self.resamplers[bin_size] = IncrementalResampler(allowed_range[bin_size][1])
+            self.resampler_positions[bin_size] = 0
+
+        arrays = self.dataset.ohlcv_arrays(t)
+        timestamps = arrays["timestamp"]
+        bar_timestamp = self.bar_time.as_unit("ns").value
+        position = self.resampler_positions[bin_size]
+        while position < len(timestamps) and timestamps[position] <= bar_timestamp:
+            resampler.update(timestamps[position], arrays["open"][position], arrays["high"][position],
+                             arrays["low"][position], arrays["close"][position], arrays["volume"][position])
+            position += 1
+        self.resampler_positions[bin_size] = position
+        resampler.advance(bar_timestamp)
+
+        return resampler.to_data_frame(self.ohlcv_len, index_name=self.timeframe_data[t].index.name)
  
     def check_candles(self, df):
         """
         Check for missing candles in the historical OHLC data.
 
-        This function checks for missing candles and duplicate candles in the provided data.
+        This function checks for missing, duplicate and out of order candles in the provided data.
 
         Args:
             df (pd.DataFrame): The historical OHLC data.
 
         Returns:
-            None
+            CandleReport: The gaps, duplicates and counts found in the data.
         """
-        logger.info("-------")
-        logger.info(f"Checking Candles:")
-        logger.info("-------")
-        logger.info(f"Start: {df.iloc[0][0]}")
-        logger.info(f"End: {df.iloc[-1][0]}")
-        logger.info("-------")
-
-        diff = (dateutil.parser.isoparse(df.iloc[1][0])-dateutil.parser.isoparse(df.iloc[0][0])).total_seconds()
-
-        logger.info(f"Interval: {diff}s")
-        logger.info("-------")
-
-        count = 0
-        rows = df.shape[0]
-        prev_current_date = None
-
-        for index in range(0, rows-1):
-            current_date = dateutil.parser.isoparse(df.iloc[index][0])
-            next_date = dateutil.parser.isoparse(df.iloc[index+1][0])
-
-            diff2 = (next_date-current_date).total_seconds()
-            if diff2 != diff:
-                count += abs((diff2-diff)/diff)
-                
-                # logger.info(current_date)
-                # logger.info(next_date)
-                # logger.info(f"Missing Candles: {(diff2-diff)/diff} Total: {count}")
-
-                # if(prev_current_date != None):
-                #     logger.info(f"Last Missing Candle Interval: {current_date-prev_current_date}")
-
-                # logger.info("------------")
-
-                prev_current_date = current_date 
-            elif diff2 <= 0:
-                logger.info(f"Duplicate Candle: {current_date}")
-
-        logger.info(f"Total Missing Candles = {count}")
-        logger.info("-------")
+        times = df.index if isinstance(df.index, pd.DatetimeIndex) else df.iloc[:, 0]
+        report = scan_candles(times)
+        report.log()
+        return report
     
     def save_csv(self, data, file):
         """
@@ -386,6 +635,7 @@ class BackTest(Stub):
         Load the historical OHLCV data.
 
         This function loads the historical OHLCV data from a CSV file or API based on the specified bin size.
+        If a dataset prepared for the same `ohlcv_len` is set, its data is used instead.
 
         Args:
             bin_size (str or list): The bin size or list of bin sizes for the historical data.
@@ -394,6 +644,13 @@ class BackTest(Stub):
             None
         """
        
+        if self.dataset is not None:
+            if self.dataset.ohlcv_len == self.ohlcv_len:
+                self.__load_dataset()
+                return
+            logger.info(f"Dataset was prepared for ohlcv_len {self.dataset.ohlcv_len}, loading the data again")
+            self.dataset = None
+
         start_time = self.get_launch_date() + 1 * timedelta(days=1)
         end_time = datetime.now(timezone.utc)
         file = self.OHLC_FILENAME #OHLC_FILENAME.format("binance_futures", self.pair, bin_size) 
@@ -419,7 +676,10 @@ class BackTest(Stub):
                     self.warmup_tf = t
                 else: continue       
 
-        if os.path.exists(file):
+        if self.use_ohlcv_store:
+            self.__load_ohlcv_store(bin_size, start_time, end_time)
+
+        elif os.path.exists(file):
             self.df_ohlcv = load_data(file)
             self.df_ohlcv.set_index(self.df_ohlcv.columns[0], inplace=True)
 
@@ -438,31 +698,140 @@ class BackTest(Stub):
             self.df_ohlcv = load_data(file)
 
         if self.check_candles_flag:
-            self.check_candles(self.df_ohlcv)
+            self.candle_report = self.check_candles(self.df_ohlcv)
+
+        if self.repair_data and self.use_ohlcv_store:
+            self.repair_ohlcv(bin_size, self.candle_report)
+
+    def repair_ohlcv(self, bin_size, report=None):
+        """
+        Download the candles missing in the OHLCV store and insert them.
+
+        Only the windows of the gaps are fetched, gaps closer than a download window are fetched together.
+        The store is rewritten from the first filled gap on and the OHLCV data is read again.
+
+        Args:
+            bin_size (list): The bin sizes for the historical data.
+            report (CandleReport, optional): The candle check of the loaded data. Defaults to None, to check it.
+        Returns:
+            int: The number of inserted candles.
+        """
+        if report is None:
+            report = scan_candles(self.df_ohlcv.index if isinstance(self.df_ohlcv.index, pd.DatetimeIndex) \
+                                  else self.df_ohlcv.iloc[:, 0])
+        if not report.gaps:
+            return 0
+
+        fetch_bin_size = '1m' if self.minute_granularity else bin_size[0]
+        window = report.interval * 99
+
+        # join gaps which fit in one download window
+        windows = []
+        for first, last in report.gaps:
+            if windows and first - windows[-1][0] <= window:
+                windows[-1][1] = last
+            else:
+                windows.append([first, last])
+
+        logger.info(f"Repairing {report.missing} missing candles in {len(report.gaps)} gaps "
+                    f"with {len(windows)} downloads")
+
+        sources = []
+        for first, last in windows:
+            source = self.fetch_ohlcv(bin_size=fetch_bin_size, start_time=first - report.interval, end_time=last)
+            # keep the fetched candles inside the gap window only, the history around it is already stored
+            sources.append(source.loc[(source.index >= first) & (source.index <= last)].dropna())
+            time.sleep(0.25)
+
+        store = OHLCVStore(self.OHLC_DIRNAME)
+        inserted = store.merge(pd.concat(sources)) if sources else 0
+        logger.info(f"Repaired {inserted} candles, {report.missing - inserted} are not available")
+
+        if inserted > 0:
+            self.df_ohlcv = store.read(mmap=self.ohlcv_mmap, set_index=True)
+            if self.check_candles_flag:
+                self.candle_report = self.check_candles(self.df_ohlcv)
+        return inserted
+
+    def __closed_candles(self, data, end_time):
+        """
+        Drop the candle still open at the end of the download, labelled with a close time after it,
+        so the store only holds final candles and its updates are appends.
+
+        Args:
+            data (pd.DataFrame): The downloaded OHLCV data, labelled by close time.
+            end_time (datetime): The time the data was downloaded up to.
+        Returns:
+            pd.DataFrame: The closed candles.
+        """
+        times = data.index if isinstance(data.index, pd.DatetimeIndex) else pd.to_datetime(data.iloc[:, 0], utc=True)
+        return data[np.asarray(times <= end_time)]
+
+    def __load_ohlcv_store(self, bin_size, start_time, end_time):
+        """
+        Load the historical OHLCV data from the columnar store, updating it with an append if needed.
+
+        Args:
+            bin_size (list): The bin sizes for the historical data.
+            start_time (datetime): The time to start downloading from when the store is empty.
+            end_time (datetime): The time to download up to.
+        """
+        store = OHLCVStore(self.OHLC_DIRNAME)
+
+        if not store.exists() and os.path.exists(self.OHLC_FILENAME):
+            logger.info(f"Migrating {self.OHLC_FILENAME} to the OHLCV store")
+            store.write(load_data(self.OHLC_FILENAME))
+
+        if not store.exists():
+            store.write(self.__closed_candles(self.download_data(bin_size, start_time, end_time), end_time))
+
+        elif self.update_data:
+            rows = len(store) - 1 # exclude last candle, which an older store may hold before it closed
+            data = self.download_data(bin_size, store.last_time(rows) if rows > 0 else start_time, end_time)
+            # the last candle is downloaded again, it is only rewritten if it changed
+            store.append(self.__closed_candles(data, end_time), keep_rows=rows)
+
+        self.df_ohlcv = store.read(mmap=self.ohlcv_mmap, set_index=True)
 			    
     def show_result(self, plot=True):
         """
         Display the backtesting results.
 
         This function displays the backtesting results, including trade count, balance, profit rate, win rate,
-        profit factor, Sharpe ratio, and max drawdown.
+        profit factor, Sharpe, Sortino and Calmar ratios, max drawdown and its duration, exposure
+        and the distribution of the trade profits (see `src.backtest_metrics`).
 
         It also plots the price chart and any additional plot data provided during backtesting.
         """
         if conf["args"].html_report:
-            DATA_FILENAME = self.OHLC_FILENAME #OHLC_FILENAME.format("binance_futures", self.pair, self.bin_size)
-            shutil.copy(DATA_FILENAME, 'html/data/data.csv')
+            if self.use_ohlcv_store:
+                OHLCVStore(self.OHLC_DIRNAME).export_csv('html/data/data.csv')
+            else:
+                DATA_FILENAME = self.OHLC_FILENAME #OHLC_FILENAME.format("binance_futures", self.pair, self.bin_size)
+                shutil.copy(DATA_FILENAME, 'html/data/data.csv')
             ORDERS_FILENAME = os.path.join(os.getcwd(), "./", conf["args"].order_log)
             shutil.copy(ORDERS_FILENAME, 'html/data/orders.csv')
         
+        metrics = backtest_metrics(self)
+        trades = metrics["trades"]
+
         logger.info(f"============== Result ================")
         logger.info(f"TRADE COUNT         : {self.order_count}")
         logger.info(f"BALANCE             : {self.get_balance()}")
         logger.info(f"PROFIT RATE         : {self.get_balance()/self.start_balance*100} %")
         logger.info(f"WIN RATE            : {0 if self.order_count == 0 else self.win_count/(self.win_count + self.lose_count)*100} %")
         logger.info(f"PROFIT FACTOR       : {self.win_profit if self.lose_loss == 0 else self.win_profit/self.lose_loss}")
-        logger.info(f"SHARPE RATIO        : {sharpe_ratio(self.balance_history, 0)}")
+        logger.info(f"ANNUAL RETURN       : {metrics['annual_return']:.2f} %")
+        logger.info(f"SHARPE RATIO        : {metrics['sharpe']:.4f}")
+        logger.info(f"SORTINO RATIO       : {metrics['sortino']:.4f}")
+        logger.info(f"CALMAR RATIO        : {metrics['calmar']:.4f}")
         logger.info(f"MAX DRAW DOWN TOTAL : {round(self.max_draw_down_session, 4)} or {round(self.max_draw_down_session_perc, 2)}%")
+        logger.info(f"MAX DRAW DOWN BARS  : {metrics['max_draw_down_duration']}")
+        logger.info(f"EXPOSURE            : {metrics['exposure']:.2f} %")
+        logger.info(f"TRADE PROFIT        : mean {trades['expectancy']:.4f}, median {trades['median']:.4f}, "
+                    f"std {trades['std']:.4f}, best {trades['best']:.4f}, worst {trades['worst']:.4f}")
+        logger.info(f"AVERAGE WIN / LOSS  : {trades['average_win']:.4f} / {trades['average_loss']:.4f}")
+        logger.info(f"MAX CONSECUTIVE W/L : {trades['max_consecutive_wins']} / {trades['max_consecutive_losses']}")
         logger.info(f"======================================")
 
         if not plot:
@@ -470,6 +839,7 @@ class BackTest(Stub):
 
         import matplotlib.pyplot as plt
 
+        index = self.df_ohlcv.index
         plt_num = len([k for k, v in self.plot_data.items() if not v['overlay']]) + 2
         i = 1
 
@@ -477,25 +847,15 @@ class BackTest(Stub):
         plt.suptitle(self.pair + f" - {self.bin_size}", fontsize=12)
 
         plt.subplot(plt_num,1,i)
-        plt.plot(self.df_ohlcv.index, self.df_ohlcv["high"])
-        plt.plot(self.df_ohlcv.index, self.df_ohlcv["low"])
+        self.__plot_series(plt, index, self.df_ohlcv["high"].values)
+        self.__plot_series(plt, index, self.df_ohlcv["low"].values)
 
         for k, v in self.plot_data.items():
             if v['overlay']:
-                color = v['color']
-                # Filter columns 
-                filtered_columns = [col for col in self.df_ohlcv if col.startswith(k)]               
-
-                if len(filtered_columns) == 1:
-                    plt.plot(self.df_ohlcv.index, self.df_ohlcv[k], color, label=k)
-                else:          
-                    # Iterate over columns if multiple values are needed to plot per sublot          
-                    for column in filtered_columns:
-                        plt.plot(self.df_ohlcv.index, self.df_ohlcv[column], f'#{random.randint(0, 0xFFFFFF):06x}', label=column)
-                plt.legend(fontsize=5)
+                self.__plot_columns(plt, index, k, v)
         plt.ylabel("Price(USD)")
-        ymin = min(self.df_ohlcv["low"]) - 0.05
-        ymax = max(self.df_ohlcv["high"]) + 0.05
+        ymin = self.df_ohlcv["low"].min() - 0.05
+        ymax = self.df_ohlcv["high"].max() + 0.05
         plt.vlines(self.buy_signals, ymin, ymax, "blue", linestyles='dashed', linewidth=1)
         plt.vlines(self.sell_signals, ymin, ymax, "red", linestyles='dashed', linewidth=1)
         plt.vlines(self.close_signals, ymin, ymax, "green", linestyles='dashed', linewidth=1)
@@ -504,36 +864,59 @@ class BackTest(Stub):
 
         for k, v in self.plot_data.items():
             if not v['overlay']:
-                plt.subplot(plt_num,1,i)                                
-                color = v['color']
-
-                # Filter columns
-                filtered_columns = [col for col in self.df_ohlcv if col.startswith(k)]               
-
-                if len(filtered_columns) == 1:
-                    plt.plot(self.df_ohlcv.index, self.df_ohlcv[k], color, label=k)
-                else:          
-                    # Iterate over columns if multiple values are needed to plot per sublot          
-                    for column in filtered_columns:
-                        plt.plot(self.df_ohlcv.index, self.df_ohlcv[column], f'#{random.randint(0, 0xFFFFFF):06x}', label=column)
-
+                plt.subplot(plt_num,1,i)
+                self.__plot_columns(plt, index, k, v)
                 plt.ylabel(f"{k}")
-                plt.legend(fontsize=5)
                 i = i + 1
 
         plt.subplot(plt_num,1,i)
-        plt.plot(self.df_ohlcv.index, self.balance_history)
-        plt.hlines(y=0, xmin=self.df_ohlcv.index[0],
-                   xmax=self.df_ohlcv.index[-1], colors='k', linestyles='dashed')
-        plt.ylabel("PL(USD)")        
+        self.__plot_series(plt, index[:len(self.balance_history)], self.balance_history)
+        plt.hlines(y=0, xmin=index[0],
+                   xmax=index[-1], colors='k', linestyles='dashed')
+        plt.ylabel("PL(USD)")
         plt.show()
 
+    def __plot_columns(self, plt, index, name, plot):
+        """
+        Draw the series of a plot, in its color if it has a single series and in random colors otherwise.
+        Args:
+            plt: The matplotlib.pyplot module.
+            index (pd.DatetimeIndex): The time axis of the series.
+            name (str): The name of the plot.
+            plot (dict): The plot data (color, overlay and series).
+        """
+        series = plot['series']
+        if len(series) == 1:
+            self.__plot_series(plt, index, next(iter(series.values())), plot['color'], label=name)
+        else:
+            # Iterate over columns if multiple values are needed to plot per sublot
+            for column, values in series.items():
+                self.__plot_series(plt, index, values, f'#{random.randint(0, 0xFFFFFF):06x}', label=column)
+        plt.legend(fontsize=5)
+
+    def __plot_series(self, plt, index, values, *args, **kwargs):
+        """
+        Draw a series, decimated to `plot_points` points with `plot_decimation`.
+        Args:
+            plt: The matplotlib.pyplot module.
+            index (pd.DatetimeIndex): The time axis of the series.
+            values (ndarray): The values of the series.
+            *args, **kwargs: Passed to `plt.plot`.
+        """
+        if self.plot_points and len(values) > self.plot_points:
+            if self.plot_decimation == "lttb":
+                kept = lttb_indices(index.asi8, values, self.plot_points)
+            else:
+                kept = min_max_indices(values, self.plot_points)
+            index, values = index[kept], values[kept]
+        plt.plot(index, values, *args, **kwargs)
+
     def plot(self, name, value, color, overlay=True):
         """
         Draw the graph
         Args:
             name (str): The name of the graph.
-            value (dict, int, float): The data values for the graph. 
+            value (dict, int, float): The data values for the graph.
                 If a dict is provided, each key-value pair represents a column name and its corresponding value.
                 If a list or np.ndarray is provided, it represents a single column of values.
             color (str): The color of the graph.
@@ -541,18 +924,33 @@ class BackTest(Stub):
                 Defaults to True.
         Returns:
             None
-        """        
+        """
+        if name not in self.plot_data:
+            self.plot_data[name] = {'color': color, 'overlay': overlay, 'series': {}}
+
         try:
             if isinstance(value, dict):
                 for k,v in value.items():
-                    self.df_ohlcv.at[self.index, name + '_' + k] = v
-                            
+                    self.__plot_value(name, name + '_' + k, v)
+
             elif isinstance(value, (int, float, np.number)): #elif isinstance(value, list) or isinstance(value, np.ndarray):
-                self.df_ohlcv.at[self.index, name] = value
+                self.__plot_value(name, name, value)
             else:
                 raise ValueError("Invalid value type. Expected dict, integer, or float.")
         except Exception as e:
-            print(f"Error: {e}")    
-        
-        if name not in self.plot_data:
-            self.plot_data[name] = {'color': color, 'overlay': overlay}
\ No newline at end of file
+            print(f"Error: {e}")
+
+    def __plot_value(self, name, column, value):
+        """
+        Write the value of a series at the current bar, the series are preallocated over the OHLCV data.
+        Args:
+            name (str): The name of the graph.
+            column (str): The name of the series.
+            value (int, float): The value.
+        """
+        if self.bar_index is None:
+            raise ValueError("No bar to plot on, the back test has not started.")
+        series = self.plot_data[name]['series']
+        if column not in series:
+            series[column] = np.full(len(self.df_ohlcv), np.nan)
+        series[column][self.bar_index] = value
@@ -0,0 +1,137 @@
+# coding: UTF-8
+
+import threading
+import time
+
+
+class BidAskThrottle:
+    """
+    Coalesce the best bid/ask changes passed to a callback, e.g. the one repricing a chaser order.
+
+    Every best bid/ask tick otherwise calls the callback, and every call may cancel and replace an order
+    over REST, which ends in cancel storms and rate limit errors in fast markets. Here a side is only reported
+    as changed once its price is `min_ticks` ticks away from the price last reported to the callback,
+    and the callback is called at most once every `min_interval` seconds. A change suppressed by the interval
+    is not lost: it is reported, with the latest prices, once the interval is over. The report is run by
+    `call_later`, e.g. `BinanceFuturesWs.call_later`, which runs it one after the other with the websocket
+    handlers, so the callback never runs concurrently with the order updates. Without `call_later` it is only
+    reported by the first best bid/ask change after the interval.
+    With the defaults (0 and 0) every change is passed through, as without a throttle.
+
+    # Example usage:
+    throttle = BidAskThrottle(lambda: (exchange.best_bid_price, exchange.best_ask_price),
+                              min_interval=0.5, min_ticks=2, tick_size=0.1, call_later=exchange.ws.call_later)
+    exchange.add_ob_callback("chaser", throttle.wrap(on_bid_ask_change))
+    """
+
+    def __init__(self, prices, min_interval=0, min_ticks=0, tick_size=0, call_later=None):
+        """
+        Constructor for BidAskThrottle class.
+        Args:
+            prices (function): Returns the current best bid and best ask prices.
+            min_interval (float, optional): The minimum seconds between two calls of the callback. Defaults to 0.
+            min_ticks (int, optional): The minimum price change of a side, in ticks. Defaults to 0, any change.
+            tick_size (float, optional): The price of a tick. Defaults to 0.
+            call_later (function, optional): Called with a delay in seconds and a function to run after it,
+                on the thread or worker running the callback. Defaults to None.
+        """
+        self.prices = prices
+        self.min_interval = min_interval
+        self.min_distance = min_ticks * tick_size
+        self.call_later = call_later
+        # Best bid and ask last reported to the callback
+        self.bid_price, self.ask_price = prices()
+        # Time of the last call of the callback (time.monotonic)
+        self.last_call = 0
+        self.lock = threading.Lock()
+        # True while a change suppressed by the interval waits to be reported by `call_later`
+        self.pending = False
+        # Calls of the callback
+        self.calls = 0
+        # Changes suppressed as smaller than min_ticks
+        self.suppressed_ticks = 0
+        # Changes suppressed as within min_interval of the last call
+        self.suppressed_interval = 0
+
+    def wrap(self, callback):
+        """
+        Throttle a best bid/ask change callback.
+        Args:
+            callback (function): Called with best_bid_changed and best_ask_changed, as by `add_ob_callback`.
+        Returns:
+            function: The callback to register with `add_ob_callback`.
+        """
+        def throttled(best_bid_changed=True, best_ask_changed=True):
+            self.update(callback)
+        return throttled
+
+    def update(self, callback):
+        """
+        Call the callback if the best bid/ask moved far enough from the prices last reported, and long enough
+        after the last call.
+        Args:
+            callback (function): Called with best_bid_changed and best_ask_changed.
+        """
+        with self.lock:
+            bid_price, ask_price = self.prices()
+            best_bid_changed = self.__moved(bid_price, self.bid_price)
+            best_ask_changed = self.__moved(ask_price, self.ask_price)
+            if not (best_bid_changed or best_ask_changed):
+                self.suppressed_ticks += 1
+                return
+
+            now = time.monotonic()
+            if now - self.last_call < self.min_interval:
+                # reported once the interval is over, the prices last reported are kept
+                self.suppressed_interval += 1
+                if self.call_later is not None and not self.pending:
+                    self.pending = True
+                    self.call_later(self.last_call + self.min_interval - now, lambda: self.__flush(callback))
+                return
+
+            if best_bid_changed:
+                self.bid_price = bid_price
+            if best_ask_changed:
+                self.ask_price = ask_price
+            self.last_call = now
+            self.calls += 1
+        # outside the lock, the callback may cancel an order over REST
+        callback(best_bid_changed, best_ask_changed)
+
+    def __flush(self, callback):
+        """
+        Report the change suppressed by the interval, run by `call_later`.
+        """
+        with self.lock:
+            if not self.pending:
+                return
+            self.pending = False
+        self.update(callback)
+
+    def __moved(self, price, reported_price):
+        if price is None or reported_price is None:
+            return price != reported_price
+        return price != reported_price and abs(price - reported_price) >= self.min_distance
+
+    def reset(self):
+        """
+        Report the current best bid/ask as unchanged from now on, e.g. once an order is placed at it.
+        """
+        with self.lock:
+            self.bid_price, self.ask_price = self.prices()
+
+    def cancel(self):
+        """
+        Drop the change waiting to be reported, e.g. once the callback is removed.
+        """
+        with self.lock:
+            self.pending = False
+
+    def stats(self):
+        """
+        Get the counters of the throttle.
+        Returns:
+            dict: calls of the callback, changes suppressed by min_ticks and changes suppressed by min_interval.
+        """
+        return {"calls": self.calls, "suppressed_ticks": self.suppressed_ticks,
+                "suppressed_interval": self.suppressed_interval}
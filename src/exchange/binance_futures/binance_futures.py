@@ -4,11 +4,13 @@ import json
 import math
 import os
 import traceback
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from inspect import signature
 import time
 import threading
 
+import numpy as np
 import pandas as pd
 from bravado.exception import HTTPNotFound
 from pytz import UTC
@@ -21,7 +23,13 @@ from src.config import config as conf
 from src.exchange_config import exchange_config
 from src.exchange.binance_futures.binance_futures_api import Client
 from src.exchange.binance_futures.binance_futures_websocket import BinanceFuturesWs
+from src.exchange.bid_ask_throttle import BidAskThrottle
+from src.exchange.messages import ceil_minute
 from src.exchange.binance_futures.exceptions import BinanceAPIException, BinanceRequestException
+from src.resampler import OHLCVRingBuffer
+
+# Klines per request
+KLINES_LIMIT = 1500
 
 
 class BinanceFutures:   
@@ -43,6 +51,19 @@ class BinanceFutures:
     # candle data that is no longer relevant. Be aware of these potential issues and make sure to handle them
     # appropriately in your strategy implementation.
     call_strat_on_start = False
+    # Parallel requests when downloading historical OHLCV data
+    ohlcv_download_workers = 4
+    # Run the websocket on the asyncio transport shared by all the exchanges instead of its own threads
+    async_websocket = False
+    # JSON decoder of the websocket messages, "orjson", "msgspec" or "json" (None for the first one installed)
+    json_decoder = None
+    # Websocket events waiting for the strategy and the other handlers, which then run off the websocket thread,
+    # 0 (default) to run them on the websocket thread
+    event_queue_size = 0
+    # Minimum seconds between two reprices of a chaser order
+    chaser_min_reprice_interval = 0
+    # Minimum best bid/ask change repricing a chaser order, in ticks (0 for any change)
+    chaser_min_reprice_ticks = 0
 
     def __init__(self, account, pair, demo=False, threading=True):
         """
@@ -716,8 +737,10 @@ class BinanceFutures:
             trigger_by (str, optional): Price type to use, "CONTRACT_PRICE" by default. Defaults to "CONTRACT_PRICE".
             split (int, optional): Number of orders to split the quantity into (iceberg order). Defaults to 1.
             interval (int, optional): Interval between orders (iceberg order). Defaults to 0.
-            chaser (bool, optional): If True, a chaser order is placed to follow the Best Bid/Ask (BBA) Price.
+            chaser (bool or dict, optional): If True, a chaser order is placed to follow the Best Bid/Ask (BBA) Price.
                 As soon as BBA changes, the existing order is canceled, and a new one is placed at the new BBA for the remaining quantity. Defaults to False.
+                A dict such as {"min_interval": 0.5, "min_ticks": 2} places a chaser repricing at most every min_interval seconds
+                and once BBA moved min_ticks ticks, instead of chaser_min_reprice_interval and chaser_min_reprice_ticks.
             retry_maker (int, optional): Number of times to retry placing a maker order if it fails. Defaults to 100.
         """
         self.__init_client()
@@ -794,8 +817,10 @@ class BinanceFutures:
             trigger_by (str, optional): Price type to use, "CONTRACT_PRICE" by default. Defaults to "CONTRACT_PRICE".
             split (int, optional): Number of orders to split the quantity into (iceberg order). Defaults to 1.
             interval (int, optional): Interval between orders (iceberg order). Defaults to 0.
-            chaser (bool, optional): If True, a chaser order is placed to follow the Best Bid/Ask (BBA) Price.
+            chaser (bool or dict, optional): If True, a chaser order is placed to follow the Best Bid/Ask (BBA) Price.
                 As soon as BBA changes, the existing order is canceled, and a new one is placed at the new BBA for the remaining quantity. Defaults to False.
+                A dict such as {"min_interval": 0.5, "min_ticks": 2} places a chaser repricing at most every min_interval seconds
+                and once BBA moved min_ticks ticks, instead of chaser_min_reprice_interval and chaser_min_reprice_ticks.
             retry_maker (int, optional): Number of times to retry placing a maker order if it fails. Defaults to 100.
         """   
 
@@ -876,8 +901,10 @@ class BinanceFutures:
             trigger_by (str, optional): Price type to use, "CONTRACT_PRICE" by default. Defaults to "CONTRACT_PRICE".
             split (int, optional): Number of orders to split the quantity into (iceberg order). Defaults to 1.
             interval (int, optional): Interval between orders (iceberg order). Defaults to 0.
-            chaser (bool, optional): If True, a chaser order is placed to follow the Best Bid/Ask (BBA) Price.
+            chaser (bool or dict, optional): If True, a chaser order is placed to follow the Best Bid/Ask (BBA) Price.
                 As soon as BBA changes, the existing order is canceled, and a new one is placed at the new BBA for the remaining quantity. Defaults to False.
+                A dict such as {"min_interval": 0.5, "min_ticks": 2} places a chaser repricing at most every min_interval seconds
+                and once BBA moved min_ticks ticks, instead of chaser_min_reprice_interval and chaser_min_reprice_ticks.
             retry_maker (int, optional): Number of times to retry placing a maker order if it fails. Defaults to 100.
         """
         self.__init_client()
@@ -940,6 +967,7 @@ class BinanceFutures:
         if chaser:
 
             exchange = self
+            chaser_config = chaser if isinstance(chaser, dict) else {}
 
             class Chaser:
 
@@ -978,6 +1006,13 @@ class BinanceFutures:
                     self.current_order_id = None
                     # if no limit price is set, set it to best bid/ask price
                     self.current_order_price = self.limit if self.limit != 0 else self.price()
+                    # Coalesce the best bid/ask changes repricing the order
+                    self.throttle = BidAskThrottle(lambda: (exchange.best_bid_price, exchange.best_ask_price),
+                                                   chaser_config.get("min_interval", exchange.chaser_min_reprice_interval),
+                                                   chaser_config.get("min_ticks", exchange.chaser_min_reprice_ticks),
+                                                   10 ** -exchange.quote_rounding,
+                                                   exchange.ws.call_later)
+                    self.bid_ask_callback = self.throttle.wrap(self.on_bid_ask_change)
                     # First order will be sent without post-only flag irrespective
                     # and post-only will be used once the order is triggered
                     self.order(retry_maker, 
@@ -1028,11 +1063,13 @@ class BinanceFutures:
                 def start(self):
                     self.started = True #started
                     self.start_price = self.price()
-                    exchange.add_ob_callback(self.order_id, self.on_bid_ask_change)      
+                    self.throttle.reset()
+                    exchange.add_ob_callback(self.order_id, self.bid_ask_callback)      
                     logger.info(f"Chaser Active: {self.order_id}")              
 
                 def end(self):
                     exchange.remove_ob_callback(self.order_id)
+                    self.throttle.cancel()
 
                 def avg_price(self, print_suborders=False):
                     order_value = 0
@@ -1054,6 +1091,9 @@ class BinanceFutures:
                     logger.info(f"--------------------------------------")
                     logger.info(f"Avg Price: {avg_price}")
                     logger.info(f"Slippage: {slippage*100:.2f}%")
+                    throttle_stats = self.throttle.stats()
+                    suppressed = throttle_stats["suppressed_ticks"] + throttle_stats["suppressed_interval"]
+                    logger.info(f"Reprices: {throttle_stats['calls']} Suppressed BBA Updates: {suppressed}")
                     logger.info(f"--------------------------------------")
 
                     log_metrics(datetime.utcnow(), "chaser", {
@@ -1061,7 +1101,10 @@ class BinanceFutures:
                         "quantity": self.qty,
                         "start_price": self.start_price,
                         "avg_price": avg_price,
-                        "slippage": round(slippage*100, 3)                        
+                        "slippage": round(slippage*100, 3),
+                        "reprices": throttle_stats["calls"],
+                        "suppressed_ticks": throttle_stats["suppressed_ticks"],
+                        "suppressed_interval": throttle_stats["suppressed_interval"]
                     },
                     {
                         "exchange": conf["args"].exchange,
@@ -1076,6 +1119,7 @@ class BinanceFutures:
                     self.started = False #canceled
                     if self.current_order_id is not None:
                         exchange.remove_ob_callback(self.order_id)
+                        self.throttle.cancel()
                         self.cancel_order(self.current_order_id)
 
                 def cancel_order(self, id):
@@ -1129,6 +1173,7 @@ class BinanceFutures:
 
                         if self.current_order_id is not None :
                             exchange.remove_ob_callback(self.order_id)
+                            self.throttle.cancel()
                             self.cancel_order(self.current_order_id)
                             logger.info(f"Chaser: Cancel Order : {self.current_order_id} : Price Changed - {self.current_order_price} -> {self.price()}")
                             self.current_order_id = None
@@ -1149,7 +1194,8 @@ class BinanceFutures:
                                 self.limit_tracker(self.limit)        
                         else:
                             # new sub-order - start ob chaser
-                            exchange.add_ob_callback(self.order_id, self.on_bid_ask_change)
+                            self.throttle.reset()
+                            exchange.add_ob_callback(self.order_id, self.bid_ask_callback)
 
                     if self.stop != 0 and order["status"] == "TRIGGERED":
                         logger.info(f"Chaser Event: {order['id']} is Triggered @ {order['stop']}!")
@@ -1574,6 +1620,9 @@ class BinanceFutures:
         """
         Fetch OHLCV data within the specified time range.
 
+        The range is split into windows of one request each, which are fetched by
+        `ohlcv_download_workers` threads, the client keeps them within the request weight limit.
+
         Args:
             bin_size (str): Time frame to fetch (e.g., "1m", "1h", "1d").
             start_time (datetime): Start time of the data range.
@@ -1584,14 +1633,49 @@ class BinanceFutures:
         """          
         self.__init_client()        
         fetch_bin_size = allowed_range[bin_size][0]
+        window = delta(fetch_bin_size) * KLINES_LIMIT
+
+        windows = []
         left_time = start_time
-        right_time = end_time
-        data = to_data_frame([])
+        while left_time <= end_time:
+            windows.append((left_time, min(left_time + window - timedelta(milliseconds=1), end_time)))
+            left_time = left_time + window
+
+        workers = max(1, min(self.ohlcv_download_workers, len(windows)))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pages = list(executor.map(lambda w: self.__fetch_klines(fetch_bin_size, w[0], w[1]), windows))
+        else:
+            pages = [self.__fetch_klines(fetch_bin_size, w[0], w[1]) for w in windows]
+
+        klines = [kline for page in pages for kline in page]
+        data = to_data_frame({
+            "timestamp": pd.to_datetime([k[6] for k in klines], unit="ms", utc=True),
+            "high": np.array([k[2] for k in klines], dtype=np.float64),
+            "low": np.array([k[3] for k in klines], dtype=np.float64),
+            "open": np.array([k[1] for k in klines], dtype=np.float64),
+            "close": np.array([k[4] for k in klines], dtype=np.float64),
+            "volume": np.array([k[5] for k in klines], dtype=np.float64)
+        })
+        data = data[~data.index.duplicated()].sort_index()
 
-        while True:
-            if left_time > right_time:
-                break
-            
+        return resample(data, bin_size)        
+
+    def __fetch_klines(self, fetch_bin_size, left_time, right_time):
+        """
+        Fetch the klines of one download window.
+
+        Args:
+            fetch_bin_size (str): Time frame of the klines.
+            left_time (datetime): Open time of the first kline.
+            right_time (datetime): Latest open time of the last kline.
+
+        Returns:
+            list: The klines as returned by the API.
+        """
+        klines = []
+
+        while left_time <= right_time:
             left_time_to_timestamp = int(datetime.timestamp(left_time)*1000)
             right_time_to_timestamp = int(datetime.timestamp(right_time)*1000)   
 
@@ -1601,34 +1685,14 @@ class BinanceFutures:
                                                               interval=fetch_bin_size,
                                                               startTime=left_time_to_timestamp, 
                                                               endTime=right_time_to_timestamp,
-                                                              limit=1500))
-            if len(source) == 0:
-                break
-            
-            source_to_object_list =[]
-           
-            for s in source:   
-                timestamp_to_datetime = datetime.fromtimestamp(s[6]/1000).astimezone(UTC)               
-                source_to_object_list.append({
-                        "timestamp" : timestamp_to_datetime,
-                        "high" : float(s[2]),
-                        "low" : float(s[3]),
-                        "open" : float(s[1]),
-                        "close" : float(s[4]),
-                        "volume" : float(s[5])
-                })
-                                   
-            source = to_data_frame(source_to_object_list)
-
-            data = pd.concat([data, source])
-                       
-            if right_time > source.iloc[-1].name + delta(fetch_bin_size):
-                left_time = source.iloc[-1].name + delta(fetch_bin_size)
-                time.sleep(2)                
-            else:                
+                                                              limit=KLINES_LIMIT))
+            klines.extend(source)
+
+            if len(source) < KLINES_LIMIT:
                 break
-        
-        return resample(data, bin_size)        
+            left_time = datetime.fromtimestamp(source[-1][0]/1000).astimezone(UTC) + delta(fetch_bin_size)
+
+        return klines
 
     def security(self, bin_size, data=None):
         """
@@ -1644,7 +1708,7 @@ class BinanceFutures:
             timeframe_list = [allowed_range_minute_granularity[t][3] for t in self.bin_size]
             timeframe_list.sort(reverse=True)
             t = find_timeframe_string(timeframe_list[-1])     
-            data = self.timeframe_data[t]      
+            data = self.timeframe_data[t].to_data_frame(partial=True)
             
         return resample(data, bin_size)[:-1]      
 
@@ -1659,14 +1723,15 @@ class BinanceFutures:
         Args:
             action (str): The allowed range for updating the OHLCV data.
                         This could be a minute granularity (e.g., '1m', '5m', '15m') or a custom range.
-            new_data (pd.DataFrame): New OHLCV data to be added. It should be a pandas DataFrame with
-                                    a DatetimeIndex and columns for 'open', 'high', 'low', 'close', and 'volume'.
+            new_data (Kline): The candle of the websocket, its timestamp (nanoseconds) and
+                              'open', 'high', 'low', 'close' and 'volume' values.
         Returns:
             None
         """
         # Binance can output wierd timestamps - Eg. 2021-05-25 16:04:59.999000+00:00
         # We need to round up to the nearest second for further processing
-        new_data = new_data.rename(index={new_data.iloc[0].name: new_data.iloc[0].name.ceil(freq='1T')})               
+        timestamp = ceil_minute(new_data.timestamp)
+        candle = new_data[1:]
 
         # If OHLCV data is not initialized, create and fetch data
         if self.timeframe_data is None:
@@ -1674,25 +1739,23 @@ class BinanceFutures:
             for t in self.bin_size:                              
                 end_time = datetime.now(timezone.utc)
                 start_time = end_time - self.ohlcv_len * delta(t)
-                self.timeframe_data[t] = self.fetch_ohlcv(t, start_time, end_time)
-                #logger.info(f"timeframe_data: {self.timeframe_data}") 
+                data = self.fetch_ohlcv(t, start_time, end_time)
 
+                # Closed candles and the candle being built, updated in place by the websocket candles
+                self.timeframe_data[t] = OHLCVRingBuffer(allowed_range_minute_granularity[t][1]
+                                                         if self.minute_granularity else allowed_range[t][1],
+                                                         self.ohlcv_len + 1)
+                self.timeframe_data[t].load(data)
                 self.timeframe_info[t] = {
                     "allowed_range": allowed_range_minute_granularity[t][0] 
                                     if self.minute_granularity else allowed_range[t][0], 
-                    "ohlcv": self.timeframe_data[t][:-1], # Dataframe with closed candles                                                   
-                    "last_action_time": None,#self.timeframe_data[t].iloc[-1].name, # Last strategy execution time
-                    "last_candle": self.timeframe_data[t].iloc[-2].values,  # Store last complete candle
-                    "partial_candle": self.timeframe_data[t].iloc[-1].values  # Store incomplete candle
+                    "ohlcv": data[:-1], # Dataframe with closed candles                                                   
+                    "last_action_time": None,#data.iloc[-1].name, # Last strategy execution time
+                    "last_candle": data.iloc[-2].values,  # Store last complete candle
+                    "partial_candle": self.timeframe_data[t].partial  # Incomplete candle, updated in place
                 }
-                # The last candle is an incomplete candle with timestamp in future                
-                if self.timeframe_data[t].iloc[-1].name > end_time:
-                    
-                    last_candle = self.timeframe_data[t].iloc[-1].values # Store last candle
-                    self.timeframe_data[t] = self.timeframe_data[t][:-1] # Exclude last candle
-                    self.timeframe_data[t].loc[end_time.replace(microsecond=0)] = last_candle #set last candle to end_time
 
-                logger.info(f"Initial Buffer Fill - Last Candle: {self.timeframe_data[t].iloc[-1].name}")   
+                logger.info(f"Initial Buffer Fill - Last Candle: {data.iloc[-1].name}")   
         #logger.info(f"timeframe_data: {self.timeframe_data}") 
 
         # Timeframes to be updated
@@ -1713,52 +1776,41 @@ class BinanceFutures:
             if self.timeframes_sorted != None:             
                 t = find_timeframe_string(t)               
                     
-            # replace latest candle if timestamp is same or append
-            if self.timeframe_data[t].iloc[-1].name == new_data.iloc[0].name:
-                self.timeframe_data[t] = pd.concat([self.timeframe_data[t][:-1], new_data])
-            else:
-                self.timeframe_data[t] = pd.concat([self.timeframe_data[t], new_data])      
-
-            # exclude current candle data and store partial candle data
-            re_sample_data = resample(self.timeframe_data[t], 
-                                      t, 
-                                      minute_granularity=True if self.minute_granularity else False)
-            self.timeframe_info[t]['partial_candle'] = re_sample_data.iloc[-1].values # store partial candle data
-            re_sample_data =re_sample_data[:-1] # exclude current candle data
-
-            #logger.info(f"{self.timeframe_info[t]['last_action_time']} : {self.timeframe_data[t].iloc[-1].name} : {re_sample_data.iloc[-1].name}")  
+            # add the candle to the buffer, which closes the candle being built when the next one starts
+            buffer = self.timeframe_data[t]
+            buffer.update(timestamp, *candle)
+            last_time = buffer.last_time() # time of the last closed candle
+            if last_time is None:
+                continue
 
             if self.call_strat_on_start:
                 if self.timeframe_info[t]["last_action_time"] is not None and \
-                self.timeframe_info[t]["last_action_time"] == re_sample_data.iloc[-1].name:
+                self.timeframe_info[t]["last_action_time"] == last_time:
                     continue
             else:   
                 if self.timeframe_info[t]["last_action_time"] is None:
-                    self.timeframe_info[t]["last_action_time"] = re_sample_data.iloc[-1].name
+                    self.timeframe_info[t]["last_action_time"] = last_time
                     
-                if self.timeframe_info[t]["last_action_time"] == re_sample_data.iloc[-1].name:
+                if self.timeframe_info[t]["last_action_time"] == last_time:
                     continue
 
-            # The last candle in the buffer needs to be preserved 
-            # while resetting the buffer as it may be incomlete
-            # or contains latest data from WS
-            self.timeframe_data[t] = pd.concat([re_sample_data.iloc[-1 * self.ohlcv_len:, :], 
-                                                self.timeframe_data[t].iloc[[-1]]]) 
             #store ohlcv dataframe to timeframe_info dictionary
-            self.timeframe_info[t]["ohlcv"] = re_sample_data
-            #logger.info(f"Buffer Right Edge: {self.data.iloc[-1]}")
-            
-            open = re_sample_data['open'].values
-            close = re_sample_data['close'].values
-            high = re_sample_data['high'].values
-            low = re_sample_data['low'].values
-            volume = re_sample_data['volume'].values 
+            self.timeframe_info[t]["ohlcv"] = buffer.to_data_frame()
+
+            # copies of the closed candles, the views of the buffer change when it compacts or wraps
+            # and a strategy may keep the arrays of the previous bars
+            arrays = buffer.arrays()
+            open = arrays['open'].copy()
+            close = arrays['close'].copy()
+            high = arrays['high'].copy()
+            low = arrays['low'].copy()
+            volume = arrays['volume'].copy()
                                     
             try:
                 if self.strategy is not None:   
-                    self.timestamp = re_sample_data.iloc[-1].name.isoformat()           
+                    self.timestamp = last_time.isoformat()           
                     self.strategy(t, open, close, high, low, volume)              
-                self.timeframe_info[t]['last_action_time'] = re_sample_data.iloc[-1].name
+                self.timeframe_info[t]['last_action_time'] = last_time
             except FatalError as e:
                 # Fatal error
                 logger.error(f"Fatal error. {e}")
@@ -2082,21 +2134,21 @@ class BinanceFutures:
 
         Args:
             action (str): The action associated with the update (e.g., 'update', 'insert', 'delete').
-            bookticker (dict): The updated order book ticker data, containing best bid and best ask prices.
+            bookticker (BookTicker): The updated best bid and best ask prices and quantities.
 
         Returns:
             None
         """
         best_bid_changed = False
 
-        if( self.best_bid_price != float(bookticker['b']) ):
-            self.best_bid_price = float(bookticker['b'])
+        if( self.best_bid_price != bookticker.bid_price ):
+            self.best_bid_price = bookticker.bid_price
             best_bid_changed = True
 
         best_ask_changed = False            
 
-        if (self.best_ask_price != float(bookticker['a']) ):
-            self.best_ask_price = float(bookticker['a']) 
+        if (self.best_ask_price != bookticker.ask_price ):
+            self.best_ask_price = bookticker.ask_price
             best_ask_changed = True
             
         if best_bid_changed or best_ask_changed:
@@ -2104,8 +2156,8 @@ class BinanceFutures:
                 if callable(callback):
                     callback(best_bid_changed, best_ask_changed)  
 
-        self.bid_quantity_L1 = float(bookticker['B'])         
-        self.ask_quantity_L1 = float(bookticker['A']) 
+        self.bid_quantity_L1 = bookticker.bid_qty
+        self.ask_quantity_L1 = bookticker.ask_qty
         #logger.info(f"best bid: {self.best_bid_price}          best_ask: {self.best_ask_price}           bq_L1: {self.bid_quantity_L1}           aq_L1: {self.ask_quantity_L1}")
 
     def on_update(self, bin_size, strategy):
@@ -2133,7 +2185,10 @@ class BinanceFutures:
             if len(self.bin_size) > 0: 
                 for t in self.bin_size: 
                     klines.add(allowed_range_minute_granularity[t][0]) if self.minute_granularity else klines.add(allowed_range[t][0])
-            self.ws = BinanceFuturesWs(account=self.account, pair=self.pair, bin_size=sorted(klines), test=self.demo)
+            self.ws = BinanceFuturesWs(account=self.account, pair=self.pair, bin_size=sorted(klines), test=self.demo,
+                                       async_transport=self.async_websocket,
+                                       event_queue_size=self.event_queue_size,
+                                       json_decoder=self.json_decoder)
 
             #if len(self.bin_size) > 1:   
                 #self.minute_granularity=True  
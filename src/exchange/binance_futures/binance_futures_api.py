@@ -31,6 +31,66 @@ import logging
 from operator import itemgetter
 
 from .exceptions import BinanceAPIException, BinanceRequestException, BinanceWithdrawException
+from src.rate_limiter import RateLimiter, RateLimitedAdapter
+
+# Request weight limit per minute and IP, shared by all clients of this process
+REQUEST_WEIGHT_LIMIT = 2400
+REQUEST_WEIGHT_LIMITER = RateLimiter(REQUEST_WEIGHT_LIMIT, 60, fixed_window=True)
+
+# Request weights of the futures endpoints, (weight with symbol, weight without symbol); all others weigh 1.
+# The limiter is synced with the used weight Binance returns, so a changed weight only delays the adjustment.
+FUTURES_REQUEST_WEIGHTS = {
+    'ticker/24hr': (1, 40),
+    'ticker/price': (1, 2),
+    'ticker/bookTicker': (2, 5),
+    'openOrders': (1, 40),
+    'allOrders': (5, 5),
+    'userTrades': (5, 5),
+    'income': (30, 30),
+    'balance': (5, 5),
+    'account': (5, 5),
+    'positionRisk': (5, 5),
+    'batchOrders': (5, 5),
+    'fundingRate': (1, 1),
+    'historicalTrades': (20, 20),
+}
+
+
+def request_weight(request):
+    """
+    Get the request weight of a futures API request.
+    Args:
+        request (requests.PreparedRequest): The request.
+    Returns:
+        int: The weight of the request.
+    """
+    url = urlparse(request.url)
+    path = url.path.split('/fapi/', 1)[-1].split('/', 1)[-1] # strip the /fapi/v1/ prefix
+    params = dict(p.split('=', 1) for p in url.query.split('&') if '=' in p)
+    if request.body and isinstance(request.body, str):
+        params.update(p.split('=', 1) for p in request.body.split('&') if '=' in p)
+
+    if path in ('klines', 'continuousKlines', 'indexPriceKlines', 'markPriceKlines'):
+        limit = int(params.get('limit', 500))
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    if path == 'depth':
+        limit = int(params.get('limit', 500))
+        return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+    if path in FUTURES_REQUEST_WEIGHTS:
+        with_symbol, without_symbol = FUTURES_REQUEST_WEIGHTS[path]
+        return with_symbol if 'symbol' in params else without_symbol
+    return 1
+
+
+def request_limits(request):
+    return [(REQUEST_WEIGHT_LIMITER, request_weight(request))]
+
+
+def sync_used_weight(limiters, request, response):
+    used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+    if used is not None:
+        for limiter in limiters:
+            limiter.sync(limiter.capacity - int(used))
 
 
 class Client(object):
@@ -141,7 +201,7 @@ class Client(object):
         retry = Retry(total=730, #retry for more than 24 hours
                 backoff_factor=1, #0.5, 1, 2, 4, 8, 16, 32, 64, 128 intervals
                 status_forcelist=[ 500, 502, 503, 504 ])
-        adapter = HTTPAdapter(max_retries=retry)
+        adapter = RateLimitedAdapter(request_limits, sync=sync_used_weight, max_retries=retry)
         session.mount('http://', adapter)
         session.mount('https://', adapter)
         logging.getLogger("urllib3").setLevel(logging.ERROR)
@@ -12,7 +12,7 @@ import pandas as pd
 
 from src import (logger, allowed_range,
                  allowed_range_minute_granularity, 
-                 retry, delta, load_data, resample, symlink,
+                 retry, delta, resample, symlink,
                  find_timeframe_string, sync_obj_with_config)
 from src.indicators import sharpe_ratio
 from src.exchange_config import exchange_config
@@ -72,6 +72,7 @@ class BinanceFuturesBackTest(BackTest, BinanceFuturesStub):
     def download_data(self, bin_size, start_time, end_time):
         """
         Download or get the data and set variables related to OHLCV data.
+        The range is fetched concurrently by `fetch_ohlcv`, from the oldest available data when nothing is stored yet.
         Args:
             bin_size (str): The bin size for the OHLCV data.
             start_time (datetime): The start time for downloading data.
@@ -79,60 +80,23 @@ class BinanceFuturesBackTest(BackTest, BinanceFuturesStub):
         Returns:
             pd.DataFrame: The downloaded OHLCV data.
         """
-        data = pd.DataFrame()        
-        left_time = None
-        source = None
-        is_last_fetch = False                  
-        file = self.OHLC_FILENAME #OHLC_FILENAME.format("binance_futures", self.pair, self.bin_size)
-        search_left = self.search_oldest           
-
         if self.minute_granularity == True:
             #self.timeframe = bin_size.add('1m')  # add 1m timeframe to the set (sets wont allow duplicates) in case we need minute granularity 
             bin_size = '1m'                                  
         else:
             bin_size = bin_size[0]                                
 
-        while True:
-            try:
-                if left_time is None:
-                    left_time = start_time
-                    right_time = left_time + delta(allowed_range[bin_size][0]) * 99
-                else:
-                    left_time = source.iloc[-1].name #+ delta(allowed_range[bin_size][0]) * allowed_range[bin_size][2]
-                    right_time = left_time + delta(allowed_range[bin_size][0]) * 99
+        # an update starts from the stored data, the oldest data is only searched for on the first download
+        if not self.has_history():
+            while start_time < end_time:
+                right_time = min(start_time + delta(allowed_range[bin_size][0]) * 99, end_time)
+                if len(self.fetch_ohlcv(bin_size=bin_size, start_time=start_time, end_time=right_time)) > 0:
+                    break
 
-                if right_time > end_time:
-                    right_time = end_time
-                    is_last_fetch = True
-            
-            except IndexError as e:                
                 time.sleep(0.25)
                 start_time = start_time + timedelta(days=self.search_oldest if self.search_oldest else 1)
-                left_time = None
                 logger.info(f"Failed to fetch data, start stime is too far in history. \n"
                             f"                               >>>  Searching, please wait. <<<\n"
                             f"Searching for oldest viable historical data, next start time attempt: {start_time}")
-                continue
-
-            source = self.fetch_ohlcv(bin_size=bin_size, start_time=left_time, end_time=right_time)       
-
-            # if search_left and not os.path.exists(file):
-            #     time.sleep(0.35)                
-            #     logger.info(f"Searching for older historical data. \n"
-            #                 f"                               >>>  Searching, please wait. <<<")                
-            #     start_time = start_time - timedelta(days=self.search_oldest)
-            #     left_time = None
-                
-            #     if len(source) == 0:
-            #         search_left = False
-            #     continue
-            
-            # if(data.shape[0]):
-            #     logger.info(f"Last: {data.iloc[-1].name} Left: {left_time} Start: {source.iloc[0].name} Right: {right_time} End: {source.iloc[-1].name}")         
-     
-            data = pd.concat([data, source])   
-
-            if is_last_fetch:
-                return data
 
-            time.sleep(0.25)
\ No newline at end of file
+        return self.fetch_ohlcv(bin_size=bin_size, start_time=start_time, end_time=end_time)
\ No newline at end of file
@@ -1,7 +1,6 @@
 # coding: UTF-8
 import hashlib
 import hmac
-import json
 import os
 import threading
 import time
@@ -11,10 +10,13 @@ import requests
 
 import websocket
 from datetime import datetime
-from pytz import UTC
 
-from src import logger, to_data_frame, notify
+from src import logger, notify
 from src.config import config as conf
+from src.exchange import messages
+from src.exchange.messages import Kline, BookTicker
+from src.exchange.event_dispatcher import EventDispatcher
+from src.exchange.websocket_transport import AsyncTransport
 from src.exchange.binance_futures.binance_futures_api import Client
 
 
@@ -30,7 +32,7 @@ def get_listenkey(api_key, api_secret, testnet):
 
 class BinanceFuturesWs:    
 
-    def __init__(self, account, pair, bin_size, test=False):
+    def __init__(self, account, pair, bin_size, test=False, async_transport=False, event_queue_size=0, json_decoder=None):
         """
         constructor
         """
@@ -42,6 +44,11 @@ class BinanceFuturesWs:
         self.bin_size = bin_size
         # testnet
         self.testnet = test
+        # Run the websocket on the shared asyncio transport instead of its own threads
+        self.async_transport = async_transport
+        # JSON decoder of the messages, shared by all the websockets (None keeps the current one)
+        if json_decoder is not None:
+            messages.set_json_decoder(json_decoder)
         # domain
         domain = None
         # Use healthchecks.io
@@ -52,6 +59,13 @@ class BinanceFuturesWs:
         self.is_running = True
         # Notification destination listener
         self.handlers = {}
+        # Runs the handlers off the websocket thread, the book ticker and the 24hr ticker are latest-wins,
+        # in the thread pool of the asyncio transport when it is used. None to run them on the websocket thread
+        self.dispatcher = EventDispatcher(f"{self.pair}-events", event_queue_size, coalesce=["bookticker", "instrument"],
+                                          executor=AsyncTransport.instance().executor if async_transport else None) \
+                            if event_queue_size > 0 else None
+        # Without the dispatcher, runs the handlers one after the other with the functions of `call_later`
+        self.lock = threading.Lock()
         # listen key
         self.listenKey = None
         # API keys
@@ -64,6 +78,20 @@ class BinanceFuturesWs:
         else:
             self.domain = 'fstream.binance.com'
         self.__get_auth_user_data_streams()
+        self.__connect()
+        self.__keep_alive_user_datastream(self.listenKey)
+
+    def __connect(self):
+        """
+        connect the websocket, in its own thread or on the shared asyncio transport.
+        """
+        if self.async_transport:
+            self.ws = AsyncTransport.instance().connect(self.__get_wss_endpoint(),
+                                                        on_message=self.__on_message,
+                                                        on_error=self.__on_error,
+                                                        on_close=self.__on_close)
+            return
+
         self.ws = websocket.WebSocketApp(self.__get_wss_endpoint(),
                              on_message=self.__on_message,
                              on_error=self.__on_error,
@@ -72,7 +100,6 @@ class BinanceFuturesWs:
         self.wst = threading.Thread(target=self.__start)
         self.wst.daemon = True
         self.wst.start()
-        self.__keep_alive_user_datastream(self.listenKey)
 
     def __get_wss_endpoint(self):
         pair = self.pair.lower()
@@ -102,46 +129,53 @@ class BinanceFuturesWs:
         keep alive user data stream, needs to ping every 60m
         """              
         client = Client(self.api_key, self.api_secret, self.testnet)
-        def loop_function():
-            while self.is_running:
-                try:
-                    # retries 10 times over 486secs
-                    # before raising error/exception
-                    # check binance_futures_api.py line 113
-                    # for implementation details
-
-                    #client.stream_keepalive()
-                    listenKey = client.stream_get_listen_key() 
-                    
-                    if self.listenKey != listenKey:
-                        logger.info("listenKey Changed!")
-                        notify("listenKey Changed!")
-                        self.listenKey = listenKey
-                        self.ws.close()
+        def keep_alive():
+            try:
+                # retries 10 times over 486secs
+                # before raising error/exception
+                # check binance_futures_api.py line 113
+                # for implementation details
 
-                    # Send a heartbeat to Healthchecks.io
-                    if self.use_healthcecks:
-                        try:
-                            requests.get(conf['healthchecks.io'][self.account]['listenkey_heartbeat'])
-                            #logger.info("Listen Key Heart Beat sent!") 
-                        except Exception as e:
-                            pass
+                #client.stream_keepalive()
+                listenKey = client.stream_get_listen_key() 
+                
+                if self.listenKey != listenKey:
+                    logger.info("listenKey Changed!")
+                    notify("listenKey Changed!")
+                    self.listenKey = listenKey
+                    self.ws.close()
 
-                    time.sleep(600)
-                except Exception as e:
-                    logger.error(f"Keep Alive Error - {str(e)}")
-                    #logger.error(traceback.format_exc())
+                # Send a heartbeat to Healthchecks.io
+                if self.use_healthcecks:
+                    try:
+                        requests.get(conf['healthchecks.io'][self.account]['listenkey_heartbeat'])
+                        #logger.info("Listen Key Heart Beat sent!") 
+                    except Exception as e:
+                        pass
+                return True
+            except Exception as e:
+                logger.error(f"Keep Alive Error - {str(e)}")
+                #logger.error(traceback.format_exc())
 
-                    notify(f"Keep Alive Error - {str(e)}")
-                    #notify(traceback.format_exc())
+                notify(f"Keep Alive Error - {str(e)}")
+                #notify(traceback.format_exc())
+                return False
+
+        if listenKey is None:
+            self.__get_auth_user_data_streams()
+
+        if self.async_transport:
+            AsyncTransport.instance().call_every(600, keep_alive, delay=10, condition=lambda: self.is_running)
+            return
+
+        def loop_function():
+            while self.is_running:
+                if keep_alive():
+                    time.sleep(600)
 
         timer = threading.Timer(10, loop_function)
         timer.daemon = True
-        if listenKey is not None:  
-            timer.start()            
-        else: 
-            self.__get_auth_user_data_streams()
-            timer.start() 
+        timer.start()
           
     def __on_error(self, ws, exception):
         """
@@ -163,7 +197,7 @@ class BinanceFuturesWs:
         :return:
         """        
         try:
-            obj = json.loads(message)
+            obj = messages.loads(message)
             
             
             if 'e' in obj['data']:                
@@ -171,7 +205,12 @@ class BinanceFuturesWs:
                 action = ""                
                 datas = obj['data']                
                 
-                if e.startswith("kline"):
+                # the busiest stream first
+                if e == "bookTicker":
+                    self.__emit('bookticker', action, BookTicker(float(datas['b']), float(datas['B']),
+                                                                 float(datas['a']), float(datas['A']), datas['T']))
+
+                elif e.startswith("kline"):
                     if self.use_healthcecks:
                         current_minute = datetime.now().time().minute
                         if self.last_heartbeat != current_minute:
@@ -182,16 +221,11 @@ class BinanceFuturesWs:
                                 self.last_heartbeat = current_minute
                             except Exception as e:
                                 pass
-                    data = [{
-                        "timestamp" : datas['k']['T'],
-                        "high" : float(datas['k']['h']),
-                        "low" : float(datas['k']['l']),
-                        "open" : float(datas['k']['o']),
-                        "close" : float(datas['k']['c']),
-                        "volume" : float(datas['k']['v'])
-                    }]                     
-                    data[0]['timestamp'] = datetime.fromtimestamp(data[0]['timestamp']/1000).astimezone(UTC)                                        
-                    self.__emit(obj['data']['k']['i'], obj['data']['k']['i'], to_data_frame([data[0]]))                    
+                    k = datas['k']
+                    # close time of the candle, e.g. 16:04:59.999
+                    data = Kline(k['T'] * 1_000_000, float(k['o']), float(k['h']), float(k['l']), float(k['c']),
+                                 float(k['v']))
+                    self.__emit(k['i'], k['i'], data)
                 elif e.startswith("24hrTicker"):
                     self.__emit('instrument', action, datas)               
 
@@ -213,10 +247,6 @@ class BinanceFuturesWs:
                     #self.__on_close(ws)
                     self.ws.close()
 
-                elif e.startswith("bookTicker"):
-                    #logger.info(f"bookticker: {obj['data']}")                   
-                    self.__emit('bookticker', action, obj['data'])
-
         except Exception as e:
             logger.error(e)
             logger.error(traceback.format_exc())
@@ -226,7 +256,34 @@ class BinanceFuturesWs:
         send data
         """
         if key in self.handlers:
-            self.handlers[key](action, value)
+            if self.dispatcher is None:
+                with self.lock:
+                    self.handlers[key](action, value)
+            else:
+                self.dispatcher.put(key, self.handlers[key], action, value)
+
+    def call_later(self, delay, func):
+        """
+        Run a function after a delay, one after the other with the handlers of the events: by the dispatcher,
+        or else by a timer thread holding the lock of the handlers.
+        Args:
+            delay (float): The delay in seconds.
+            func (function): The function, called without arguments.
+        """
+        if self.dispatcher is not None:
+            timer = threading.Timer(delay, self.dispatcher.put, ("call_later", func))
+        else:
+            timer = threading.Timer(delay, self.__run_locked, (func,))
+        timer.daemon = True
+        timer.start()
+
+    def __run_locked(self, func):
+        try:
+            with self.lock:
+                func()
+        except Exception as e:
+            logger.error(e)
+            logger.error(traceback.format_exc())
 
     def __on_close(self, ws, status_code, status_message):
         """
@@ -242,14 +299,7 @@ class BinanceFuturesWs:
 
             time.sleep(1)
             # Listen Key can change after disconnects, so the url can change too
-            self.ws = websocket.WebSocketApp(self.__get_wss_endpoint(),
-                                 on_message=self.__on_message,
-                                 on_error=self.__on_error,
-                                 on_close=self.__on_close)                                 
-                                 
-            self.wst = threading.Thread(target=self.__start)
-            self.wst.daemon = True
-            self.wst.start()
+            self.__connect()
 
     def on_close(self, func):
         """
@@ -272,3 +322,5 @@ class BinanceFuturesWs:
         """
         self.is_running = False
         self.ws.close()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
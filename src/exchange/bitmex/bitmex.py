@@ -21,6 +21,7 @@ from src.exchange.bitmex.bitmex_api import bitmex_api
 from src.config import config as conf
 from src.exchange_config import exchange_config
 from src.exchange.bitmex.bitmex_websocket import BitMexWs
+from src.resampler import OHLCVRingBuffer
 
 
 # Orderbook class
@@ -42,6 +43,10 @@ class BitMex:
     # candle data that is no longer relevant. Be aware of these potential issues and make sure to handle them
     # appropriately in your strategy implementation.  
     call_strat_on_start = False
+    # Run the websocket on the asyncio transport shared by all the exchanges instead of its own threads
+    async_websocket = False
+    # JSON decoder of the websocket messages, "orjson", "msgspec" or "json" (None for the first one installed)
+    json_decoder = None
 
     def __init__(self, account, pair, demo=False, threading=True):
         """
@@ -1079,7 +1084,7 @@ class BitMex:
             timeframe_list = [allowed_range_minute_granularity[t][3] for t in self.bin_size]
             timeframe_list.sort(reverse=True)
             t = find_timeframe_string(timeframe_list[-1])     
-            data = self.timeframe_data[t]      
+            data = self.timeframe_data[t].to_data_frame(partial=True)
             
         return resample(data, bin_size)[:-1]    
     
@@ -1094,40 +1099,35 @@ class BitMex:
         Args:
             action (str): The allowed range for updating the OHLCV data.
                         This could be a minute granularity (e.g., '1m', '5m', '15m') or a custom range.
-            new_data (pd.DataFrame): New OHLCV data to be added. It should be a pandas DataFrame with
-                                    a DatetimeIndex and columns for 'open', 'high', 'low', 'close', and 'volume'.
+            new_data (Kline): The candle of the websocket, its timestamp (nanoseconds) and
+                              'open', 'high', 'low', 'close' and 'volume' values.
         Returns:
             None
         """         
+        timestamp = new_data.timestamp
+        candle = new_data[1:]
+
         if self.timeframe_data is None:
             self.timeframe_data = {}
             for t in self.bin_size:                
                 end_time = datetime.now(timezone.utc)
                 start_time = end_time - self.ohlcv_len * delta(t)
-                self.timeframe_data[t] = self.fetch_ohlcv(t, start_time, end_time)
+                data = self.fetch_ohlcv(t, start_time, end_time)
+                # Closed candles and the candle being built, updated in place by the websocket candles
+                self.timeframe_data[t] = OHLCVRingBuffer(allowed_range_minute_granularity[t][1]
+                                                         if self.minute_granularity else allowed_range[t][1],
+                                                         self.ohlcv_len + 1)
+                self.timeframe_data[t].load(data)
                 self.timeframe_info[t] = {
                             "allowed_range": allowed_range_minute_granularity[t][0]
                                             if self.minute_granularity else allowed_range[t][0], 
-                            "ohlcv": self.timeframe_data[t][:-1], # Dataframe with closed candles                                                   
-                            "last_action_time": None,#self.timeframe_data[t].iloc[-1].name, # Last strategy execution time
-                            "last_candle": self.timeframe_data[t].iloc[-2].values,  # Store last complete candle
-                            "partial_candle": self.timeframe_data[t].iloc[-1].values  # Store incomplete candle
+                            "ohlcv": data[:-1], # Dataframe with closed candles                                                   
+                            "last_action_time": None,#data.iloc[-1].name, # Last strategy execution time
+                            "last_candle": data.iloc[-2].values,  # Store last complete candle
+                            "partial_candle": self.timeframe_data[t].partial  # Incomplete candle, updated in place
                             }
-                # The last candle is an incomplete candle with timestamp in future                
-                if self.timeframe_data[t].iloc[-1].name > end_time:
-                    last_candle = self.timeframe_data[t].iloc[-1].values # Store last candle
-                    self.timeframe_data[t] = self.timeframe_data[t][:-1] # Exclude last candle
-                    self.timeframe_data[t].loc[end_time.replace(microsecond=0)] = last_candle #set last candle to end_time
-                #d1 = self.timeframe_data[t]
-                # if len(d1) > 0:
-                #     d2 = self.fetch_ohlcv(allowed_range[t][0],
-                #                         d1.iloc[-1].name + delta(allowed_range[t][0]), end_time)
-
-                #     self.timeframe_data[t] = pd.concat([d1, d2])               
-                # else:
-                #     self.timeframe_data[t] = d1                
-
-                logger.info(f"Initial Buffer Fill - Last Candle: {self.timeframe_data[t].iloc[-1].name}")   
+
+                logger.info(f"Initial Buffer Fill - Last Candle: {data.iloc[-1].name}")   
         #logger.info(f"{self.timeframe_data}") 
 
         # Timeframes to be updated
@@ -1148,52 +1148,42 @@ class BitMex:
             if self.timeframes_sorted != None:             
                 t = find_timeframe_string(t)               
                     
-            # replace latest candle if timestamp is same or append
-            if self.timeframe_data[t].iloc[-1].name == new_data.iloc[0].name:
-                self.timeframe_data[t] = pd.concat([self.timeframe_data[t][:-1], new_data])
-            else:
-                self.timeframe_data[t] = pd.concat([self.timeframe_data[t], new_data])      
-
-            # exclude current candle data and store partial candle data
-            re_sample_data = resample(self.timeframe_data[t], 
-                                      t, 
-                                      minute_granularity=True if self.minute_granularity else False)
-            self.timeframe_info[t]['partial_candle'] = re_sample_data.iloc[-1].values # store partial candle data
-            re_sample_data =re_sample_data[:-1] # exclude current candle data
-
-            #logger.info(f"{self.timeframe_info[t]['last_action_time']} : {self.timeframe_data[t].iloc[-1].name} : {re_sample_data.iloc[-1].name}")  
+            # add the candle to the buffer, a tradeBin is sent once its candle is over (stamped with its end time)
+            # and closes the bar it ends right away
+            buffer = self.timeframe_data[t]
+            buffer.update(timestamp, *candle, closed=True)
+            last_time = buffer.last_time() # time of the last closed candle
+            if last_time is None:
+                continue
 
             if self.call_strat_on_start:
                 if self.timeframe_info[t]["last_action_time"] is not None and \
-                self.timeframe_info[t]["last_action_time"] == re_sample_data.iloc[-1].name:
+                self.timeframe_info[t]["last_action_time"] == last_time:
                     continue
             else:   
                 if self.timeframe_info[t]["last_action_time"] is None:
-                    self.timeframe_info[t]["last_action_time"] = re_sample_data.iloc[-1].name
+                    self.timeframe_info[t]["last_action_time"] = last_time
                     
-                if self.timeframe_info[t]["last_action_time"] == re_sample_data.iloc[-1].name:
+                if self.timeframe_info[t]["last_action_time"] == last_time:
                     continue
 
-            # The last candle in the buffer needs to be preserved 
-            # while resetting the buffer as it may be incomlete
-            # or contains latest data from WS
-            self.timeframe_data[t] = pd.concat([re_sample_data.iloc[-1 * self.ohlcv_len:, :], 
-                                                self.timeframe_data[t].iloc[[-1]]]) 
             #store ohlcv dataframe to timeframe_info dictionary
-            self.timeframe_info[t]["ohlcv"] = re_sample_data
-            #logger.info(f"Buffer Right Edge: {self.data.iloc[-1]}")
-            
-            open = re_sample_data['open'].values
-            close = re_sample_data['close'].values
-            high = re_sample_data['high'].values
-            low = re_sample_data['low'].values
-            volume = re_sample_data['volume'].values 
+            self.timeframe_info[t]["ohlcv"] = buffer.to_data_frame()
+
+            # copies of the closed candles, the views of the buffer change when it compacts or wraps
+            # and a strategy may keep the arrays of the previous bars
+            arrays = buffer.arrays()
+            open = arrays['open'].copy()
+            close = arrays['close'].copy()
+            high = arrays['high'].copy()
+            low = arrays['low'].copy()
+            volume = arrays['volume'].copy()
                                         
             try:
                 if self.strategy is not None:   
-                    self.timestamp = re_sample_data.iloc[-1].name.isoformat()           
+                    self.timestamp = last_time.isoformat()           
                     self.strategy(t, open, close, high, low, volume)              
-                self.timeframe_info[t]['last_action_time'] = re_sample_data.iloc[-1].name
+                self.timeframe_info[t]['last_action_time'] = last_time
             except FatalError as e:
                 # Fatal error
                 logger.error(f"Fatal error. {e}")
@@ -1367,7 +1357,8 @@ class BitMex:
         self.strategy = strategy       
 
         if self.is_running:
-            self.ws = BitMexWs(account=self.account, pair=self.pair, test=self.demo)
+            self.ws = BitMexWs(account=self.account, pair=self.pair, test=self.demo,
+                               async_transport=self.async_websocket, json_decoder=self.json_decoder)
             
             #if len(self.bin_size) > 1:   
                 #self.minute_granularity=True  
@@ -8,9 +8,42 @@ from bravado.client import SwaggerClient
 from bravado.requests_client import RequestsClient, Authenticator
 from bravado.swagger_model import Loader
 
+from src.rate_limiter import RateLimiter, RateLimitedAdapter
+
 # swagger spec's formats to exclude. this help to avoid warning in your console.
 EXCLUDE_SWG_FORMATS = ['JSON', 'guid']
 
+# Requests per minute (refilled continuously) and order requests per second, shared by all clients of this process
+REQUEST_LIMITER = RateLimiter(120, 60)
+ORDER_LIMITER = RateLimiter(10, 1)
+
+
+def request_limits(request):
+    path = urlparse(request.url).path
+    if path.startswith('/api/v1/order'):
+        return [(REQUEST_LIMITER, 1), (ORDER_LIMITER, 1)]
+    return [(REQUEST_LIMITER, 1)]
+
+
+def sync_remaining(limiters, request, response):
+    remaining = response.headers.get('x-ratelimit-remaining')
+    if remaining is not None:
+        REQUEST_LIMITER.sync(int(remaining))
+    remaining = response.headers.get('x-ratelimit-remaining-1s')
+    if remaining is not None and ORDER_LIMITER in limiters:
+        ORDER_LIMITER.sync(int(remaining))
+
+
+def rate_limited_client():
+    """
+    Create a bravado requests client sending within the BitMEX rate limits.
+    """
+    request_client = RequestsClient()
+    adapter = RateLimitedAdapter(request_limits, sync=sync_remaining)
+    request_client.session.mount('https://', adapter)
+    request_client.session.mount('http://', adapter)
+    return request_client
+
 
 class APIKeyAuthenticator(Authenticator):
 
@@ -73,12 +106,10 @@ def bitmex_api(test=True, config=None, api_key=None, api_secret=None):
     spec_uri = host + '/api/explorer/swagger.json'
     spec_dict = get_swagger_json(spec_uri, exclude_formats=EXCLUDE_SWG_FORMATS)
 
+    request_client = rate_limited_client()
     if api_key and api_secret:
-        request_client = RequestsClient()
         request_client.authenticator = APIKeyAuthenticator(host, api_key, api_secret)
-        return SwaggerClient.from_spec(spec_dict, origin_url=spec_uri, http_client=request_client, config=config)
-    else:
-        return SwaggerClient.from_spec(spec_dict, origin_url=spec_uri, http_client=None, config=config)
+    return SwaggerClient.from_spec(spec_dict, origin_url=spec_uri, http_client=request_client, config=config)
 
 
 # exclude some format from swagger json to avoid warning in API execution.
@@ -1,7 +1,6 @@
 # coding: UTF-8
 import hashlib
 import hmac
-import json
 import os
 import threading
 import time
@@ -9,10 +8,13 @@ import traceback
 import urllib
 
 import websocket
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
-from src import logger, to_data_frame, notify
+from src import logger, notify
 from src.config import config as conf
+from src.exchange import messages
+from src.exchange.messages import Kline
+from src.exchange.websocket_transport import AsyncTransport
 
 
 def generate_nonce():
@@ -36,7 +38,7 @@ def generate_signature(secret, verb, url, nonce, data):
 
 class BitMexWs:        
 
-    def __init__(self, account, pair, test=False):
+    def __init__(self, account, pair, test=False, async_transport=False, json_decoder=None):
         """
         constructor
         """
@@ -48,6 +50,11 @@ class BitMexWs:
         self.is_running = True
         # testnet   
         self.testnet = test
+        # Run the websocket on the shared asyncio transport instead of its own threads
+        self.async_transport = async_transport
+        # JSON decoder of the messages, shared by all the websockets (None keeps the current one)
+        if json_decoder is not None:
+            messages.set_json_decoder(json_decoder)
         # Notification destination listener
         self.handlers = {}
 
@@ -58,6 +65,20 @@ class BitMexWs:
         self.endpoint = 'wss://' + domain + '/realtime?subscribe=tradeBin1m:' + self.pair + ',' \
                         'tradeBin5m:' + self.pair + ',tradeBin1h:' + self.pair + ',tradeBin1d:' + self.pair + ',instrument:' + self.pair + ',' \
                         'margin,position,order,execution:' + self.pair + ',wallet,orderBookL2:' + self.pair #+ ',order:' + self.pair + ',execution:' + self.pair 
+        self.__connect()
+
+    def __connect(self):
+        """
+        connect the websocket, in its own thread or on the shared asyncio transport.
+        """
+        if self.async_transport:
+            self.ws = AsyncTransport.instance().connect(self.endpoint,
+                                                        on_message=self.__on_message,
+                                                        on_error=self.__on_error,
+                                                        on_close=self.__on_close,
+                                                        header=self.__get_auth())
+            return
+
         self.ws = websocket.WebSocketApp(self.endpoint,
                              on_message=self.__on_message,
                              on_error=self.__on_error,
@@ -114,7 +135,7 @@ class BitMexWs:
         :return:
         """        
         try:
-            obj = json.loads(message)
+            obj = messages.loads(message)
             if 'table' in obj:
                 if len(obj['data']) <= 0:
                     return
@@ -124,19 +145,12 @@ class BitMexWs:
                 data = obj['data']
 
                 if table.startswith("tradeBin"):
-                    data[0]['timestamp'] = datetime.strptime(data[0]['timestamp'][:-5], '%Y-%m-%dT%H:%M:%S')
-                    new_data = []
-                    new_data.append(data[0])
-                    #add placeholder tick so it resamples correctly
-                    new_data.append({
-                        "timestamp": data[0]['timestamp'] + timedelta(seconds=0.01),
-                        "open": data[0]['close'],
-                        "high": data[0]['close'],
-                        "low" : data[0]['close'],
-                        "close" : data[0]['close'],
-                        "volume": 0
-                    })                                 
-                    self.__emit(table, table[-2:], to_data_frame(new_data))    
+                    timestamp = datetime.strptime(data[0]['timestamp'][:-5], '%Y-%m-%dT%H:%M:%S') \
+                        .replace(tzinfo=timezone.utc)
+                    new_data = Kline(int(timestamp.timestamp()) * 1_000_000_000, float(data[0]['open']),
+                                     float(data[0]['high']), float(data[0]['low']), float(data[0]['close']),
+                                     float(data[0]['volume']))
+                    self.__emit(table, table[-2:], new_data)
 
                 elif table.startswith("instrument"):
                     self.__emit(table, action, data[0])
@@ -170,10 +184,12 @@ class BitMexWs:
         if key in self.handlers:
             self.handlers[key](action, value)
 
-    def __on_close(self, ws):
+    def __on_close(self, ws, status_code=None, status_message=None):
         """
         On Close Listener
         :param ws:
+        :param status_code:
+        :param status_message:
         """
         if 'close' in self.handlers:
             self.handlers['close']()
@@ -182,14 +198,7 @@ class BitMexWs:
             logger.info("Websocket restart")
             notify(f"Websocket restart")
 
-            self.ws = websocket.WebSocketApp(self.endpoint,
-                                 on_message=self.__on_message,
-                                 on_error=self.__on_error,
-                                 on_close=self.__on_close,
-                                 header=self.__get_auth())
-            self.wst = threading.Thread(target=self.__start)
-            self.wst.daemon = True
-            self.wst.start()
+            self.__connect()
 
     def on_close(self, func):
         """
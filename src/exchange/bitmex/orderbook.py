@@ -1,20 +1,29 @@
 import sys, time
 
 from src.exchange.bitmex.bitmex_websocket import BitMexWs
+from src.exchange.l2_book import L2Book
 from src import logger
 
 
 class OrderBook:
-    inited = False
-    asks = {}
-    bids = {}
-    ask_max_price = 0
-    bid_min_price = 0
-    best_bid_price = 0
-    best_ask_price = 0
+    """
+    Order book of the BitMEX orderBookL2 stream, kept in an L2Book.
+    BitMEX sends the levels by id, so the side and the price of every id are kept to apply the updates
+    and the deletes, which only carry the id (and the new size).
+    """
 
     def __init__(self, ws):
         self.ws = ws
+        self.inited = False
+        # Sorted bid and ask levels
+        self.book = L2Book()
+        # Side ("bids" or "asks") and price of every level id
+        self.levels = {}
+        self.best_bid_price = 0
+        self.best_ask_price = 0
+        # Lowest bid and highest ask of the book
+        self.bid_min_price = 0
+        self.ask_max_price = 0
         self.ws.bind('orderBookL2', self.__update)
 
     def __update(self, action, values):
@@ -23,36 +32,43 @@ class OrderBook:
 
         if action == "partial":
             self.inited = True
-       
-        for v in values:           
+            self.book.snapshot([], [])
+            self.levels.clear()
+
+        for v in values:
             ordId = v['id']
-            side = v['side']
-            orders = self.asks if side == "Buy" else self.bids
-            if action == "partial" or \
-                    action == "insert":
-                orders[ordId] = v
-            elif action == "update" and ordId in orders:
-                orders[ordId]["size"] = v['size']
-            elif action == "delete" and ordId in orders:
-                del orders[ordId]
-
-        bid_prices = sorted([v['price'] for v in self.asks.values()])
-        ask_prices = sorted([v['price'] for v in self.bids.values()])        
-
-        if len(ask_prices) > 0:
-            self.ask_max_price = ask_prices[-1]
-        if len(bid_prices) > 0:
-            self.bid_min_price = bid_prices[0]
-        if len(ask_prices) > 0:
-            self.best_bid_price = bid_prices[-1]
-        if len(ask_prices) > 0:
-            self.best_ask_price = ask_prices[0]       
-        
+            if action == "partial" or action == "insert":
+                side = "bids" if v['side'] == "Buy" else "asks"
+                self.levels[ordId] = (side, v['price'])
+                self.book.update(side, v['price'], v['size'])
+            elif action == "update" and ordId in self.levels:
+                side, price = self.levels[ordId]
+                self.book.update(side, price, v['size'])
+            elif action == "delete" and ordId in self.levels:
+                side, price = self.levels.pop(ordId)
+                self.book.update(side, price, 0)
+
+        if self.book.bids:
+            self.best_bid_price = self.book.bids.peekitem(0)[0]
+            self.bid_min_price = self.book.bids.peekitem(-1)[0]
+        if self.book.asks:
+            self.best_ask_price = self.book.asks.peekitem(0)[0]
+            self.ask_max_price = self.book.asks.peekitem(-1)[0]
 
     def get_prices(self):
         return self.best_bid_price, self.best_ask_price
-    
-    
+
+    def depth(self, levels=None):
+        """
+        Get a snapshot of the top levels of the book.
+        Args:
+            levels (int, optional): The number of levels of each side. Defaults to None, all the levels.
+        Returns:
+            dict: The (price, size) levels of the "bids" and the "asks", from the best one.
+        """
+        return self.book.depth(levels)
+
+
 if __name__ == '__main__':
     ws = BitMexWs(account=BitMexWs.account, pair=BitMexWs.pair)
     ob = OrderBook(ws)
@@ -6,6 +6,7 @@ import os
 import traceback
 from datetime import datetime, timezone, timedelta
 from inspect import signature
+from urllib.parse import urlparse
 import time
 import threading
 from decimal import Decimal
@@ -24,12 +25,37 @@ from pybit import unified_trading
 from src.config import config as conf
 from src.exchange_config import exchange_config
 from src.exchange.bybit.bybit_websocket import BybitWs
+from src.exchange.bid_ask_throttle import BidAskThrottle
+from src.exchange.l2_book import L2Book
+from src.exchange.messages import ceil_minute
+from src.rate_limiter import RateLimiter, RateLimitedAdapter
+from src.resampler import OHLCVRingBuffer
 
 
 #TODO
 # orderbook class
 #from src.exchange.bybit.bybit_orderbook import OrderBook
 
+# Requests per 5 seconds and IP, shared by all clients of this process
+REQUEST_LIMITER = RateLimiter(600, 5)
+# Requests per second of each endpoint, created from the X-Bapi-Limit headers of the responses
+ENDPOINT_LIMITERS = {}
+
+
+def request_limits(request):
+    limiter = ENDPOINT_LIMITERS.get(urlparse(request.url).path)
+    return [(REQUEST_LIMITER, 1)] + ([(limiter, 1)] if limiter is not None else [])
+
+
+def sync_endpoint_limits(limiters, request, response):
+    limit = response.headers.get('X-Bapi-Limit')
+    remaining = response.headers.get('X-Bapi-Limit-Status')
+    if limit is None or remaining is None:
+        return
+    limiter = ENDPOINT_LIMITERS.setdefault(urlparse(request.url).path, RateLimiter(int(limit), 1))
+    limiter.sync(int(remaining))
+
+
 bybit_order_type_mapping = {
     "Market"    : "MARKET",
     "Limit"     : "LIMIT"
@@ -67,12 +93,6 @@ bybit_order_status_mapping = {
     "Active"            : "ACTIVE"
 }
 
-def find_index(source, target, key):
-    """
-    Find the index in source list of the targeted ID.
-    """
-    return next(i for i, j in enumerate(source) if j[key] == target[key])
-
 class Bybit:
    # Positions in USDT?
     qty_in_usdt = False    
@@ -92,6 +112,14 @@ class Bybit:
     # candle data that is no longer relevant. Be aware of these potential issues and make sure to handle them
     # appropriately in your strategy implementation. 
     call_strat_on_start = True
+    # Run the websockets on the asyncio transport shared by all the exchanges instead of their own threads
+    async_websocket = False
+    # JSON decoder of the websocket messages, "orjson", "msgspec" or "json" (None for the first one installed)
+    json_decoder = None
+    # Minimum seconds between two reprices of a chaser order
+    chaser_min_reprice_interval = 0
+    # Minimum best bid/ask change repricing a chaser order, in ticks (0 for any change)
+    chaser_min_reprice_ticks = 0
 
     def __init__(self, account, pair, demo=False, spot=False, threading=True):
         """
@@ -137,8 +165,8 @@ class Bybit:
         self.account_information = None
         # Instrument
         self.instrument = {}
-        # Bookticker
-        self.bookticker = {}
+        # Order book of the orderbook stream
+        self.bookticker = L2Book()
         # Timeframe
         self.bin_size = ['1h'] 
         # Bybit client     
@@ -225,6 +253,7 @@ class Bybit:
         
         # Setting up the client
         self.client = unified_trading.HTTP(testnet=self.demo, api_key=api_key, api_secret=api_secret)
+        self.client.client.mount("https://", RateLimitedAdapter(request_limits, sync=sync_endpoint_limits))
 
         # Get account type information
         self.is_unified_account = True if retry(lambda: self.client.get_account_info())['unifiedMarginStatus'] > 2 else False      
@@ -706,7 +735,7 @@ class Bybit:
                 logger.info(f"Failed to close all {self.pair} position, still {position_size} amount remaining")
         
         self.order("Close", side, abs(position_size), 
-                   post_only=chaser or bool(limit_chase_interval), chaser=chaser, retry_maker=retry_maker,
+                   post_only=bool(chaser) or bool(limit_chase_interval), chaser=chaser, retry_maker=retry_maker,
                    limit_chase_init_delay=limit_chase_init_delay,
                    chase_update_rate=chase_update_rate, 
                    limit_chase_interval=limit_chase_interval, 
@@ -1161,6 +1190,9 @@ class Bybit:
             trigger_by (str, optional): Trigger By. Price to use for triggers (e.g., 'LastPrice', 'IndexPrice', etc.).
             split (int, optional): Split. For iceberg orders, set the number of order splits (default is 1, for non-iceberg orders).
             interval (int, optional): Interval. For iceberg orders, set the time interval between order splits (default is 0, for non-iceberg orders).
+            chaser (bool or dict, optional): Chaser. Set to True to follow the Best Bid/Ask (BBA) price, replacing the order at the new BBA whenever it changes.
+                A dict such as {"min_interval": 0.5, "min_ticks": 2} reprices at most every min_interval seconds and once BBA moved min_ticks ticks,
+                instead of chaser_min_reprice_interval and chaser_min_reprice_ticks.
             limit_chase_init_delay (float, optional): Limit Chase Init Delay. Initial delay for limit order chasing (used when post_only is True and limit_chase_interval > 0).
             chase_update_rate (float, optional): Chase Update Rate. Sleep interval between price updates during limit order chasing.
             limit_chase_interval (int, optional): Limit Chase Interval. Minimum interval between each limit order update during chasing.
@@ -1241,6 +1273,9 @@ class Bybit:
             trigger_by (str, optional): Trigger By. Price to use for triggers (e.g., 'LastPrice', 'IndexPrice', etc.).
             split (int, optional): Split. For iceberg orders, set the number of order splits (default is 1, for non-iceberg orders).
             interval (int, optional): Interval. For iceberg orders, set the time interval between order splits (default is 0, for non-iceberg orders).
+            chaser (bool or dict, optional): Chaser. Set to True to follow the Best Bid/Ask (BBA) price, replacing the order at the new BBA whenever it changes.
+                A dict such as {"min_interval": 0.5, "min_ticks": 2} reprices at most every min_interval seconds and once BBA moved min_ticks ticks,
+                instead of chaser_min_reprice_interval and chaser_min_reprice_ticks.
             limit_chase_init_delay (float, optional): Limit Chase Init Delay. Initial delay for limit order chasing (used when post_only is True and limit_chase_interval > 0).
             chase_update_rate (float, optional): Chase Update Rate. Sleep interval between price updates during limit order chasing.
             limit_chase_interval (int, optional): Limit Chase Interval. Minimum interval between each limit order update during chasing.
@@ -1323,6 +1358,9 @@ class Bybit:
             trigger_by (str, optional): Trigger By. Price to use for triggers (e.g., 'LastPrice', 'IndexPrice', etc.).
             split (int, optional): Split. For iceberg orders, set the number of order splits (default is 1, for non-iceberg orders).
             interval (int, optional): Interval. For iceberg orders, set the time interval between order splits (default is 0, for non-iceberg orders).
+            chaser (bool or dict, optional): Chaser. Set to True to follow the Best Bid/Ask (BBA) price, replacing the order at the new BBA whenever it changes.
+                A dict such as {"min_interval": 0.5, "min_ticks": 2} reprices at most every min_interval seconds and once BBA moved min_ticks ticks,
+                instead of chaser_min_reprice_interval and chaser_min_reprice_ticks.
             limit_chase_init_delay (float, optional): Limit Chase Init Delay. Initial delay for limit order chasing (used when post_only is True and limit_chase_interval > 0).
             chase_update_rate (float, optional): Chase Update Rate. Sleep interval between price updates during limit order chasing.
             limit_chase_interval (int, optional): Limit Chase Interval. Minimum interval between each limit order update during chasing.
@@ -1387,6 +1425,7 @@ class Bybit:
         if chaser:
 
             exchange = self
+            chaser_config = chaser if isinstance(chaser, dict) else {}
 
             class Chaser:
 
@@ -1424,6 +1463,13 @@ class Bybit:
                     self.current_order_id = None
                     # if no limit price is set, set it to best bid/ask price
                     self.current_order_price = self.limit if self.limit != 0 else self.price()
+                    # Coalesce the best bid/ask changes repricing the order
+                    self.throttle = BidAskThrottle(lambda: (exchange.best_bid_price, exchange.best_ask_price),
+                                                   chaser_config.get("min_interval", exchange.chaser_min_reprice_interval),
+                                                   chaser_config.get("min_ticks", exchange.chaser_min_reprice_ticks),
+                                                   10 ** -exchange.quote_rounding,
+                                                   exchange.ws.call_later)
+                    self.bid_ask_callback = self.throttle.wrap(self.on_bid_ask_change)
                     # First order will be sent without post-only flag irrespective
                     # and post-only will be used once the order is triggered
                     self.order(retry_maker, 
@@ -1474,11 +1520,13 @@ class Bybit:
                 def start(self):
                     self.started = True #started
                     self.start_price = self.price()
-                    exchange.add_ob_callback(self.order_id, self.on_bid_ask_change)      
+                    self.throttle.reset()
+                    exchange.add_ob_callback(self.order_id, self.bid_ask_callback)      
                     logger.info(f"Chaser Active: {self.order_id} @ {self.start_price}")              
 
                 def end(self):
                     exchange.remove_ob_callback(self.order_id)
+                    self.throttle.cancel()
 
                 def avg_price(self, print_suborders=False):
                     order_value = 0
@@ -1500,6 +1548,9 @@ class Bybit:
                     logger.info(f"--------------------------------------")
                     logger.info(f"Avg Price: {avg_price}")
                     logger.info(f"Slippage: {slippage*100:.2f}%")
+                    throttle_stats = self.throttle.stats()
+                    suppressed = throttle_stats["suppressed_ticks"] + throttle_stats["suppressed_interval"]
+                    logger.info(f"Reprices: {throttle_stats['calls']} Suppressed BBA Updates: {suppressed}")
                     logger.info(f"--------------------------------------")
 
                     log_metrics(datetime.utcnow(), "chaser", {
@@ -1507,7 +1558,10 @@ class Bybit:
                         "quantity": self.qty,
                         "start_price": self.start_price,
                         "avg_price": avg_price,
-                        "slippage": round(slippage*100, 3)                        
+                        "slippage": round(slippage*100, 3),
+                        "reprices": throttle_stats["calls"],
+                        "suppressed_ticks": throttle_stats["suppressed_ticks"],
+                        "suppressed_interval": throttle_stats["suppressed_interval"]
                     },
                     {
                         "exchange": conf["args"].exchange,
@@ -1522,6 +1576,7 @@ class Bybit:
                     self.started = False #canceled
                     if self.current_order_id is not None:
                         exchange.remove_ob_callback(self.order_id)
+                        self.throttle.cancel()
                         self.cancel_order(self.current_order_id)
 
                 def cancel_order(self, id):
@@ -1557,6 +1612,7 @@ class Bybit:
 
                         if self.current_order_id is not None :
                             exchange.remove_ob_callback(self.order_id)
+                            self.throttle.cancel()
                             self.cancel_order(self.current_order_id)
                             logger.info(f"Chaser: Cancel Order : {self.current_order_id} : Price Changed - {self.current_order_price} -> {self.price()}")
                             self.current_order_id = None
@@ -1577,7 +1633,8 @@ class Bybit:
                                 self.limit_tracker(self.limit)        
                         else:
                             # new sub-order - start ob chaser
-                            exchange.add_ob_callback(self.order_id, self.on_bid_ask_change)
+                            self.throttle.reset()
+                            exchange.add_ob_callback(self.order_id, self.bid_ask_callback)
 
                     if self.stop != 0 and order["status"] == "TRIGGERED":
                         logger.info(f"Chaser Event: {order['id']} is Triggered @ {order['stop']}!")
@@ -2095,7 +2152,7 @@ class Bybit:
             timeframe_list = [allowed_range_minute_granularity[t][3] for t in self.bin_size] 
             timeframe_list.sort(reverse=True)
             t = find_timeframe_string(timeframe_list[-1])     
-            data = self.timeframe_data[t]      
+            data = self.timeframe_data[t].to_data_frame(partial=True)
             
         return resample(data, bin_size)[:-1]
     
@@ -2110,14 +2167,15 @@ class Bybit:
         Args:
             action (str): The allowed range for updating the OHLCV data.
                         This could be a minute granularity (e.g., '1m', '5m', '15m') or a custom range.
-            new_data (pd.DataFrame): New OHLCV data to be added. It should be a pandas DataFrame with
-                                    a DatetimeIndex and columns for 'open', 'high', 'low', 'close', and 'volume'.
+            new_data (Kline): The candle of the websocket, its timestamp (nanoseconds) and
+                              'open', 'high', 'low', 'close' and 'volume' values.
         Returns:
             None
         """  
         # Bybit can output wierd timestamps - Eg. 2021-05-25 16:04:59.999000+00:00
         # We need to round up to the nearest second for further processing
-        new_data = new_data.rename(index={new_data.iloc[0].name: new_data.iloc[0].name.ceil(freq='1T')})           
+        timestamp = ceil_minute(new_data.timestamp)
+        candle = new_data[1:]
 
         # If OHLCV data is not initialized, create and fetch data
         if self.timeframe_data is None:
@@ -2125,22 +2183,22 @@ class Bybit:
             for t in self.bin_size:                              
                 end_time = datetime.now(timezone.utc)
                 start_time = end_time - self.ohlcv_len * delta(t)
-                self.timeframe_data[t] = self.fetch_ohlcv(t, start_time, end_time)
+                data = self.fetch_ohlcv(t, start_time, end_time)
+                # Closed candles and the candle being built, updated in place by the websocket candles
+                self.timeframe_data[t] = OHLCVRingBuffer(allowed_range_minute_granularity[t][1]
+                                                         if self.minute_granularity else allowed_range[t][1],
+                                                         self.ohlcv_len + 1)
+                self.timeframe_data[t].load(data)
                 self.timeframe_info[t] = {
                             "allowed_range": allowed_range_minute_granularity[t][0] 
                                                 if self.minute_granularity else allowed_range[t][0], 
-                            "ohlcv": self.timeframe_data[t][:-1], # Dataframe with closed candles                                                   
-                            "last_action_time": None,#self.timeframe_data[t].iloc[-1].name, # Last strategy execution time
-                            "last_candle": self.timeframe_data[t].iloc[-2].values,  # Store last complete candle
-                            "partial_candle": self.timeframe_data[t].iloc[-1].values  # Store incomplete candle
+                            "ohlcv": data[:-1], # Dataframe with closed candles                                                   
+                            "last_action_time": None,#data.iloc[-1].name, # Last strategy execution time
+                            "last_candle": data.iloc[-2].values,  # Store last complete candle
+                            "partial_candle": self.timeframe_data[t].partial  # Incomplete candle, updated in place
                             }
-                # The last candle is an incomplete candle with timestamp in future                
-                if self.timeframe_data[t].iloc[-1].name > end_time:                    
-                    last_candle = self.timeframe_data[t].iloc[-1].values # Store last candle
-                    self.timeframe_data[t] = self.timeframe_data[t][:-1] # Exclude last candle
-                    self.timeframe_data[t].loc[end_time.replace(microsecond=0)] = last_candle #set last candle to end_time
 
-                logger.info(f"Initial Buffer Fill - Last Candle: {self.timeframe_data[t].iloc[-1].name}")   
+                logger.info(f"Initial Buffer Fill - Last Candle: {data.iloc[-1].name}")   
         #logger.info(f"timeframe_data: {self.timeframe_data}") 
         #         
         # Timeframes to be updated
@@ -2158,58 +2216,46 @@ class Bybit:
             if self.timeframes_sorted != None:             
                 t = find_timeframe_string(t)               
                     
-            # replace latest candle if timestamp is same or append
-            if self.timeframe_data[t].iloc[-1].name == new_data.iloc[0].name:
-                self.timeframe_data[t] = pd.concat([self.timeframe_data[t][:-1], new_data])
-            else:
-                self.timeframe_data[t] = pd.concat([self.timeframe_data[t], new_data])      
-            #self.timeframe_data[t] = pd.concat([self.timeframe_data[t], new_data]) 
-
-            # exclude current candle data and store partial candle data
-            re_sample_data = resample(self.timeframe_data[t], 
-                                      t, 
-                                      minute_granularity=True if self.minute_granularity else False)
-            self.timeframe_info[t]['partial_candle'] = re_sample_data.iloc[-1].values # store partial candle data
-            re_sample_data =re_sample_data[:-1]  # exclude current candle data
-
-            #logger.info(f"{self.timeframe_info[t]['last_action_time']} : {self.timeframe_data[t].iloc[-1].name} : {re_sample_data.iloc[-1].name}")  
+            # add the candle to the buffer, which closes the candle being built when the next one starts
+            buffer = self.timeframe_data[t]
+            buffer.update(timestamp, *candle)
+            last_time = buffer.last_time() # time of the last closed candle
+            if last_time is None:
+                continue
 
             if self.call_strat_on_start:
                 if self.timeframe_info[t]["last_action_time"] is not None and \
-                self.timeframe_info[t]["last_action_time"] == re_sample_data.iloc[-1].name:
+                self.timeframe_info[t]["last_action_time"] == last_time:
                     continue
             else:   
                 if self.timeframe_info[t]["last_action_time"] is None:
-                    self.timeframe_info[t]["last_action_time"] = re_sample_data.iloc[-1].name
+                    self.timeframe_info[t]["last_action_time"] = last_time
                     
-                if self.timeframe_info[t]["last_action_time"] == re_sample_data.iloc[-1].name:
+                if self.timeframe_info[t]["last_action_time"] == last_time:
                     continue
 
-            # The last candle in the buffer needs to be preserved 
-            # while resetting the buffer as it may be incomlete
-            # or contains latest data from WS
-            self.timeframe_data[t] = pd.concat([re_sample_data.iloc[-1 * self.ohlcv_len:, :], 
-                                                self.timeframe_data[t].iloc[[-1]]])
             #store ohlcv dataframe to timeframe_info dictionary
-            self.timeframe_info[t]["ohlcv"] = re_sample_data
-            #logger.info(f"Buffer Right Edge: {self.data.iloc[-1]}")
-            
-            open = re_sample_data['open'].values
-            close = re_sample_data['close'].values
-            high = re_sample_data['high'].values
-            low = re_sample_data['low'].values
-            volume = re_sample_data['volume'].values 
+            self.timeframe_info[t]["ohlcv"] = buffer.to_data_frame()
+
+            # copies of the closed candles, the views of the buffer change when it compacts or wraps
+            # and a strategy may keep the arrays of the previous bars
+            arrays = buffer.arrays()
+            open = arrays['open'].copy()
+            close = arrays['close'].copy()
+            high = arrays['high'].copy()
+            low = arrays['low'].copy()
+            volume = arrays['volume'].copy()
                                         
             try:
                 if self.strategy is not None:   
-                    self.timestamp = re_sample_data.iloc[-1].name.isoformat()           
+                    self.timestamp = last_time.isoformat()           
                     self.strategy(t, open, close, high, low, volume)              
                     # Evaluation of profit and loss
                     if self.is_exit_order_active:
                         self.eval_exit()
                     if self.is_sltp_active:
                         self.eval_sltp()                   
-                self.timeframe_info[t]['last_action_time'] = re_sample_data.iloc[-1].name
+                self.timeframe_info[t]['last_action_time'] = last_time
             except FatalError as e:
                 # Fatal error
                 logger.error(f"Fatal error. {e}")
@@ -2524,62 +2570,29 @@ class Bybit:
         Update best bid and best ask price and quantity.
         Args:
             action (str): Action description (e.g., "update", "create", "delete", etc.).
-            bookticker (dict): Dictionary containing the updated book ticker data.
+            bookticker (dict): Dictionary containing the snapshot or the delta of the order book, the [price, size] levels of b and a.
         """
 
-        #filter for b and a keys
-        bookticker = {k:v for k,v in bookticker.items() if (k=='a' or k=='b')}
-
-        # Record the initial snapshot.
+        # Record the initial snapshot, or make updates according to delta response.
         if "snapshot" in action:
-            self.bookticker = bookticker
+            self.bookticker.snapshot(bookticker.get('b', []), bookticker.get('a', []))
         else:
-            # Make updates according to delta response.
-            for side, entries in bookticker.items():
-                for entry in entries:
-                    # Delete.
-                    if float(entry[1]) == 0:
-                        index = find_index(
-                            self.bookticker[side], entry, 0
-                        )
-                        self.bookticker[side].pop(index)
-                        continue
-
-                    # Insert.
-                    price_level_exists = entry[0] in [
-                        level[0] for level in self.bookticker[side]
-                    ]
-                    if not price_level_exists:
-                        self.bookticker[side].append(entry)
-                        continue
-
-                    # Update.
-                    qty_changed = entry[1] != next(
-                        level[1]
-                        for level in self.bookticker[side]
-                        if level[0] == entry[0]
-                    )
-                    if price_level_exists and qty_changed:
-                        index = find_index(
-                            self.bookticker[side], entry, 0
-                        )
-                        self.bookticker[side][index] = entry
-                        continue
-
-        if 'b' in self.bookticker and 'a' in self.bookticker:
+            self.bookticker.apply(bookticker.get('b', []), bookticker.get('a', []))
+
+        best_bid = self.bookticker.best_bid()
+        best_ask = self.bookticker.best_ask()
+        if best_bid is not None and best_ask is not None:
             
             best_bid_changed = False
 
-            best_bid_price = float(self.bookticker['b'][0][0])
-            if( self.best_bid_price != best_bid_price ):
-                self.best_bid_price = best_bid_price
+            if( self.best_bid_price != best_bid[0] ):
+                self.best_bid_price = best_bid[0]
                 best_bid_changed = True
             
             best_ask_changed = False
 
-            best_ask_price = float(self.bookticker['a'][0][0])
-            if (self.best_ask_price != best_ask_price ):
-                self.best_ask_price = best_ask_price
+            if (self.best_ask_price != best_ask[0] ):
+                self.best_ask_price = best_ask[0]
                 best_ask_changed = True
 
             
@@ -2588,8 +2601,8 @@ class Bybit:
                     if callable(callback):
                         callback(best_bid_changed, best_ask_changed)
             
-            self.bid_quantity_L1 = float(self.bookticker['b'][0][1])          
-            self.ask_quantity_L1 = float(self.bookticker['a'][0][1])
+            self.bid_quantity_L1 = best_bid[1]
+            self.ask_quantity_L1 = best_ask[1]
         #logger.info(f"best bid: {self.best_bid_price}          best_ask: {self.best_ask_price}           bq_L1: {self.bid_quantity_L1}           aq_L1: {self.ask_quantity_L1}")
 
     def on_update(self, bin_size, strategy):
@@ -2613,7 +2626,8 @@ class Bybit:
 
         if self.is_running:
             self.__init_client()
-            self.ws = BybitWs(account=self.account, pair=self.pair, bin_size=self.bin_size, spot=self.spot, is_unified=self.is_unified_account, test=self.demo)
+            self.ws = BybitWs(account=self.account, pair=self.pair, bin_size=self.bin_size, spot=self.spot, is_unified=self.is_unified_account, test=self.demo,
+                              async_transport=self.async_websocket, json_decoder=self.json_decoder)
 
             #if len(self.bin_size) > 1:   
                 #self.minute_granularity=True  
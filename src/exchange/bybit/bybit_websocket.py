@@ -12,8 +12,11 @@ import requests
 from pytz import UTC
 from datetime import datetime, timedelta, timezone
 
-from src import logger, to_data_frame, find_timeframe_string, bybit_allowed_range, bin_size_converter, notify
+from src import logger, find_timeframe_string, bybit_allowed_range, bin_size_converter, notify
 from src.config import config as conf
+from src.exchange import messages
+from src.exchange.messages import Kline
+from src.exchange.websocket_transport import AsyncTransport
 from src.monitor import Monitor
 
 
@@ -23,7 +26,7 @@ def generate_nonce():
 
 class BybitWs:
 
-    def __init__(self, account, pair, bin_size, spot=False, is_unified=False, test=False):
+    def __init__(self, account, pair, bin_size, spot=False, is_unified=False, test=False, async_transport=False, json_decoder=None):
         """
         constructor
         """
@@ -39,6 +42,11 @@ class BybitWs:
         self.unified_margin = is_unified      
         # testnet
         self.testnet = test     
+        # Run the websockets on the shared asyncio transport instead of their own threads
+        self.async_transport = async_transport
+        # JSON decoder of the messages, shared by all the websockets (None keeps the current one)
+        if json_decoder is not None:
+            messages.set_json_decoder(json_decoder)
         # Separate public websocket  
         self.ws = None
         # Public websoket thread
@@ -55,6 +63,8 @@ class BybitWs:
         self.is_running = True
         # Notification destination listener
         self.handlers = {}      
+        # Runs the handlers of both websockets one after the other with the functions of `call_later`
+        self.lock = threading.Lock()
         # Fully bootstrapped flag
         self.bootstrapped = False    
         
@@ -97,6 +107,15 @@ class BybitWs:
             self.log_file.flush()
 
     def __create_public(self):
+        if self.async_transport:
+            self.ws = AsyncTransport.instance().connect(self.endpoint,
+                                                        on_open=self.__on_open_public,
+                                                        on_message=self.__on_message,
+                                                        on_error=self.__on_error,
+                                                        on_pong=self.__on_pong_public,
+                                                        ping_interval=20,
+                                                        ping_timeout=15)
+            return
         self.ws = websocket.WebSocketApp(self.endpoint,
                             on_open=self.__on_open_public,
                             on_message=self.__on_message,
@@ -107,6 +126,15 @@ class BybitWs:
         self.wst.start()
 
     def __create_private(self):
+        if self.async_transport:
+            self.wsp = AsyncTransport.instance().connect(self.endpoint_private,
+                                                         on_open=self.__on_open_private,
+                                                         on_message=self.__on_message,
+                                                         on_error=self.__on_error,
+                                                         on_pong=self.__on_pong_private,
+                                                         ping_interval=20,
+                                                         ping_timeout=15)
+            return
         self.wsp = websocket.WebSocketApp(self.endpoint_private,
                             on_open=self.__on_open_private,
                             on_message=self.__on_message,
@@ -264,7 +292,7 @@ class BybitWs:
         :return:
         """                
         try:
-            obj = json.loads(message)      
+            obj = messages.loads(message)
             # logger.info(obj)
             if 'topic' in obj:
                 if len(obj['data']) <= 0:
@@ -305,18 +333,11 @@ class BybitWs:
                     else:
                         action = '1' + timeframe.lower()
              
-                    data = [{
-                        "timestamp" : data[0]['end'],
-                        "high" : float(data[0]['high']),
-                        "low" : float(data[0]['low']),
-                        "open" : float(data[0]['open']),
-                        "close" : float(data[0]['close']),
-                        "volume" : float(data[0]['volume'])
-                        }]
-          
-                    data[0]['timestamp'] = datetime.fromtimestamp(data[0]['timestamp']/1000, tz=timezone.utc)
+                    # end time of the candle, e.g. 16:04:59.999
+                    data = Kline(data[0]['end'] * 1_000_000, float(data[0]['open']), float(data[0]['high']),
+                                 float(data[0]['low']), float(data[0]['close']), float(data[0]['volume']))
                     if self.bootstrapped:   
-                        self.__emit(action, action, to_data_frame(data))
+                        self.__emit(action, action, data)
                                            
                 elif table.startswith("tickers"): 
                     #ignore delta messages as they may not contain all fields
@@ -363,7 +384,28 @@ class BybitWs:
         send data
         """
         if key in self.handlers:
-            self.handlers[key](action, value)
+            with self.lock:
+                self.handlers[key](action, value)
+
+    def call_later(self, delay, func):
+        """
+        Run a function after a delay, in a timer thread holding the lock of the handlers,
+        so it runs one after the other with the handlers of the events.
+        Args:
+            delay (float): The delay in seconds.
+            func (function): The function, called without arguments.
+        """
+        timer = threading.Timer(delay, self.__run_locked, (func,))
+        timer.daemon = True
+        timer.start()
+
+    def __run_locked(self, func):
+        try:
+            with self.lock:
+                func()
+        except Exception as e:
+            logger.error(e)
+            logger.error(traceback.format_exc())
 
     def bind(self, key, func):
         """
@@ -0,0 +1,176 @@
+# coding: UTF-8
+
+import queue
+import threading
+import traceback
+
+from src import logger
+
+
+class EventDispatcher:
+    """
+    Run the handlers of the websocket events in a thread of their own, so the strategy, the REST orders
+    and the notifications never block the thread reading the socket.
+
+    The events wait in a bounded queue and are handled one after the other, in the order they were received.
+    Events of the `coalesce` keys (e.g. the book ticker) are latest-wins: while one is waiting,
+    a newer event of the same key replaces its value instead of taking another place in the queue.
+    The other events (klines, orders, positions...) are never dropped: when the queue is full,
+    `put` waits for the handlers to catch up (backpressure on the socket reader).
+
+    With an `executor`, e.g. the thread pool of the `AsyncTransport`, the events are handled by a task
+    of the executor, submitted when events are waiting, instead of a thread of the dispatcher.
+    The events are still handled one after the other: a single task handles them at a time.
+
+    # Example usage:
+    dispatcher = EventDispatcher("binance", coalesce=["bookticker"])
+    dispatcher.put("bookticker", handler, action, value)
+    dispatcher.stop()
+    """
+
+    def __init__(self, name, max_size=1000, coalesce=(), executor=None):
+        """
+        Constructor for EventDispatcher class, starts the dispatching thread when there is no executor.
+        Args:
+            name (str): The name of the dispatching thread.
+            max_size (int, optional): The events waiting for their handlers before `put` waits. Defaults to 1000.
+            coalesce (list, optional): The keys of the events of which only the latest one is handled.
+                Defaults to ().
+            executor (concurrent.futures.Executor, optional): Handles the events in its threads instead of
+                a thread of the dispatcher. Defaults to None.
+        """
+        self.queue = queue.Queue(max_size)
+        self.coalesce = set(coalesce)
+        # Latest handler and arguments of the coalesced keys waiting in the queue
+        self.latest = {}
+        self.lock = threading.Lock()
+        # Events handled
+        self.dispatched = 0
+        # Coalesced events replaced by a newer one before being handled
+        self.coalesced = 0
+        # Events which waited for room in the queue
+        self.blocked = 0
+        self.executor = executor
+        # With an executor, True while a task handling the events is submitted and not started
+        self.scheduled = False
+        # With an executor, True while a task (or `put`) handles the events
+        self.draining = False
+        self.thread = None
+        if executor is None:
+            self.thread = threading.Thread(target=self.__run, name=name, daemon=True)
+            self.thread.start()
+
+    def put(self, key, handler, *args):
+        """
+        Queue an event, called by the websocket thread.
+        Args:
+            key (str): The key of the event, e.g. "bookticker" or "1m".
+            handler (function): The handler of the event.
+            *args: The arguments of the handler.
+        """
+        if key in self.coalesce:
+            with self.lock:
+                pending = key in self.latest
+                self.latest[key] = (handler, args)
+                if pending:
+                    self.coalesced += 1
+                    return
+            item = key
+        else:
+            item = (handler, args)
+
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.blocked += 1
+            if self.blocked == 1 or self.blocked % 1000 == 0:
+                logger.info(f"Event queue full, the websocket waits for the handlers ({self.blocked} times)")
+            if self.executor is not None:
+                # the submitted task may wait for a thread of the executor taken by `put`,
+                # handle the events here unless a task is already handling them
+                self.__drain()
+            self.queue.put(item)
+
+        if self.executor is not None:
+            self.__schedule()
+
+    def __run(self):
+        """
+        Handle the queued events until `stop` is called.
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            self.__handle(item)
+
+    def __schedule(self):
+        """
+        Submit a task handling the queued events to the executor, unless one is submitted or running.
+        """
+        with self.lock:
+            if self.scheduled or self.draining:
+                return
+            self.scheduled = True
+        try:
+            self.executor.submit(self.__drain)
+        except RuntimeError: # the executor is shut down
+            with self.lock:
+                self.scheduled = False
+
+    def __drain(self):
+        """
+        Handle the queued events until the queue is empty, unless they are already handled by another thread.
+        """
+        while True:
+            with self.lock:
+                self.scheduled = False
+                if self.draining:
+                    return
+                self.draining = True
+            try:
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    self.__handle(item)
+            finally:
+                with self.lock:
+                    self.draining = False
+            # an event queued once the queue was found empty found draining set and was not scheduled
+            if self.queue.empty():
+                return
+
+    def __handle(self, item):
+        """
+        Run the handler of a queued event.
+        """
+        if isinstance(item, str):
+            with self.lock:
+                handler, args = self.latest.pop(item)
+        else:
+            handler, args = item
+        try:
+            handler(*args)
+        except Exception as e:
+            logger.error(e)
+            logger.error(traceback.format_exc())
+        self.dispatched += 1
+
+    def stats(self):
+        """
+        Get the counters of the dispatcher.
+        Returns:
+            dict: dispatched, coalesced and blocked event counts, and the events currently waiting (queued).
+        """
+        return {"dispatched": self.dispatched, "coalesced": self.coalesced,
+                "blocked": self.blocked, "queued": self.queue.qsize()}
+
+    def stop(self):
+        """
+        Stop the dispatching thread once the queued events are handled.
+        With an executor the queued events are handled by the submitted task, there is no thread to stop.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
@@ -9,7 +9,7 @@ import dateutil.parser
 import pandas as pd
 
 from src import logger, allowed_range, allowed_range_minute_granularity, retry, delta, load_data, resample, \
-    find_timeframe_string, sync_obj_with_config
+    find_timeframe_string, sync_obj_with_config, scan_candles
 from src.exchange_config import exchange_config
 from src.exchange.ftx.ftx_stub import FtxStub
 
@@ -51,6 +51,8 @@ class FtxBackTest(FtxStub):
         self.market_price = 0
         # OHLCV
         self.df_ohlcv = None
+        # Report of the last candle check
+        self.candle_report = None
         # Current time axis
         self.index = None
         # Current time
@@ -249,46 +251,11 @@ class FtxBackTest(FtxStub):
     def check_candles(self, df):
         """
         Check for missing candles
+        Returns the CandleReport with the gaps, duplicates and counts found
         """
-        logger.info("-------")
-        logger.info(f"Checking Candles:")
-        logger.info("-------")
-        logger.info(f"Start: {df.iloc[0][0]}")
-        logger.info(f"End: {df.iloc[-1][0]}")
-        logger.info("-------")
-
-        diff = (dateutil.parser.isoparse(df.iloc[1][0])-dateutil.parser.isoparse(df.iloc[0][0])).total_seconds()
-
-        logger.info(f"Interval: {diff}s")
-        logger.info("-------")
-
-        count = 0
-        rows = df.shape[0]
-        prev_current_date = None
-
-        for index in range(0, rows-1):
-            current_date = dateutil.parser.isoparse(df.iloc[index][0])
-            next_date = dateutil.parser.isoparse(df.iloc[index+1][0])
-
-            diff2 = (next_date-current_date).total_seconds()
-            if diff2 != diff:
-                count += abs((diff2-diff)/diff)
-                
-                # logger.info(current_date)
-                # logger.info(next_date)
-                # logger.info(f"Missing Candles: {(diff2-diff)/diff} Total: {count}")
-
-                # if(prev_current_date != None):
-                #     logger.info(f"Last Missing Candle Interval: {current_date-prev_current_date}")
-
-                # logger.info("------------")
-
-                prev_current_date = current_date 
-            elif diff2 <= 0:
-                logger.info(f"Duplicate Candle: {current_date}")
-
-        logger.info(f"Total Missing Candles = {count}")
-        logger.info("-------")
+        report = scan_candles(df.iloc[:, 0])
+        report.log()
+        return report
 
     def save_csv(self, data, file):
 
@@ -384,7 +351,7 @@ class FtxBackTest(FtxStub):
             self.df_ohlcv = load_data(file)
 
         if self.check_candles_flag:
-            self.check_candles(self.df_ohlcv)
+            self.candle_report = self.check_candles(self.df_ohlcv)
 
     # https://stackoverflow.com/questions/8299386/modifying-a-symlink-in-python/55742015#55742015
     def symlink(self, target, link_name, overwrite=False):        
@@ -9,11 +9,12 @@ import traceback
 import urllib
 
 import websocket
-from datetime import datetime
 import pandas as pd
 
-from src import logger, to_data_frame, notify
+from src import logger, notify
 from src.config import config as conf
+from src.exchange import messages
+from src.exchange.messages import Kline
 
 
 def generate_nonce():
@@ -195,7 +196,7 @@ class FtxWs:
         :return:
         """        
         try:
-            obj = json.loads(message)
+            obj = messages.loads(message)
       
             if 'channel' in obj:
                 if 'data' not in obj:
@@ -207,18 +208,9 @@ class FtxWs:
 
                 if table.startswith("klineV2"): 
                                 
-                    data = [{
-                        "timestamp" : data[0]['end'],
-                        "high" : data[0]['high'],
-                        "low" : data[0]['low'],
-                        "open" : data[0]['open'],
-                        "close" : data[0]['close'],
-                        "volume" : data[0]['volume']
-                    }]
-                    data[0]['timestamp'] = datetime.fromtimestamp(data[0]['timestamp']).strftime('%Y-%m-%dT%H:%M:%S')
-                    data[0]['timestamp'] = datetime.strptime(data[0]['timestamp'],'%Y-%m-%dT%H:%M:%S')                                             
-                   
-                    self.__emit(table, action, to_data_frame([data[0]]))  
+                    data = Kline(int(data[0]['end']) * 1_000_000_000, float(data[0]['open']), float(data[0]['high']),
+                                 float(data[0]['low']), float(data[0]['close']), float(data[0]['volume']))
+                    self.__emit(table, action, data)
 
                 elif table.startswith("ticker"):
                     self.__emit(table, action, data)             
@@ -0,0 +1,103 @@
+# coding: UTF-8
+
+import operator
+from itertools import islice
+
+from sortedcontainers import SortedDict
+
+
+class L2Book:
+    """
+    Incremental L2 order book: the quantity at every price level of the bids and the asks,
+    kept sorted by price from the best level as the snapshots and the deltas of a depth stream arrive.
+
+    Updating a level is O(log n) and the best bid and ask are O(1), instead of sorting every price of the book
+    on every delta. The book is not bound to an exchange: the websocket handlers feed it with (price, quantity)
+    levels, e.g. BitMEX orderBookL2 or Bybit orderbook messages, where a quantity of 0 removes the level.
+
+    # Example usage:
+    book = L2Book()
+    book.snapshot(bids=[(100.0, 2.0), (99.5, 1.0)], asks=[(100.5, 3.0)])
+    book.apply(bids=[(100.0, 0)], asks=[(100.2, 1.5)])
+    book.best_bid()  # (99.5, 1.0)
+    book.depth(10)  # {"bids": [(99.5, 1.0)], "asks": [(100.2, 1.5), (100.5, 3.0)]}
+    """
+
+    def __init__(self):
+        """
+        Constructor for L2Book class, an empty book.
+        """
+        # Quantity by price, the highest bid first
+        self.bids = SortedDict(operator.neg)
+        # Quantity by price, the lowest ask first
+        self.asks = SortedDict()
+
+    def snapshot(self, bids, asks):
+        """
+        Replace the book with a snapshot.
+        Args:
+            bids (list): The (price, quantity) levels of the bids.
+            asks (list): The (price, quantity) levels of the asks.
+        """
+        self.bids.clear()
+        self.asks.clear()
+        self.apply(bids, asks)
+
+    def apply(self, bids=(), asks=()):
+        """
+        Apply a delta, a level with a quantity of 0 is removed.
+        Args:
+            bids (list, optional): The (price, quantity) levels of the bids which changed. Defaults to ().
+            asks (list, optional): The (price, quantity) levels of the asks which changed. Defaults to ().
+        """
+        for price, quantity in bids:
+            self.__set(self.bids, float(price), float(quantity))
+        for price, quantity in asks:
+            self.__set(self.asks, float(price), float(quantity))
+
+    def update(self, side, price, quantity):
+        """
+        Set the quantity of one level, 0 removes it.
+        Args:
+            side (str): "bids" or "asks".
+            price (float): The price of the level.
+            quantity (float): The quantity of the level.
+        """
+        self.__set(self.bids if side == "bids" else self.asks, float(price), float(quantity))
+
+    @staticmethod
+    def __set(levels, price, quantity):
+        if quantity == 0:
+            levels.pop(price, None)
+        else:
+            levels[price] = quantity
+
+    def best_bid(self):
+        """
+        Get the best bid.
+        Returns:
+            tuple: The price and quantity of the highest bid, None if there is no bid.
+        """
+        return self.bids.peekitem(0) if self.bids else None
+
+    def best_ask(self):
+        """
+        Get the best ask.
+        Returns:
+            tuple: The price and quantity of the lowest ask, None if there is no ask.
+        """
+        return self.asks.peekitem(0) if self.asks else None
+
+    def depth(self, levels=None):
+        """
+        Get a snapshot of the top levels of the book.
+        Args:
+            levels (int, optional): The number of levels of each side. Defaults to None, all the levels.
+        Returns:
+            dict: The (price, quantity) levels of the "bids" and the "asks", from the best one.
+        """
+        return {"bids": list(islice(self.bids.items(), levels)),
+                "asks": list(islice(self.asks.items(), levels))}
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
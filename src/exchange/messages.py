@@ -0,0 +1,103 @@
+# coding: UTF-8
+
+import json
+from typing import NamedTuple
+
+from src import logger
+
+
+#############            Websocket Messages            #####################################################################
+############################################################################################################################
+#
+# Decoding of the websocket frames and the typed messages the websockets pass to the exchange handlers.
+# Frames are decoded with the fastest JSON library installed (orjson, then msgspec, then the standard library),
+# and klines and book tickers are passed as plain tuples instead of a DataFrame or a dict per message.
+
+
+def _orjson_decoder():
+    import orjson
+    return orjson.loads
+
+
+def _msgspec_decoder():
+    import msgspec
+    return msgspec.json.Decoder().decode
+
+
+def _json_decoder():
+    return json.loads
+
+
+# JSON decoders by name, in order of preference
+JSON_DECODERS = {
+    "orjson": _orjson_decoder,
+    "msgspec": _msgspec_decoder,
+    "json": _json_decoder
+}
+
+
+def get_json_decoder(name=None):
+    """
+    Get a JSON decoder.
+    Args:
+        name (str, optional): "orjson", "msgspec" or "json". Defaults to None, the first one installed.
+    Returns:
+        tuple: The name and the decoding function, taking a str or bytes frame.
+    """
+    if name is not None:
+        return name, JSON_DECODERS[name]()
+    for name, decoder in JSON_DECODERS.items():
+        try:
+            return name, decoder()
+        except ImportError:
+            continue
+
+
+json_decoder_name, loads = get_json_decoder()
+
+
+def set_json_decoder(name=None):
+    """
+    Set the JSON decoder of the websockets (`loads`).
+    Args:
+        name (str, optional): "orjson", "msgspec" or "json". Defaults to None, the first one installed.
+    """
+    global json_decoder_name, loads
+    json_decoder_name, loads = get_json_decoder(name)
+    logger.info(f"Websocket JSON decoder: {json_decoder_name}")
+
+
+class Kline(NamedTuple):
+    """
+    A candle of a kline stream.
+    """
+    # Time of the candle, in nanoseconds since the epoch (UTC), as given by the exchange
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class BookTicker(NamedTuple):
+    """
+    The best bid and ask of a book ticker stream.
+    """
+    bid_price: float
+    bid_qty: float
+    ask_price: float
+    ask_qty: float
+    # Transaction time, in milliseconds since the epoch
+    time: int
+
+
+def ceil_minute(timestamp):
+    """
+    Round a nanosecond timestamp up to the minute, e.g. the close time 16:04:59.999 of a candle to 16:05:00.
+    Args:
+        timestamp (int): The timestamp in nanoseconds since the epoch.
+    Returns:
+        int: The timestamp rounded up to the minute, in nanoseconds.
+    """
+    return -(-timestamp // 60_000_000_000) * 60_000_000_000
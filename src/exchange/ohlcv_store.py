@@ -0,0 +1,400 @@
+# coding: UTF-8
+
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, updates from parallel processes are not serialized
+    fcntl = None
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class OHLCVStore:
+    """
+    Columnar on-disk store for historical OHLCV data.
+
+    Every column is kept in its own raw little-endian binary file in a generation directory,
+    next to a small `meta.json` holding the column order, the number of rows and the current generation:
+
+        ohlc/<exchange>/<pair>/<timeframe>/
+            meta.json
+            gen<n>/
+                time.i8      - int64 nanoseconds since epoch (UTC)
+                open.f8, high.f8, low.f8, close.f8, volume.f8   - float64
+
+    The committed rows of a file are never modified: readers, including the processes memory-mapping the store
+    (`ohlcv_mmap`), only read the number of rows of the `meta.json` they loaded. An append writes the new rows
+    in place after the committed ones and then replaces `meta.json` atomically with the new row count.
+    An update rewriting committed rows (a truncate, a merge into the middle, a different last candle) writes
+    a new generation instead: the column files whose committed rows are unchanged are hard links of the current
+    ones, appended in place, and only the other ones are copied. The previous generation is kept for the readers
+    which loaded `meta.json` just before the update, the older ones are removed.
+    Updates are serialized between processes with an exclusive lock on a `lock` file.
+    Stores written before generations (column files next to `meta.json`) are read in place
+    and moved to a generation by their first update.
+    """
+    META_FILENAME = "meta.json"
+    TIME_FILENAME = "time.i8"
+    LOCK_FILENAME = "lock"
+
+    def __init__(self, path):
+        """
+        Constructor for OHLCVStore class.
+        Args:
+            path (str): The directory of the store.
+        """
+        self.path = path
+        self.meta = None
+
+    def __len__(self):
+        return self.rows()
+
+    def exists(self):
+        """
+        Check whether the store has been written.
+        Returns:
+            bool: True if the store exists on disk.
+        """
+        return os.path.exists(os.path.join(self.path, self.META_FILENAME))
+
+    def rows(self):
+        """
+        Get the number of committed rows.
+        Returns:
+            int: The number of candles in the store.
+        """
+        return self.__load_meta()["rows"] if self.exists() else 0
+
+    def columns(self):
+        """
+        Get the OHLCV column order of the store.
+        Returns:
+            list: The column names in the order they were written.
+        """
+        return list(self.__load_meta()["columns"])
+
+    def read(self, mmap=False, set_index=False):
+        """
+        Read the store into a DataFrame.
+
+        With `mmap=True` and `set_index=True` the DataFrame is backed by the memory-mapped files without a copy,
+        so processes reading the same store share the page cache instead of holding private copies.
+
+        Args:
+            mmap (bool, optional): If True, the columns are memory-mapped read-only instead of read into memory.
+                Defaults to False.
+            set_index (bool, optional): If True, the time is the index of the DataFrame instead of its first column.
+                Defaults to False.
+        Returns:
+            pd.DataFrame: The OHLCV data with the time (tz-aware UTC) followed by the OHLCV columns.
+        """
+        arrays = self.read_arrays(mmap=mmap)
+        times = pd.DatetimeIndex(pd.arrays.DatetimeArray(arrays["timestamp"].view("M8[ns]"),
+                                                         dtype=pd.DatetimeTZDtype(tz="UTC")), name="time")
+        data = {} if set_index else {"time": times}
+        for column in self.columns():
+            data[column] = arrays[column]
+        return pd.DataFrame(data, index=times if set_index else None, copy=False)
+
+    def read_arrays(self, mmap=False):
+        """
+        Read the store as NumPy arrays.
+
+        Args:
+            mmap (bool, optional): If True, the columns are memory-mapped read-only instead of read into memory.
+                Defaults to False.
+        Returns:
+            dict: An int64 "timestamp" array and a float64 array per OHLCV column.
+        """
+        meta = self.__load_meta()
+        directory = self.__directory(meta)
+        arrays = {"timestamp": self.__read_column(directory, self.TIME_FILENAME, np.int64, meta["rows"], mmap)}
+        for column in meta["columns"]:
+            arrays[column] = self.__read_column(directory, self.__column_filename(column), np.float64,
+                                                meta["rows"], mmap)
+        return arrays
+
+    def last_time(self, rows=None):
+        """
+        Get the time of the last stored candle.
+        Args:
+            rows (int, optional): Get the time of the last of the first `rows` candles instead. Defaults to None.
+        Returns:
+            pd.Timestamp or None: The time of the last candle, None if the store is empty.
+        """
+        rows = self.rows() if rows is None else min(rows, self.rows())
+        if rows <= 0:
+            return None
+        timestamps = self.__read_column(self.__directory(self.__load_meta()), self.TIME_FILENAME, np.int64,
+                                        rows, mmap=True)
+        return pd.Timestamp(int(timestamps[-1]), tz="UTC")
+
+    def write(self, data_frame):
+        """
+        Replace the content of the store.
+
+        Args:
+            data_frame (pd.DataFrame): The OHLCV data, either indexed by time or with the time in the first column.
+        """
+        timestamps, data_frame = self.__split_time(data_frame)
+        columns = [c for c in data_frame.columns if c in OHLCV_COLUMNS]
+        with self.__lock():
+            self.__commit(columns, 0, timestamps, self.__values(data_frame, columns))
+
+    def append(self, data_frame, keep_rows=None):
+        """
+        Append candles newer than the last stored candle.
+
+        Rows at or before the last stored time and duplicate times are skipped,
+        so the store stays sorted and unique.
+
+        Args:
+            data_frame (pd.DataFrame): The OHLCV data, either indexed by time or with the time in the first column.
+            keep_rows (int, optional): Drop the candles after the first `keep_rows` ones in the same update,
+                e.g. to replace the last candle which was not closed yet. Defaults to None, all are kept.
+        Returns:
+            int: The number of appended rows.
+        """
+        timestamps, data_frame = self.__split_time(data_frame)
+        with self.__lock():
+            if not self.exists():
+                columns = [c for c in data_frame.columns if c in OHLCV_COLUMNS]
+                self.__commit(columns, 0, timestamps, self.__values(data_frame, columns))
+                return self.rows()
+
+            rows = self.rows() if keep_rows is None else max(0, min(keep_rows, self.rows()))
+            last = self.last_time(rows)
+
+            keep = np.ones(len(timestamps), dtype=bool)
+            if len(timestamps) > 1:
+                keep[1:] = timestamps[1:] > timestamps[:-1]
+            if last is not None:
+                keep &= timestamps > last.value
+            if keep.any() or rows < self.rows():
+                self.__commit(self.columns(), rows, timestamps[keep], self.__values(data_frame, self.columns(), keep))
+            return int(keep.sum())
+
+    def merge(self, data_frame):
+        """
+        Insert candles at any position, e.g. to fill gaps in the history.
+
+        Rows at times already in the store and duplicate times are skipped.
+        Candles after the last stored one are appended in place, inserting candles before it writes
+        a new generation with the history before the first inserted candle and the merged rest.
+
+        Args:
+            data_frame (pd.DataFrame): The OHLCV data, either indexed by time or with the time in the first column.
+        Returns:
+            int: The number of inserted rows.
+        """
+        timestamps, data_frame = self.__split_time(data_frame)
+        with self.__lock():
+            if not self.exists():
+                columns = [c for c in data_frame.columns if c in OHLCV_COLUMNS]
+                self.__commit(columns, 0, timestamps, self.__values(data_frame, columns))
+                return self.rows()
+
+            rows = self.rows()
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+            keep = np.ones(len(timestamps), dtype=bool)
+            if len(timestamps) > 1:
+                keep[1:] = timestamps[1:] > timestamps[:-1]
+            arrays = self.read_arrays(mmap=True)
+            known = arrays["timestamp"]
+            if rows > 0:
+                position = np.searchsorted(known, timestamps)
+                keep &= known[np.minimum(position, rows - 1)] != timestamps
+            if not keep.any():
+                return 0
+
+            timestamps = timestamps[keep]
+            start = int(np.searchsorted(known, timestamps[0]))
+
+            # the rows from `start` on are merged with the new ones in memory
+            # and written after a copy of the rows before `start` in a new generation
+            merged_timestamps = np.concatenate([known[start:], timestamps])
+            merged_order = np.argsort(merged_timestamps, kind="stable")
+            merged = {}
+            for column in self.columns():
+                values = data_frame[column].to_numpy(dtype=np.float64)[order][keep]
+                merged[column] = np.concatenate([arrays[column][start:], values])[merged_order]
+            del arrays, known
+
+            self.__commit(self.columns(), start, merged_timestamps[merged_order], merged)
+            return len(timestamps)
+
+    def truncate(self, rows):
+        """
+        Drop all candles after the given row count.
+
+        Args:
+            rows (int): The number of rows to keep.
+        """
+        with self.__lock():
+            rows = max(0, min(rows, self.rows()))
+            if rows < self.rows():
+                columns = self.columns()
+                self.__commit(columns, rows, np.empty(0, dtype=np.int64),
+                              {column: np.empty(0, dtype=np.float64) for column in columns})
+
+    def export_csv(self, file):
+        """
+        Export the store to a CSV file in the same format as the legacy `data.csv`.
+
+        Args:
+            file (str): The file path where the data should be saved.
+        """
+        if os.path.dirname(file) and not os.path.exists(os.path.dirname(file)):
+            os.makedirs(os.path.dirname(file))
+        self.read().set_index("time").to_csv(file, index_label="time")
+
+    def __split_time(self, data_frame):
+        if isinstance(data_frame.index, pd.DatetimeIndex):
+            times = data_frame.index
+        else:
+            times = pd.DatetimeIndex(pd.to_datetime(data_frame.iloc[:, 0], utc=True))
+            data_frame = data_frame.iloc[:, 1:]
+        if times.tz is None:
+            times = times.tz_localize("UTC")
+        return np.ascontiguousarray(times.as_unit("ns").asi8), data_frame
+
+    def __values(self, data_frame, columns, keep=None):
+        values = {}
+        for column in columns:
+            values[column] = data_frame[column].to_numpy(dtype=np.float64)
+            if keep is not None:
+                values[column] = values[column][keep]
+        return values
+
+    def __column_filename(self, column):
+        return f"{column}.f8"
+
+    def __directory(self, meta):
+        if "generation" not in meta:
+            return self.path
+        return os.path.join(self.path, f"gen{meta['generation']}")
+
+    @contextmanager
+    def __lock(self):
+        """
+        Hold the exclusive update lock of the store, reloading `meta.json` once acquired.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, self.LOCK_FILENAME), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            self.meta = None
+            yield
+
+    def __commit(self, columns, keep_rows, timestamps, values):
+        """
+        Commit the first `keep_rows` rows of the current generation followed by the new rows, in place when
+        no committed row changes, else in a new generation, then point `meta.json` to it.
+        Called with the update lock held.
+        """
+        meta = self.__load_meta() if self.exists() else None
+        rows = keep_rows + len(timestamps)
+        files = [(self.TIME_FILENAME, np.int64, timestamps)]
+        files += [(self.__column_filename(column), np.float64, values[column]) for column in columns]
+
+        # the files whose committed rows are all kept, the new rows replacing the others being the same
+        if meta is not None and keep_rows > 0 and list(meta["columns"]) == list(columns):
+            unchanged = [self.__unchanged(self.__directory(meta), filename, dtype, keep_rows, meta["rows"], new_values)
+                         for filename, dtype, new_values in files]
+        else:
+            unchanged = [False] * len(files)
+
+        if all(unchanged) and "generation" in meta:
+            directory = self.__directory(meta)
+            for filename, dtype, new_values in files:
+                self.__write_column(os.path.join(directory, filename), new_values[meta["rows"] - keep_rows:],
+                                    meta["rows"])
+            self.__save_meta({"columns": columns, "rows": rows, "generation": meta["generation"]})
+            return
+
+        generation = (meta.get("generation", 0) if meta is not None else 0) + 1
+        directory = os.path.join(self.path, f"gen{generation}")
+        if os.path.exists(directory):
+            # left by an interrupted update
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+
+        for (filename, dtype, new_values), same in zip(files, unchanged):
+            file = os.path.join(directory, filename)
+            if same:
+                self.__link(os.path.join(self.__directory(meta), filename), file)
+                self.__write_column(file, new_values[meta["rows"] - keep_rows:], meta["rows"])
+                continue
+            if keep_rows > 0:
+                shutil.copyfile(os.path.join(self.__directory(meta), filename), file)
+            self.__write_column(file, new_values, keep_rows)
+        self.__save_meta({"columns": columns, "rows": rows, "generation": generation})
+
+        # keep the previous generation for the readers which loaded the previous meta.json
+        for name in os.listdir(self.path):
+            file = os.path.join(self.path, name)
+            if name.startswith("gen") and name[3:].isdigit() and int(name[3:]) < generation - 1:
+                shutil.rmtree(file, ignore_errors=True)
+            elif generation > 1 and os.path.isfile(file) and \
+                    (name == self.TIME_FILENAME or name.endswith(".f8")):
+                os.remove(file)
+
+    def __unchanged(self, directory, filename, dtype, keep_rows, committed_rows, new_values):
+        """
+        Check whether the new rows written after the first `keep_rows` rows leave the committed rows of a file as
+        they are, i.e. they start with the committed rows after `keep_rows`.
+        """
+        overlap = committed_rows - keep_rows
+        if overlap <= 0:
+            return True
+        if len(new_values) < overlap:
+            return False
+        committed = self.__read_column(directory, filename, dtype, committed_rows, mmap=True)[keep_rows:]
+        return bool(np.array_equal(committed, new_values[:overlap], equal_nan=np.dtype(dtype).kind == "f"))
+
+    def __link(self, source, file):
+        try:
+            os.link(source, file)
+        except OSError:
+            # file systems without hard links
+            shutil.copyfile(source, file)
+
+    def __read_column(self, directory, filename, dtype, rows, mmap):
+        file = os.path.join(directory, filename)
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        if mmap:
+            return np.memmap(file, dtype=np.dtype(dtype).newbyteorder("<"), mode="r", shape=(rows,))
+        return np.fromfile(file, dtype=np.dtype(dtype).newbyteorder("<"), count=rows)
+
+    def __write_column(self, file, values, rows):
+        """
+        Write values after the first `rows` rows of a column file, dropping what follows them
+        (e.g. the rows of an interrupted update, which no reader uses).
+        """
+        with open(file, "r+b" if os.path.exists(file) else "wb") as f:
+            f.seek(rows * values.dtype.itemsize)
+            f.write(np.ascontiguousarray(values).astype(values.dtype.newbyteorder("<"), copy=False).tobytes())
+            f.truncate()
+
+    def __load_meta(self):
+        if self.meta is None:
+            with open(os.path.join(self.path, self.META_FILENAME), "r") as f:
+                self.meta = json.load(f)
+        return self.meta
+
+    def __save_meta(self, meta):
+        file = os.path.join(self.path, self.META_FILENAME)
+        with open(file + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(file + ".tmp", file)
+        self.meta = dict(meta)
@@ -1,6 +1,148 @@
 # coding: UTF-8
+from bisect import bisect_left, insort
+
+import numpy as np
+
 from src import logger
 from src.config import config as conf
+from src.trade_journal import TradeJournal
+
+
+class StubOrder:
+    """
+    A resting order of the stub (paper trading and back tests).
+
+    Slotted record with the fields of the order dicts used before, which can still be read as `order["limit"]`.
+    """
+    __slots__ = ("id", "long", "qty", "limit", "stop", "post_only", "reduce_only", "callback", "seq")
+
+    def __init__(self, id, long, qty, limit=0, stop=0, post_only=False, reduce_only=False, callback=None):
+        self.id = id
+        self.long = long
+        self.qty = qty
+        self.limit = limit
+        self.stop = stop
+        self.post_only = post_only
+        self.reduce_only = reduce_only
+        self.callback = callback
+        # Insertion number of the order in the open orders, set by `OpenOrders`
+        self.seq = None
+
+    def __getitem__(self, key):
+        if key not in StubOrder.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in StubOrder.__slots__ else default
+
+    def __eq__(self, other):
+        if not isinstance(other, StubOrder):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in StubOrder.__slots__[:-1])
+
+    def __repr__(self):
+        return f"StubOrder({', '.join(f'{k}={getattr(self, k)!r}' for k in StubOrder.__slots__[:-1])})"
+
+
+class OpenOrders:
+    """
+    Open orders of the stub in placement order, indexed by id.
+
+    Orders are kept in an insertion ordered dict so removing one is O(1), and their ids in a sorted list
+    so an order is found by its id, or the start of its id, with a binary search instead of a scan.
+    `version` changes with every change of the orders.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.ids = []
+        # Insertion number of the next order
+        self.next_seq = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(list(self.orders.values()))
+
+    def __getitem__(self, index):
+        return list(self.orders.values())[index]
+
+    def __contains__(self, order):
+        return self.orders.get(order.seq) is order
+
+    def __eq__(self, other):
+        if isinstance(other, OpenOrders):
+            other = list(other.orders.values())
+        return list(self.orders.values()) == other
+
+    def __repr__(self):
+        return repr(list(self.orders.values()))
+
+    def append(self, order):
+        """
+        Add an order after the other ones.
+        Args:
+            order (StubOrder): The order.
+        """
+        order.seq = self.next_seq
+        self.next_seq += 1
+        self.orders[order.seq] = order
+        insort(self.ids, (order.id, order.seq))
+        self.version += 1
+
+    def remove(self, order):
+        """
+        Remove an order.
+        Args:
+            order (StubOrder): The order.
+        """
+        del self.orders[order.seq]
+        del self.ids[bisect_left(self.ids, (order.id, order.seq))]
+        self.version += 1
+
+    def clear(self):
+        self.orders.clear()
+        self.ids.clear()
+        self.version += 1
+
+    def set_stop(self, order, stop):
+        """
+        Change the stop price of an order, e.g. when a stop-limit order turns into a limit order.
+        Args:
+            order (StubOrder): The order.
+            stop (float): The stop price.
+        """
+        order.stop = stop
+        self.version += 1
+
+    def find(self, id):
+        """
+        Find the orders whose id starts with the given id.
+        Args:
+            id (str): The id or the start of the id.
+        Returns:
+            list: The orders in placement order.
+        """
+        start = bisect_left(self.ids, (id,))
+        end = start
+        while end < len(self.ids) and self.ids[end][0].startswith(id):
+            end += 1
+        return [self.orders[seq] for _, seq in sorted(self.ids[start:end], key=lambda key: key[1])]
+
+    def since(self, seq):
+        """
+        Get the orders placed after an order.
+        Args:
+            seq (int): The insertion number of the order.
+        Returns:
+            list: The orders in placement order.
+        """
+        if self.next_seq <= seq + 1:
+            return []
+        return [order for order in self.orders.values() if order.seq > seq]
 
 
 # stub (paper trading)
@@ -15,6 +157,14 @@ class Stub():
     balance = 1000
     # Default Leverage
     leverage = 1 
+    # Skip all the per trade log output, including the position updates (the order log is still written)
+    quiet_trade_log = False
+    # Fills buffered by the trade journal before they are written to the order log, 1 writes every fill right away
+    order_log_buffer = 1
+    # Keep the fills in the trade journal once written to the order log, paper trading only keeps the file
+    keep_order_log = False
+    # Match the resting orders against each bar with NumPy arrays instead of checking them one by one (same fills)
+    vectorized_order_matching = False
 
     def __init__(self):   
         # Balance all time high
@@ -42,13 +192,17 @@ class Stub():
         # max drawdown session %
         self.max_draw_down_session_perc = 0
         # orders
-        self.open_orders = []
+        self.open_orders = OpenOrders()
         # Warmup long and short entry lists for tp_next_candle option for sltp()
         self.isLongEntry = [False, False]
         self.isShortEntry = [False,False]               
+        # Version of the open orders the matching arrays were built from and the arrays
+        self.__matching_version = None
+        self.__matching_arrays = None
 
-        self.order_log = open(conf["args"].order_log, "w")
-        self.order_log.write("time,type,id,price,quantity,av_price,position,pnl,balance,drawdown\n") #header        
+        # Trade log written to the order log file (orders.csv)
+        self.order_log = TradeJournal(conf["args"].order_log, self.order_log_buffer,
+                                      keep_rows=self.keep_order_log)
 
     def get_lot(self, **kwargs):
         """
@@ -145,7 +299,7 @@ class Stub():
         Returns:
             None
         """
-        self.open_orders = []
+        self.open_orders.clear()
 
     def close_all(self, post_only=False, callback=None, chaser=False, **kwargs):
         """
@@ -217,10 +371,9 @@ class Stub():
             id (str): Order ID for this pair.
             
         Returns:
-            dict or None: If multiple orders are found starting with the given ID, return only the first one. None if no matching order is found.
+            StubOrder or None: If multiple orders are found starting with the given ID, return only the first one. None if no matching order is found.
         """        
-        open_orders = self.open_orders                           
-        filtered_orders = [o for o in open_orders if o["id"].startswith(id)]
+        filtered_orders = self.open_orders.find(id)
         if not filtered_orders:
             return None
         if len(filtered_orders) > 1:
@@ -237,10 +390,9 @@ class Stub():
         Returns:
             list or None: List of open orders that match the ID criteria, or None if no open orders are found.
         """        
-        open_orders = self.open_orders         
         if not id:
-            return self.open_orders                      
-        filtered_orders = [o for o in open_orders if o["id"].startswith(id)] if id else open_orders 
+            return list(self.open_orders)
+        filtered_orders = self.open_orders.find(id)
         return filtered_orders if filtered_orders else None
     
     def order(
@@ -302,14 +454,7 @@ class Stub():
         self.cancel(id)
 
         if limit > 0 or stop > 0:
-            self.open_orders.append({"id": id, 
-                                     "long": long, 
-                                     "qty": ord_qty, 
-                                     "limit": limit, 
-                                     "stop": stop, 
-                                     "post_only": post_only, 
-                                     "reduce_only": reduce_only, 
-                                     "callback": callback})
+            self.open_orders.append(StubOrder(id, long, ord_qty, limit, stop, post_only, reduce_only, callback))
         else:
             self.commit(id, long, ord_qty, self.get_market_price(), True,  reduce_only, callback)
             return
@@ -350,13 +495,7 @@ class Stub():
             ord_qty = pos_size
 
         if limit > 0 or stop > 0:
-            self.open_orders.append({"id": id, 
-                                     "long": long, 
-                                     "qty": ord_qty, 
-                                     "limit": limit, 
-                                     "stop": stop, 
-                                     "post_only": post_only,
-                                     "callback": callback})
+            self.open_orders.append(StubOrder(id, long, ord_qty, limit, stop, post_only, reduce_only, callback))
         else:
             self.commit(id, long, abs(ord_qty), self.get_market_price(), True, reduce_only, callback)
             return
@@ -428,14 +567,7 @@ class Stub():
         ord_qty = round(ord_qty, round_decimals if round_decimals != None else self.asset_rounding)
 
         if limit > 0 or stop > 0:
-            self.open_orders.append({"id": id, 
-                                     "long": long, 
-                                     "qty": ord_qty, 
-                                     "limit": limit, 
-                                     "stop": stop, 
-                                     "post_only": post_only, 
-                                     "reduce_only": False, 
-                                     "callback": callback})
+            self.open_orders.append(StubOrder(id, long, ord_qty, limit, stop, post_only, False, callback))
         else:
             self.commit(id, long, ord_qty, self.get_market_price(), True, False, callback)
             return
@@ -516,14 +648,7 @@ class Stub():
         ord_qty = round(ord_qty, round_decimals if round_decimals != None else self.asset_rounding)
 
         if limit > 0 or stop > 0:
-            self.open_orders.append({"id": id, 
-                                     "long": long, 
-                                     "qty": ord_qty, 
-                                     "limit": limit, 
-                                     "stop": stop, 
-                                     "post_only": post_only, 
-                                     "reduce_only": False, 
-                                     "callback": callback})
+            self.open_orders.append(StubOrder(id, long, ord_qty, limit, stop, post_only, False, callback))
         else:
             self.commit(id, long, ord_qty, self.get_market_price(), True, reduce_only, callback)
             return
@@ -604,17 +729,14 @@ class Stub():
 
             self.drawdown = (self.balance_ath - self.balance) / self.balance_ath * 100
 
-            # self.order_log.write("time,type,id,price,quantity,av_price,position,pnl,balance,drawdown\n") #header
-            self.order_log.write(
-                f"{self.timestamp},{'BUY' if long else 'SELL'},{id if next_qty == 0 else 'Reversal'},"\
-                f"{price},{-self.position_size if abs(next_qty) else order_qty},{self.position_avg_price},"
-                f"{0 if abs(next_qty) else self.position_size+order_qty},{profit:.2f},{self.get_balance():.2f},{self.drawdown:.2f}\n"
-                )
-            self.order_log.flush()
+            self.order_log.append(self.timestamp, 'BUY' if long else 'SELL', id if next_qty == 0 else 'Reversal',
+                                  price, -self.position_size if abs(next_qty) else order_qty, self.position_avg_price,
+                                  0 if abs(next_qty) else self.position_size+order_qty, profit, self.get_balance(),
+                                  self.drawdown)
 
             self.position_size = self.get_position_size() + order_qty    
 
-            if self.enable_trade_log:
+            if self.enable_trade_log and not self.quiet_trade_log:
                 logger.info(f"========= Close Position =============")
                 logger.info(f"ID            : {id if next_qty == 0 else 'Reversal'}")
                 logger.info(f"TIME          : {self.timestamp}")
@@ -635,7 +757,7 @@ class Stub():
                 callback()
 
         if next_qty != 0:
-            if self.enable_trade_log:
+            if self.enable_trade_log and not self.quiet_trade_log:
                 logger.info(f"********* Create Position ************")
                 logger.info(f"TIME          : {self.timestamp}")
                 logger.info(f"PRICE         : {price}")
@@ -651,15 +773,13 @@ class Stub():
             else:
                  self.position_avg_price = price
             self.position_size = next_qty
-            logger.info(f"//////// Current Position ////////////")
-            logger.info(f"current position size: {next_qty} at avg. price: {self.position_avg_price}")
+            if not self.quiet_trade_log:
+                logger.info(f"//////// Current Position ////////////")
+                logger.info(f"current position size: {next_qty} at avg. price: {self.position_avg_price}")
 
-            # self.order_log.write("time,type,id,price,quantity,av_price,position,pnl,balance,drawdown\n") #header
-            self.order_log.write(f"{self.timestamp},{'BUY' if long else 'SELL'},{id},{price},"
-                                 f"{next_qty if abs(order_qty) > abs(next_qty) else order_qty},"
-                                 f"{self.position_avg_price},{self.position_size},{'-'},"
-                                 f"{self.get_balance():.2f},{self.drawdown:.2f}\n")
-            self.order_log.flush()
+            self.order_log.append(self.timestamp, 'BUY' if long else 'SELL', id, price,
+                                  next_qty if abs(order_qty) > abs(next_qty) else order_qty,
+                                  self.position_avg_price, self.position_size, None, self.get_balance(), self.drawdown)
 
             self.set_trail_price(price)
 
@@ -774,6 +894,98 @@ class Stub():
                 if self.OHLC['low'][-1] <= tp_price_short:               
                     self.close_all_at_price(tp_price_short, self.get_sltp_values()['profit_short_callback'])  
 
+    def __match_order(self, order, pos_size, high, low):
+        """
+        Match a resting order against a bar: reduce-only orders are skipped while there is no position to reduce,
+        stop-limit orders whose stop is hit turn into limit orders, limit and stop orders are filled.
+        Args:
+            order (StubOrder): The order.
+            pos_size (float): The position size at the start of the bar.
+            high (float): The high of the bar.
+            low (float): The low of the bar.
+        """
+        long = order.long
+        limit = order.limit
+        stop = order.stop
+
+        if order.reduce_only == True and (self.position_size == 0
+                                          or (long and pos_size > 0)
+                                          or (not long and pos_size < 0)):
+            if stop != 0:
+                self.open_orders.set_stop(order, 0)
+            return
+
+        if limit > 0 and stop > 0 and (high >= stop >= low):
+            self.open_orders.set_stop(order, 0)
+            if not self.minute_granularity:
+                logger.info("Simulating Stop-Limit orders on historical bars can be erroneous " +
+                            "as there is no way to guess intra-bar price movement. " +
+                            "Stop-Limit orders are coverted into Limit orders " +
+                            "once the stop is hit and evaluated in successive candles. " +
+                            "Switch on Minute Granularity for a more accurate simulation of Stop-limit orders.")
+        elif limit > 0:
+            if (long and low < limit) or (not long and high > limit):
+                self.open_orders.remove(order)
+                self.commit(order.id, long, order.qty, limit, True, order.reduce_only, order.callback)
+        elif stop > 0:
+            if (high >= stop >= low):
+                self.open_orders.remove(order)
+                self.commit(order.id, long, order.qty, stop, True, order.reduce_only, order.callback)
+
+    def __match_open_orders(self, pos_size, high, low):
+        """
+        Match the resting orders against a bar with NumPy arrays, with the same fills as `__match_order`.
+
+        The limit and stop prices of the orders are kept in arrays (rebuilt only when the orders change),
+        so the orders which can not fill, convert or be skipped as reduce-only on this bar are never visited.
+        The remaining ones are matched in order.
+
+        Args:
+            pos_size (float): The position size at the start of the bar.
+            high (float): The high of the bar.
+            low (float): The low of the bar.
+        Returns:
+            list: The orders to match one by one, e.g. because an order filling on this bar has a callback
+                (which may change the orders).
+        """
+        if not self.open_orders:
+            return []
+
+        if self.__matching_version != (id(self.open_orders), self.open_orders.version):
+            orders = list(self.open_orders)
+            limit = np.array([o.limit for o in orders], dtype=np.float64)
+            stop = np.array([o.stop for o in orders], dtype=np.float64)
+            long = np.array([o.long for o in orders], dtype=bool)
+            reduce_only = np.array([o.reduce_only for o in orders], dtype=bool)
+            long_limits = limit[long & (limit > 0)]
+            short_limits = limit[~long & (limit > 0)]
+            self.__matching_version = (id(self.open_orders), self.open_orders.version)
+            self.__matching_arrays = (orders, limit, stop, long, reduce_only,
+                                      # bounds to skip the bars on which no order can change
+                                      long_limits.max() if len(long_limits) else -np.inf,
+                                      short_limits.min() if len(short_limits) else np.inf,
+                                      np.sort(stop[stop > 0]).tolist(),
+                                      bool((reduce_only & (stop != 0)).any()))
+        orders, limit, stop, long, reduce_only, max_long_limit, min_short_limit, stops, reduce_only_stop = \
+            self.__matching_arrays
+
+        first_stop = bisect_left(stops, low)
+        if not (max_long_limit > low or min_short_limit < high or reduce_only_stop
+                or (first_stop < len(stops) and stops[first_stop] <= high)):
+            return []
+
+        stop_hit = (stop > 0) & (high >= stop) & (stop >= low)
+        has_limit = limit > 0
+        stop_limit = has_limit & stop_hit
+        fill = (has_limit & ~stop_limit & ((long & (low < limit)) | (~long & (high > limit)))) \
+               | (~has_limit & stop_hit)
+        # reduce-only orders without a stop are left as they are whether they are skipped or not
+        active = np.flatnonzero((reduce_only & (stop != 0)) | stop_limit | fill)
+
+        if any(orders[i].callback is not None for i in active if fill[i]):
+            return list(self.open_orders)
+        return [orders[i] for i in active]
+
     @staticmethod
     def override_strategy(strategy):       
         """
@@ -785,7 +997,6 @@ class Stub():
         """
          # The wrapper function that will replace the original function.
         def wrapper(self, action, open, close, high, low, volume):           
-            new_open_orders = []
             pos_size = self.get_position_size()
             trail_price = self.get_trail_price()
             
@@ -799,66 +1010,20 @@ class Stub():
             if pos_size < 0 and high[-1] < trail_price:
                 self.set_trail_price(high[-1])
 
-            index=0
-
-            while(True):
-                
-                if index < len(self.open_orders):
-                    order = self.open_orders[index]
-                    index += 1
-                else:
-                    break
-
-                id = order["id"]
-                long = order["long"]
-                qty = order["qty"]
-                limit = order["limit"]
-                stop = order["stop"]
-                post_only = order["post_only"]
-                reduce_only = order["reduce_only"]
-                callback = order["callback"]
-
-                if reduce_only == True and (self.position_size == 0
-                                            or (long and pos_size > 0)
-                                            or (not long and pos_size < 0)):
-                    new_open_orders.append({"id": id, 
-                                            "long": long, 
-                                            "qty": qty, 
-                                            "limit": limit, 
-                                            "stop": 0, 
-                                            "post_only": post_only, 
-                                            "reduce_only": reduce_only, 
-                                            "callback": callback})
-                    continue
-
-                if limit > 0 and stop > 0 and (high[-1] >= stop >= low[-1]):
-                        new_open_orders.append({"id": id, 
-                                                "long": long, 
-                                                "qty": qty, 
-                                                "limit": limit, 
-                                                "stop": 0, 
-                                                "post_only": post_only, 
-                                                "reduce_only": reduce_only, 
-                                                "callback": callback})
-                        if not self.minute_granularity:
-                            logger.info("Simulating Stop-Limit orders on historical bars can be erroneous " +
-                                        "as there is no way to guess intra-bar price movement. " +
-                                        "Stop-Limit orders are coverted into Limit orders " +
-                                        "once the stop is hit and evaluated in successive candles. " +
-                                        "Switch on Minute Granularity for a more accurate simulation of Stop-limit orders.")
-                        continue
-                elif limit > 0:
-                    if (long and low[-1] < limit) or (not long and high[-1] > limit):
-                        self.commit(id, long, qty, limit, True, reduce_only, callback)
-                        continue
-                elif stop > 0:
-                    if (high[-1] >= stop >= low[-1]):
-                        self.commit(id, long, qty, stop, True, reduce_only, callback)
-                        continue
-
-                new_open_orders.append(order)
-
-            self.open_orders = new_open_orders
+            # orders placed by callbacks of the filled orders are matched as well
+            last_seq = self.open_orders.next_seq - 1
+            if self.vectorized_order_matching:
+                orders = self.__match_open_orders(pos_size, high[-1], low[-1])
+            else:
+                orders = list(self.open_orders)
+
+            while orders:
+                for order in orders:
+                    # skip the orders cancelled by callbacks
+                    if order in self.open_orders:
+                        self.__match_order(order, pos_size, high[-1], low[-1])
+                orders = self.open_orders.since(last_seq)
+                last_seq = self.open_orders.next_seq - 1
 
             if self.is_exit_order_active:
                 self.eval_exit()
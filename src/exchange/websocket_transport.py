@@ -0,0 +1,280 @@
+# coding: UTF-8
+
+import asyncio
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from src import logger
+
+
+class AsyncTransport:
+    """
+    Websocket transport running the streams of every exchange and pair on one asyncio event loop.
+
+    Each `*Ws` class otherwise runs every websocket in its own thread (`WebSocketApp.run_forever`), plus a thread per
+    reconnection and keep-alive timers. Here a single thread reads all the sockets, and the callbacks of a stream
+    (the same `on_open`, `on_message`, `on_error`, `on_close` and `on_pong` callbacks as a `websocket.WebSocketApp`)
+    are run one after the other in a small thread pool shared by all the streams, so a slow strategy or REST call
+    never blocks the socket reader.
+
+    The messages of a stream wait for its callbacks in a bounded queue: when the queue is full the stream stops
+    reading its socket (backpressure) until the callbacks catch up, instead of buffering without limit.
+    Needs the `websockets` package.
+
+    # Example usage:
+    transport = AsyncTransport.instance()
+    stream = transport.connect("wss://fstream.binance.com/stream?streams=btcusdt@bookTicker",
+                               on_message=lambda stream, message: print(message))
+    stream.send('{"method": "LIST_SUBSCRIPTIONS", "id": 1}')
+    stream.close()
+    """
+    # Shared transport of the process
+    _instance = None
+    # Class level lock to protect singleton creation
+    _lock = threading.Lock()
+    # Threads running the callbacks of all the streams
+    max_workers = 4
+    # Messages of a stream waiting for its callbacks before the socket is no longer read
+    queue_size = 1000
+
+    @classmethod
+    def instance(cls):
+        """
+        Get the shared transport, started on first use.
+        Returns:
+            AsyncTransport: The transport.
+        """
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls(cls.max_workers, cls.queue_size)
+            return cls._instance
+
+    def __init__(self, max_workers=4, queue_size=1000):
+        """
+        Constructor for AsyncTransport class, starts the event loop thread.
+        Args:
+            max_workers (int, optional): The threads running the callbacks of all the streams. Defaults to 4.
+            queue_size (int, optional): The messages of a stream waiting for its callbacks. Defaults to 1000.
+        """
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ws-callback")
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.__run, name="ws-transport", daemon=True)
+        self.thread.start()
+
+    def __run(self):
+        """
+        Run the event loop.
+        """
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def connect(self, url, on_open=None, on_message=None, on_error=None, on_close=None, on_pong=None,
+                header=None, ping_interval=0, ping_timeout=None):
+        """
+        Open a websocket stream, with the callbacks of a `websocket.WebSocketApp`.
+        Like `run_forever`, the stream is not reconnected once closed, `on_close` is called instead.
+        Args:
+            url (str): The websocket url.
+            on_open (function, optional): Called with the stream once connected. Defaults to None.
+            on_message (function, optional): Called with the stream and every message. Defaults to None.
+            on_error (function, optional): Called with the stream and the exception of a failure. Defaults to None.
+            on_close (function, optional): Called with the stream, the close status code and message. Defaults to None.
+            on_pong (function, optional): Called with the stream and the pong data after every ping. Defaults to None.
+            header (list or dict, optional): Headers of the handshake, "Name: value" strings or a dict. Defaults to None.
+            ping_interval (float, optional): Seconds between pings, 0 to send none. Defaults to 0.
+            ping_timeout (float, optional): Seconds to wait for a pong before closing the stream. Defaults to None.
+        Returns:
+            AsyncStream: The stream.
+        """
+        stream = AsyncStream(self, url, on_open, on_message, on_error, on_close, on_pong,
+                             header, ping_interval, ping_timeout)
+        stream.task = asyncio.run_coroutine_threadsafe(stream.run(), self.loop)
+        return stream
+
+    def call_every(self, interval, func, delay=0, condition=None):
+        """
+        Call a function periodically in the thread pool, e.g. a REST keep-alive, instead of a timer thread.
+        Args:
+            interval (float): Seconds between the end of a call and the next one.
+            func (function): The function, called without arguments.
+            delay (float, optional): Seconds before the first call. Defaults to 0.
+            condition (function, optional): Called before every call, the calls stop when it returns False.
+                Defaults to None.
+        Returns:
+            concurrent.futures.Future: Cancel it to stop the calls.
+        """
+        async def periodic():
+            await asyncio.sleep(delay)
+            while condition is None or condition():
+                try:
+                    await self.loop.run_in_executor(self.executor, func)
+                except Exception as e:
+                    logger.error(f"Periodic call error - {e}")
+                    logger.error(traceback.format_exc())
+                await asyncio.sleep(interval)
+
+        return asyncio.run_coroutine_threadsafe(periodic(), self.loop)
+
+    def stop(self):
+        """
+        Stop the event loop and the callback threads, the open streams are dropped without being closed.
+        """
+        async def cancel_tasks():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks, timeout=1)
+
+        if self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_tasks(), self.loop).result(5)
+            except Exception as e:
+                logger.error(f"Websocket transport stop error - {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.loop.close()
+        with self._lock:
+            if AsyncTransport._instance is self:
+                AsyncTransport._instance = None
+
+
+class AsyncStream:
+    """
+    A websocket stream of the `AsyncTransport`, used like a `websocket.WebSocketApp` (`send` and `close`).
+    """
+
+    def __init__(self, transport, url, on_open, on_message, on_error, on_close, on_pong,
+                 header, ping_interval, ping_timeout):
+        """
+        Constructor for AsyncStream class, see `AsyncTransport.connect`.
+        """
+        self.transport = transport
+        self.url = url
+        self.on_open = on_open
+        self.on_message = on_message
+        self.on_error = on_error
+        self.on_close = on_close
+        self.on_pong = on_pong
+        if isinstance(header, list):
+            header = dict(tuple(part.strip() for part in h.split(":", 1)) for h in header)
+        self.header = header or None
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        # Future of `run`
+        self.task = None
+        # The websockets connection, once connected
+        self.connection = None
+        # Messages and events waiting for the callbacks
+        self.queue = None
+        # Messages read from the socket
+        self.received = 0
+        # True once `close` is called
+        self.closing = False
+
+    async def run(self):
+        """
+        Connect, read the messages until the stream is closed and run the callbacks.
+        """
+        from websockets.asyncio.client import connect
+        from websockets.exceptions import ConnectionClosed
+
+        self.queue = asyncio.Queue(self.transport.queue_size)
+        dispatcher = asyncio.ensure_future(self.__dispatch())
+        keep_alive = None
+        status_code, status_message = None, None
+        try:
+            async with connect(self.url, additional_headers=self.header, ping_interval=None,
+                               max_size=None) as connection:
+                self.connection = connection
+                if self.closing:
+                    await connection.close()
+                await self.queue.put((self.on_open, ()))
+                if self.ping_interval:
+                    keep_alive = asyncio.ensure_future(self.__keep_alive(connection))
+                try:
+                    async for message in connection:
+                        self.received += 1
+                        await self.queue.put((self.on_message, (message,)))
+                except ConnectionClosed as e:
+                    await self.queue.put((self.on_error, (e,)))
+                status_code, status_message = connection.close_code, connection.close_reason
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            await self.queue.put((self.on_error, (e,)))
+        finally:
+            if keep_alive is not None:
+                keep_alive.cancel()
+            self.connection = None
+            await self.queue.put((self.on_close, (status_code, status_message)))
+            await self.queue.put(None)
+            await dispatcher
+
+    async def __dispatch(self):
+        """
+        Run the callbacks of the queued messages and events in order, in the thread pool of the transport.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            callback, args = item
+            if callback is None:
+                continue
+            try:
+                await loop.run_in_executor(self.transport.executor, callback, self, *args)
+            except Exception as e:
+                logger.error(f"Websocket callback error - {e}")
+                logger.error(traceback.format_exc())
+
+    async def __keep_alive(self, connection):
+        """
+        Ping every `ping_interval` seconds and close the stream when no pong comes within `ping_timeout` seconds.
+        """
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            pong = await connection.ping()
+            try:
+                await asyncio.wait_for(pong, self.ping_timeout)
+            except asyncio.TimeoutError:
+                logger.info(f"Websocket ping timeout: {self.url}")
+                await connection.close()
+                return
+            await self.queue.put((self.on_pong, (b"",)))
+
+    async def __send(self, message):
+        if self.connection is None:
+            raise ConnectionError("The websocket is not connected")
+        await self.connection.send(message)
+
+    async def __close(self):
+        if self.connection is not None:
+            await self.connection.close()
+        elif self.task is not None:
+            self.task.cancel()
+
+    def send(self, message):
+        """
+        Send a message, from any thread.
+        Args:
+            message (str or bytes): The message.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.__send(message), self.transport.loop)
+        future.add_done_callback(self.__log_failure)
+
+    def close(self):
+        """
+        Close the stream, from any thread. `on_close` is called once closed.
+        """
+        self.closing = True
+        asyncio.run_coroutine_threadsafe(self.__close(), self.transport.loop)
+
+    @staticmethod
+    def __log_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Websocket send error - {future.exception()}")
@@ -3,6 +3,8 @@ exchange_config = {
                  "minute_granularity": False,
                  "timeframes_sorted": True, # True for higher first, False for lower first and None when off 
                  "enable_trade_log": True,
+                 # Skip all the per trade log output of paper trading and backtests (the order log is still written)
+                 "quiet_trade_log": False,
                  "order_update_log": True,
                  "ohlcv_len": 100,
                  # Call the strategy function on start. This can be useful if you don't want to wait for the candle to close
@@ -11,6 +13,21 @@ exchange_config = {
                  # candle data that is no longer relevant. Be aware of these potential issues and make sure to handle them
                  # appropriately in your strategy implementation. 
                  "call_strat_on_start": False,
+                 # Parallel requests when downloading historical OHLCV data (they share one request weight budget)
+                 "ohlcv_download_workers": 4,
+                 # Run the websockets of all the exchanges and pairs on one asyncio event loop (needs the websockets package)
+                 # instead of 2-4 threads per websocket
+                 "async_websocket": False,
+                 # JSON decoder of the websocket messages: "orjson", "msgspec" or "json", None for the first one installed.
+                 # The decoder is shared by all the websockets of the process
+                 "json_decoder": None,
+                 # Websocket events (klines, orders...) waiting for the strategy, which then runs off the websocket
+                 # thread, 0 to run it on the websocket thread. The book ticker and the 24hr ticker are latest-wins
+                 "event_queue_size": 0,
+                 # Chaser orders are repriced at most every chaser_min_reprice_interval seconds and once the best bid/ask
+                 # moved chaser_min_reprice_ticks ticks (0 and 0 for every change), fewer cancels in fast markets
+                 "chaser_min_reprice_interval": 0,
+                 "chaser_min_reprice_ticks": 0,
                 # ==== Papertrading And Backtest Class Config ====
                  "balance": 1000,
                  "leverage": 1,
@@ -20,14 +37,31 @@ exchange_config = {
                  "search_oldest": 10, # Search for the oldest historical data, integer for increments in days, False or 0 to turn it off
                  # Warmup timeframe - used for loading warmup candles for indicators when minute granularity is need
                  # highest tf, if None its going to find it automatically based on highest tf and ohlcv_len
-                 "warmup_tf": None}, 
+                 "warmup_tf": None,
+                 # Run the backtest bar loop over NumPy arrays instead of slicing DataFrames (same trades, faster)
+                 "array_mode": False,
+                 # Keep historical data in the columnar binary store instead of data.csv (an existing data.csv is migrated once)
+                 "use_ohlcv_store": True,
+                 # Memory-map the OHLCV store read-only so parallel backtests on the same pair share one copy of the history
+                 # (best combined with array_mode)
+                 "ohlcv_mmap": False,
+                 # Download the candles missing in the OHLCV store (found by the candle check) and insert them
+                 "repair_data": False,
+                 # Match resting orders with NumPy arrays instead of checking every order on every bar (same fills),
+                 # faster for strategies keeping many orders open
+                 "vectorized_order_matching": False}, 
     "bybit": {"qty_in_usdt": False,
               "minute_granularity": False,
               "timeframes_sorted": True, # True for higher first, False for lower first and None when off 
               "enable_trade_log": True,
+              "quiet_trade_log": False,
               "order_update_log": True,
               "ohlcv_len": 100, 
               "call_strat_on_start": False,
+              "async_websocket": False,
+              "json_decoder": None,
+              "chaser_min_reprice_interval": 0,
+              "chaser_min_reprice_ticks": 0,
              # ==== Papertrading And Backtest Class Config ====
               "balance": 1000,
               "leverage": 1,
@@ -35,14 +69,22 @@ exchange_config = {
               "check_candles_flag": True,
               "days": 1200,
               "search_oldest": 10, # Search for the oldest historical data, integer for increments in days, False or 0 to turn it off
-              "warmup_tf": None}, 
+              "warmup_tf": None,
+              "array_mode": False,
+              "use_ohlcv_store": True,
+              "ohlcv_mmap": False,
+              "repair_data": False,
+              "vectorized_order_matching": False}, 
     "bitmex": {"qty_in_usdt": False,
               "minute_granularity": False,
               "timeframes_sorted": True, # True for higher first, False for lower first and None when off 
               "enable_trade_log": True,
+              "quiet_trade_log": False,
               "order_update_log": True,
               "ohlcv_len": 100, 
               "call_strat_on_start": False,
+              "async_websocket": False,
+              "json_decoder": None,
              # ==== Papertrading And Backtest Class Config ====
               "balance": 1000,
               "leverage": 1,
@@ -50,7 +92,12 @@ exchange_config = {
               "check_candles_flag": True,
               "days": 1200,
               "search_oldest": 10, # Search for the oldest historical data, integer for increments in days, False or 0 to turn it off
-              "warmup_tf": None}, 
+              "warmup_tf": None,
+              "array_mode": False,
+              "use_ohlcv_store": True,
+              "ohlcv_mmap": False,
+              "repair_data": False,
+              "vectorized_order_matching": False}, 
     "ftx": {"qty_in_usdt": False,
               "minute_granularity": False,
               "timeframes_sorted": True, # True for higher first, False for lower first and None when off 
@@ -25,6 +25,7 @@ class BotFactory():
             bot.stub_test = args.stub
             bot.spot = args.spot
             bot.hyperopt  = args.hyperopt
+            bot.hyperopt_workers = args.hyperopt_workers
             bot.account = args.account
             bot.exchange_arg = args.exchange
             bot.pair = args.pair
@@ -0,0 +1,134 @@
+# coding: UTF-8
+
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket for exchange request limits.
+
+    The bucket holds up to `capacity` tokens. By default it refills continuously at `capacity` tokens
+    per `period` seconds, with `fixed_window` it is refilled at once at the start of every period
+    (aligned to the clock, like the minute windows of Binance). A request takes as many tokens as its weight
+    and blocks until they are available, so any number of threads sharing a limiter stay within one budget.
+    """
+
+    def __init__(self, capacity, period=60, fixed_window=False):
+        """
+        Constructor for RateLimiter class.
+        Args:
+            capacity (int): The request weight allowed per period.
+            period (float, optional): The period in seconds. Defaults to 60.
+            fixed_window (bool, optional): If True, the tokens are refilled at the start of each period
+                instead of continuously. Defaults to False.
+        """
+        self.capacity = capacity
+        self.period = period
+        self.fixed_window = fixed_window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.window = self.__window()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def __window(self):
+        return int(time.time() // self.period)
+
+    def __refill(self, now):
+        if self.fixed_window:
+            window = self.__window()
+            if window != self.window:
+                self.tokens = float(self.capacity)
+                self.window = window
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / self.period)
+        self.updated = now
+
+    def __wait_time(self, now, weight):
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.fixed_window:
+            return self.period - time.time() % self.period
+        return (weight - self.tokens) * self.period / self.capacity
+
+    def acquire(self, weight=1):
+        """
+        Take tokens for a request, waiting until enough are available.
+        Args:
+            weight (int, optional): The weight of the request. Defaults to 1.
+        Returns:
+            float: The seconds waited.
+        """
+        weight = min(weight, self.capacity)
+        waited = 0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.__refill(now)
+                if now >= self.paused_until and self.tokens >= weight:
+                    self.tokens -= weight
+                    return waited
+                wait = self.__wait_time(now, weight)
+            time.sleep(wait)
+            waited += wait
+
+    def sync(self, remaining):
+        """
+        Lower the tokens to the remaining weight reported by the exchange,
+        which also counts requests of other processes on the same IP or account.
+        Args:
+            remaining (float): The remaining request weight of the current period.
+        """
+        with self.lock:
+            self.__refill(time.monotonic())
+            self.tokens = max(0, min(self.tokens, remaining))
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens, e.g. after the exchange answered 429 with a Retry-After header.
+        Args:
+            seconds (float): The seconds to pause.
+        """
+        with self.lock:
+            self.tokens = 0
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Transport adapter for requests sessions taking tokens from rate limiters before sending each request.
+
+    Mounting it on the session of a REST client limits every request of the client,
+    whichever library builds the requests.
+    """
+
+    def __init__(self, limits, sync=None, **kwargs):
+        """
+        Constructor for RateLimitedAdapter class.
+        Args:
+            limits (function): Returns the (RateLimiter, weight) pairs for a prepared request.
+            sync (function, optional): Called with the limiters, the request and the response
+                to sync the limiters with the rate limit headers. Defaults to None.
+            **kwargs: Arguments of HTTPAdapter, e.g. max_retries.
+        """
+        super().__init__(**kwargs)
+        self.limits = limits
+        self.sync = sync
+
+    def send(self, request, **kwargs):
+        limits = self.limits(request)
+        for limiter, weight in limits:
+            limiter.acquire(weight)
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code in (418, 429):
+            retry_after = response.headers.get("Retry-After")
+            for limiter, weight in limits:
+                limiter.pause(float(retry_after) if retry_after else limiter.period)
+        if self.sync is not None:
+            self.sync([limiter for limiter, weight in limits], request, response)
+        return response
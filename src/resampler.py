@@ -0,0 +1,348 @@
+# coding: UTF-8
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+RESAMPLER_COLUMNS = ["open", "high", "low", "close", "volume"]
+# Values of a bar without any candle
+EMPTY_BAR = (np.nan, np.nan, np.nan, np.nan, 0.0)
+
+
+class IncrementalResampler:
+    """
+    Aggregates candles into a higher timeframe one candle at a time.
+
+    The bins are the same as the ones of `resample` (pandas resample with label="right", closed="right"
+    and bins anchored at midnight of the first day): a bin is labelled with its end time
+    and holds the candles after its start up to and including its end.
+    The resampler keeps the finalized bars in preallocated arrays together with the bar currently being built,
+    so each candle costs O(1) whatever the length of the history.
+
+    A bar is finalized when the candle at its end time arrives, when a later candle arrives
+    or when the resampler is advanced past its end, so the finalized bars never look into the future.
+    Bins without any candle are finalized as empty bars (NaN prices and zero volume) like pandas does.
+    """
+
+    def __init__(self, rule, capacity=1024):
+        """
+        Constructor for IncrementalResampler class.
+        Args:
+            rule (str): The pandas frequency of the bars, e.g. "4H" or "15T".
+            capacity (int, optional): The initial number of finalized bars the arrays can hold,
+                the arrays grow as needed. Defaults to 1024.
+        """
+        self.rule = rule
+        self.freq = to_offset(rule).nanos
+        self.origin = None
+        # Label (end time) of the bar currently being built, None before the first candle
+        self.label = None
+        self.building = False
+        self.open = self.high = self.low = self.close = np.nan
+        self.volume = 0.0
+        self.count = 0
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((len(RESAMPLER_COLUMNS), capacity), dtype=np.float64)
+
+    def __len__(self):
+        return self.count
+
+    def bin_label(self, timestamp):
+        """
+        Get the label (end time) of the bin a candle falls into.
+        Args:
+            timestamp (int): The time of the candle in nanoseconds since epoch.
+        Returns:
+            int: The end time of the bin in nanoseconds since epoch.
+        """
+        return self.origin - ((self.origin - timestamp) // self.freq) * self.freq
+
+    def update(self, timestamp, open, high, low, close, volume):
+        """
+        Add a candle of a lower timeframe.
+
+        NaN values are skipped like in pandas aggregations, the candles have to be added in time order.
+
+        Args:
+            timestamp (int): The time of the candle in nanoseconds since epoch.
+            open (float): The open price.
+            high (float): The high price.
+            low (float): The low price.
+            close (float): The close price.
+            volume (float): The volume.
+        """
+        if self.origin is None:
+            self.origin = timestamp - timestamp % (24 * 60 * 60 * 10 ** 9)
+            self.label = self.bin_label(timestamp)
+            self.__start()
+        elif timestamp > self.label:
+            self.advance(timestamp - 1)
+            self.label = self.bin_label(timestamp)
+            self.__start()
+        elif not self.building:
+            raise ValueError(f"Candle at {timestamp} is older than the last finalized bar")
+
+        if open == open and self.open != self.open:
+            self.open = open
+        if high == high and not high <= self.high:
+            self.high = high
+        if low == low and not low >= self.low:
+            self.low = low
+        if close == close:
+            self.close = close
+        if volume == volume:
+            self.volume += volume
+
+        if timestamp == self.label:
+            self.__finalize()
+
+    def advance(self, timestamp):
+        """
+        Finalize the bars ending at or before a time, e.g. the current time of a back test,
+        including the empty bars of bins without any candle.
+        Args:
+            timestamp (int): The time in nanoseconds since epoch.
+        """
+        if self.label is None or timestamp < self.label:
+            return
+        if self.building:
+            self.__finalize()
+        while self.label + self.freq <= timestamp:
+            self.label += self.freq
+            self.__start()
+            self.__finalize()
+
+    def partial(self):
+        """
+        Get the bar currently being built.
+        Returns:
+            dict or None: The label and OHLCV values of the bar, None if no bar is being built.
+        """
+        if not self.building:
+            return None
+        return {"time": pd.Timestamp(self.label, tz="UTC"), "open": self.open, "high": self.high,
+                "low": self.low, "close": self.close, "volume": self.volume}
+
+    def arrays(self, count=None):
+        """
+        Get the finalized bars as NumPy arrays.
+        Args:
+            count (int, optional): The number of latest bars, None for all. Defaults to None.
+        Returns:
+            dict: An int64 "timestamp" array and a float64 array per OHLCV column (views, not copies).
+        """
+        start = 0 if count is None else max(0, self.count - count)
+        arrays = {"timestamp": self.timestamps[start:self.count]}
+        for i, column in enumerate(RESAMPLER_COLUMNS):
+            arrays[column] = self.values[i, start:self.count]
+        return arrays
+
+    def to_data_frame(self, count=None, index_name=None):
+        """
+        Get the finalized bars as a DataFrame in the format of `resample`.
+        Args:
+            count (int, optional): The number of latest bars, None for all. Defaults to None.
+            index_name (str, optional): The name of the time index. Defaults to None.
+        Returns:
+            pd.DataFrame: The OHLCV bars indexed by their (tz-aware UTC) label.
+        """
+        arrays = self.arrays(count)
+        index = pd.DatetimeIndex(pd.arrays.DatetimeArray(arrays.pop("timestamp").view("M8[ns]"),
+                                                         dtype=pd.DatetimeTZDtype(tz="UTC")), name=index_name)
+        return pd.DataFrame({column: arrays[column].copy() for column in RESAMPLER_COLUMNS}, index=index)
+
+    def __start(self):
+        self.building = True
+        self.open = self.high = self.low = self.close = np.nan
+        self.volume = 0.0
+
+    def __finalize(self):
+        if self.count == len(self.timestamps):
+            self.timestamps = np.concatenate([self.timestamps, np.empty_like(self.timestamps)])
+            self.values = np.concatenate([self.values, np.empty_like(self.values)], axis=1)
+        self.timestamps[self.count] = self.label
+        self.values[:, self.count] = (self.open, self.high, self.low, self.close, self.volume)
+        self.count += 1
+        self.building = False
+
+
+class OHLCVRingBuffer:
+    """
+    Fixed-capacity window of the latest bars of a timeframe for live trading, fed with candles of a lower timeframe.
+
+    The closed bars are kept in preallocated NumPy arrays of twice the capacity, the window is moved forward
+    as bars close and copied back to the start once it reaches the end, so the arrays handed to strategies
+    are always contiguous views and closing a bar costs O(1) amortized.
+    The bar being built is updated in place from the lower timeframe candles: updates of the same candle
+    (e.g. every kline message of a websocket) replace it, a newer candle is added to the bar,
+    a candle after the end of the bar closes it. A candle passed as `closed` which ends the bar
+    (e.g. a BitMEX tradeBin, sent once its candle is over and stamped with its end time) closes it at once.
+    """
+
+    def __init__(self, rule, capacity):
+        """
+        Constructor for OHLCVRingBuffer class.
+        Args:
+            rule (str): The pandas frequency of the bars, e.g. "4H" or "15T".
+            capacity (int): The number of closed bars kept.
+        """
+        self.rule = rule
+        self.freq = to_offset(rule).nanos
+        self.capacity = capacity
+        self.timestamps = np.empty(2 * capacity, dtype=np.int64)
+        self.values = np.empty((len(RESAMPLER_COLUMNS), 2 * capacity), dtype=np.float64)
+        self.start = 0
+        self.end = 0
+        # Label (end time) of the bar being built, None before the first candle
+        self.label = None
+        # Aggregate of the finished lower timeframe candles of the bar being built
+        self.base = None
+        # Latest lower timeframe candle and its time
+        self.candle = None
+        self.candle_time = None
+        # OHLCV values of the bar being built, updated in place
+        self.partial = np.full(len(RESAMPLER_COLUMNS), np.nan)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def load(self, data_frame):
+        """
+        Fill the buffer with historical bars of the timeframe, the last one being the bar currently built.
+        Args:
+            data_frame (pd.DataFrame): The OHLCV bars indexed by their (tz-aware UTC) label.
+        """
+        timestamps = pd.DatetimeIndex(data_frame.index).as_unit("ns").asi8
+        values = np.vstack([data_frame[column].to_numpy(dtype=np.float64) for column in RESAMPLER_COLUMNS])
+        count = min(len(timestamps) - 1, self.capacity)
+        self.start = 0
+        self.end = max(count, 0)
+        if count > 0:
+            self.timestamps[:count] = timestamps[-count - 1:-1]
+            self.values[:, :count] = values[:, -count - 1:-1]
+        if len(timestamps) > 0:
+            self.label = int(timestamps[-1])
+            self.base = tuple(values[:, -1].tolist())
+            self.candle = None
+            self.candle_time = None
+            self.partial[:] = self.base
+
+    def update(self, timestamp, open, high, low, close, volume, closed=False):
+        """
+        Add or replace a candle of the lower timeframe.
+        Args:
+            timestamp (int): The time (end) of the candle in nanoseconds since epoch.
+            open (float): The open price.
+            high (float): The high price.
+            low (float): The low price.
+            close (float): The close price.
+            volume (float): The volume.
+            closed (bool, optional): True if the candle is final, the bar it ends is then closed with it.
+                Defaults to False, the bar is closed by the first candle after its end.
+        Returns:
+            bool: True if the candle closed a bar.
+        """
+        candle = (open, high, low, close, volume)
+        if self.label is None:
+            origin = timestamp - timestamp % (24 * 60 * 60 * 10 ** 9)
+            self.label = origin - ((origin - timestamp) // self.freq) * self.freq
+
+        if timestamp <= self.label:
+            if timestamp != self.candle_time:
+                self.base = self.__combine(self.base, self.candle)
+                self.candle_time = timestamp
+            self.candle = candle
+            self.partial[:] = self.__combine(self.base, candle)
+            rolled = False
+        else:
+            # close the bar, bins without any candle (e.g. while disconnected) are closed as empty bars
+            self.__push(self.label, self.__combine(self.base, self.candle) or EMPTY_BAR)
+            bins = -((self.label - timestamp) // self.freq)
+            for i in range(max(1, bins - self.capacity), bins):
+                self.__push(self.label + i * self.freq, EMPTY_BAR)
+            self.label += bins * self.freq
+            self.base = None
+            self.candle = candle
+            self.candle_time = timestamp
+            self.partial[:] = candle
+            rolled = True
+
+        if closed and timestamp == self.label:
+            # the final candle of the bar, no later candle is needed to close it
+            self.__push(self.label, self.__combine(self.base, self.candle))
+            self.label += self.freq
+            self.base = None
+            self.candle = None
+            self.candle_time = None
+            self.partial[:] = EMPTY_BAR
+            rolled = True
+        return rolled
+
+    def last_time(self):
+        """
+        Get the label of the last closed bar.
+        Returns:
+            pd.Timestamp or None: The end time of the last closed bar, None without closed bars.
+        """
+        if self.end == self.start:
+            return None
+        return pd.Timestamp(int(self.timestamps[self.end - 1]), tz="UTC")
+
+    def arrays(self):
+        """
+        Get the closed bars as read-only contiguous NumPy arrays.
+
+        The arrays are views of the buffer, they are valid until the buffer wraps around,
+        which happens at the earliest after `capacity` more bars are closed.
+
+        Returns:
+            dict: An int64 "timestamp" array and a float64 array per OHLCV column.
+        """
+        arrays = {"timestamp": self.timestamps[self.start:self.end]}
+        for i, column in enumerate(RESAMPLER_COLUMNS):
+            arrays[column] = self.values[i, self.start:self.end]
+        for array in arrays.values():
+            array.flags.writeable = False
+        return arrays
+
+    def to_data_frame(self, partial=False, index_name=None):
+        """
+        Get the closed bars as a DataFrame in the format of `resample`.
+        Args:
+            partial (bool, optional): If True, the bar being built is added as the last row. Defaults to False.
+            index_name (str, optional): The name of the time index. Defaults to None.
+        Returns:
+            pd.DataFrame: The OHLCV bars indexed by their (tz-aware UTC) label.
+        """
+        timestamps = self.timestamps[self.start:self.end]
+        values = self.values[:, self.start:self.end]
+        if partial and self.label is not None:
+            timestamps = np.append(timestamps, self.label)
+            values = np.hstack([values, self.partial.reshape(-1, 1)])
+        index = pd.DatetimeIndex(pd.arrays.DatetimeArray(timestamps.view("M8[ns]"),
+                                                         dtype=pd.DatetimeTZDtype(tz="UTC")), name=index_name)
+        return pd.DataFrame({column: values[i].copy() for i, column in enumerate(RESAMPLER_COLUMNS)}, index=index)
+
+    def __combine(self, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return (a[0] if a[0] == a[0] else b[0],
+                a[1] if b[1] != b[1] or a[1] >= b[1] else b[1],
+                a[2] if b[2] != b[2] or a[2] <= b[2] else b[2],
+                b[3] if b[3] == b[3] else a[3],
+                (a[4] if a[4] == a[4] else 0.0) + (b[4] if b[4] == b[4] else 0.0))
+
+    def __push(self, timestamp, values):
+        if self.end == len(self.timestamps):
+            keep = self.capacity - 1
+            self.timestamps[:keep] = self.timestamps[self.end - keep:self.end]
+            self.values[:, :keep] = self.values[:, self.end - keep:self.end]
+            self.start = 0
+            self.end = keep
+        self.timestamps[self.end] = timestamp
+        self.values[:, self.end] = values
+        self.end += 1
+        if self.end - self.start > self.capacity:
+            self.start += 1
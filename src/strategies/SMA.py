@@ -34,12 +34,19 @@ class SMA(Bot):
             'slow_len': hp.quniform('slow_len', 1, 30, 1),
         }
 
-    def strategy(self, action, open, close, high, low, volume):
-        lot = self.exchange.get_lot()
+    def indicators(self):
         fast_len = self.input('fast_len', int, 9)
         slow_len = self.input('slow_len', int, 27)
-        fast_sma = sma(close, fast_len)
-        slow_sma = sma(close, slow_len)
+        # computed once over the whole history in back tests
+        return {
+            'fast_sma': lambda open, close, high, low, volume: sma(close, fast_len),
+            'slow_sma': lambda open, close, high, low, volume: sma(close, slow_len),
+        }
+
+    def strategy(self, action, open, close, high, low, volume):
+        lot = self.exchange.get_lot()
+        fast_sma = self.indicator('fast_sma')
+        slow_sma = self.indicator('slow_sma')
         golden_cross = crossover(fast_sma, slow_sma)
         dead_cross = crossunder(fast_sma, slow_sma)
 
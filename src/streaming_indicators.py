@@ -0,0 +1,384 @@
+# coding: UTF-8
+
+import abc
+import math
+from collections import deque
+
+import numpy as np
+
+
+#############            Streaming Indicators            ###################################################################
+############################################################################################################################
+#
+# Stateful indicators updated with one bar at a time in O(1), instead of recomputing the whole ohlcv window on every bar.
+# Once the lookback period is filled the values are the same as the last values of the TA-Lib functions
+# of src/indicators.py over the same data (up to floating point rounding), before that they are NaN.
+#
+#   rsi = RSI(14)
+#   rsi.update_many(close[:-1])      # warmup with the history, e.g. on the first call of the strategy
+#   value = rsi.update(close[-1])    # then one update per closed bar
+
+
+class StreamingIndicator(abc.ABC):
+    """
+    Base class of the streaming indicators.
+
+    Attributes:
+        value: The latest value, NaN (or a tuple of NaN) until `ready`.
+        count (int): The number of updates so far.
+        lookback (int): The number of updates before the first value, as the lookback of the TA-Lib function.
+    """
+    lookback = 0
+
+    def __init__(self):
+        self.value = np.nan
+        self.count = 0
+
+    @property
+    def ready(self):
+        """
+        Whether the lookback period is filled and `value` is valid.
+        """
+        return self.count > self.lookback
+
+    @abc.abstractmethod
+    def update(self, *values):
+        """
+        Update the indicator with the values of a new bar.
+        Returns:
+            The latest value of the indicator.
+        """
+
+    def update_many(self, *sources):
+        """
+        Update the indicator with the values of several bars, e.g. to warm it up with historical data.
+        Args:
+            *sources (list or ndarray): The arrays of values, in the same order as the arguments of `update`.
+        Returns:
+            The latest value of the indicator.
+        """
+        for values in zip(*sources):
+            self.update(*values)
+        return self.value
+
+
+class _Window:
+    """
+    Fixed size window of the latest values with their running sum (and sum of squares).
+    The sums are recomputed from the window once per `period` updates so rounding errors do not accumulate.
+    """
+
+    def __init__(self, period, squares=False):
+        self.period = period
+        self.squares = squares
+        self.values = [0.0] * period
+        self.index = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+
+    def add(self, value):
+        old = self.values[self.index]
+        self.values[self.index] = value
+        self.index += 1
+        if self.index == self.period:
+            self.index = 0
+        if self.count < self.period:
+            self.count += 1
+            self.sum += value
+            if self.squares:
+                self.sum_squares += value * value
+        elif self.index == 0:
+            self.sum = math.fsum(self.values)
+            if self.squares:
+                self.sum_squares = math.fsum(v * v for v in self.values)
+        else:
+            self.sum += value - old
+            if self.squares:
+                self.sum_squares += value * value - old * old
+
+    @property
+    def full(self):
+        return self.count == self.period
+
+
+class SMA(StreamingIndicator):
+    """
+    Simple Moving Average, same as `sma()` and talib.SMA.
+    """
+
+    def __init__(self, period):
+        """
+        Initialize the SMA indicator.
+        Args:
+            period (int): The number of bars averaged.
+        """
+        super().__init__()
+        self.period = period
+        self.lookback = period - 1
+        self.window = _Window(period)
+
+    def update(self, value):
+        self.count += 1
+        self.window.add(value)
+        if self.window.full:
+            self.value = self.window.sum / self.period
+        return self.value
+
+
+class EMA(StreamingIndicator):
+    """
+    Exponential Moving Average, same as `ema()` and talib.EMA: seeded with the SMA of the first `period` values.
+    """
+
+    def __init__(self, period):
+        """
+        Initialize the EMA indicator.
+        Args:
+            period (int): The period of the EMA, the smoothing factor is 2 / (period + 1).
+        """
+        super().__init__()
+        self.period = period
+        self.lookback = period - 1
+        self.k = 2 / (period + 1)
+        self.seed = 0.0
+
+    def update(self, value):
+        self.count += 1
+        if self.count < self.period:
+            self.seed += value
+        elif self.count == self.period:
+            self.value = (self.seed + value) / self.period
+        else:
+            self.value += (value - self.value) * self.k
+        return self.value
+
+
+class ATR(StreamingIndicator):
+    """
+    Average True Range, same as `atr()` and talib.ATR: Wilder's smoothing of the true range
+    seeded with the average of the first `period` true ranges.
+    """
+
+    def __init__(self, period):
+        """
+        Initialize the ATR indicator.
+        Args:
+            period (int): The period of the ATR.
+        """
+        super().__init__()
+        self.period = period
+        self.lookback = period
+        self.prev_close = None
+        self.seed = 0.0
+
+    def update(self, high, low, close):
+        self.count += 1
+        prev_close = self.prev_close
+        self.prev_close = close
+        if prev_close is None:
+            return self.value
+        true_range = max(high, prev_close) - min(low, prev_close)
+        if self.count <= self.period + 1:
+            self.seed += true_range
+            if self.count == self.period + 1:
+                self.value = self.seed / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class RSI(StreamingIndicator):
+    """
+    Relative Strength Index, same as `rsi()` and talib.RSI: Wilder's smoothing of the gains and losses
+    seeded with their average over the first `period` changes.
+    """
+
+    def __init__(self, period=14):
+        """
+        Initialize the RSI indicator.
+        Args:
+            period (int, optional): The period of the RSI. Defaults to 14.
+        """
+        super().__init__()
+        self.period = period
+        self.lookback = period
+        self.prev = None
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def update(self, value):
+        self.count += 1
+        prev = self.prev
+        self.prev = value
+        if prev is None:
+            return self.value
+        change = value - prev
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if self.count <= self.period + 1:
+            self.gain += gain
+            self.loss += loss
+            if self.count < self.period + 1:
+                return self.value
+            self.gain /= self.period
+            self.loss /= self.period
+        else:
+            self.gain = (self.gain * (self.period - 1) + gain) / self.period
+            self.loss = (self.loss * (self.period - 1) + loss) / self.period
+        total = self.gain + self.loss
+        self.value = 100 * self.gain / total if total != 0 else 0.0
+        return self.value
+
+
+class Highest(StreamingIndicator):
+    """
+    Highest value of the last `period` values, same as `highest()` and talib.MAX.
+    Kept with a monotonic queue, so each update is O(1) amortized.
+    """
+
+    def __init__(self, period):
+        """
+        Initialize the Highest indicator.
+        Args:
+            period (int): The number of bars.
+        """
+        super().__init__()
+        self.period = period
+        self.lookback = period - 1
+        self.queue = deque()
+
+    def _dominates(self, a, b):
+        return a >= b
+
+    def update(self, value):
+        queue = self.queue
+        while queue and self._dominates(value, queue[-1][1]):
+            queue.pop()
+        queue.append((self.count, value))
+        self.count += 1
+        if queue[0][0] <= self.count - 1 - self.period:
+            queue.popleft()
+        if self.count >= self.period:
+            self.value = queue[0][1]
+        return self.value
+
+
+class Lowest(Highest):
+    """
+    Lowest value of the last `period` values, same as `lowest()` and talib.MIN.
+    """
+
+    def _dominates(self, a, b):
+        return a <= b
+
+
+class StdDev(StreamingIndicator):
+    """
+    Standard deviation of the last `period` values, same as `stddev()` and talib.STDDEV (population standard deviation).
+    """
+
+    def __init__(self, period, nbdev=1):
+        """
+        Initialize the StdDev indicator.
+        Args:
+            period (int): The number of bars.
+            nbdev (float, optional): The multiplier of the standard deviation. Defaults to 1.
+        """
+        super().__init__()
+        self.period = period
+        self.nbdev = nbdev
+        self.lookback = period - 1
+        self.window = _Window(period, squares=True)
+
+    def update(self, value):
+        self.count += 1
+        self.window.add(value)
+        if self.window.full:
+            self.value = _stddev(self.window) * self.nbdev
+        return self.value
+
+
+class BBands(StreamingIndicator):
+    """
+    Bollinger Bands with a simple moving average, same as `bbands()` and talib.BBANDS with matype 0.
+    The value is the tuple (upper, middle, lower).
+    """
+
+    def __init__(self, period=5, nbdevup=2, nbdevdn=2):
+        """
+        Initialize the BBands indicator.
+        Args:
+            period (int, optional): The number of bars. Defaults to 5.
+            nbdevup (float, optional): The standard deviations of the upper band. Defaults to 2.
+            nbdevdn (float, optional): The standard deviations of the lower band. Defaults to 2.
+        """
+        super().__init__()
+        self.period = period
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self.lookback = period - 1
+        self.window = _Window(period, squares=True)
+        self.value = (np.nan, np.nan, np.nan)
+
+    def update(self, value):
+        self.count += 1
+        self.window.add(value)
+        if self.window.full:
+            middle = self.window.sum / self.period
+            stddev = _stddev(self.window)
+            self.value = (middle + self.nbdevup * stddev, middle, middle - self.nbdevdn * stddev)
+        return self.value
+
+
+class MACD(StreamingIndicator):
+    """
+    Moving Average Convergence Divergence, same as `macd()` and talib.MACD.
+    The value is the tuple (macd, signal, histogram).
+
+    Like TA-Lib the fast EMA is seeded at the same bar as the slow EMA, with the average of the last `fastperiod` values,
+    and all three values are NaN until the signal line is seeded.
+    """
+
+    def __init__(self, fastperiod=12, slowperiod=26, signalperiod=9):
+        """
+        Initialize the MACD indicator.
+        Args:
+            fastperiod (int, optional): The period of the fast EMA. Defaults to 12.
+            slowperiod (int, optional): The period of the slow EMA. Defaults to 26.
+            signalperiod (int, optional): The period of the signal EMA. Defaults to 9.
+        """
+        super().__init__()
+        if slowperiod < fastperiod:
+            fastperiod, slowperiod = slowperiod, fastperiod
+        self.lookback = slowperiod - 1 + signalperiod - 1
+        self.slow = EMA(slowperiod)
+        self.fast = EMA(fastperiod)
+        self.fast_seed = SMA(fastperiod)
+        self.signal = EMA(signalperiod)
+        self.value = (np.nan, np.nan, np.nan)
+
+    def update(self, value):
+        self.count += 1
+        slow = self.slow.update(value)
+        if not self.slow.ready:
+            self.fast_seed.update(value)
+            return self.value
+        if not self.fast.ready:
+            # seed the fast EMA with the average of the last fast period values
+            self.fast.value = self.fast_seed.update(value)
+            self.fast.count = self.fast.period
+        else:
+            self.fast.update(value)
+        macd = self.fast.value - slow
+        signal = self.signal.update(macd)
+        if self.signal.ready:
+            self.value = (macd, signal, macd - signal)
+        return self.value
+
+
+def _stddev(window):
+    mean = window.sum / window.period
+    variance = window.sum_squares / window.period - mean * mean
+    # TA-Lib treats variances below 1e-8 as zero
+    return math.sqrt(variance) if variance >= 0.00000001 else 0.0
@@ -0,0 +1,128 @@
+# coding: UTF-8
+
+import numpy as np
+import pandas as pd
+
+TRADE_JOURNAL_COLUMNS = ["time", "type", "id", "price", "quantity", "av_price", "position", "pnl", "balance", "drawdown"]
+TRADE_JOURNAL_DTYPES = {"time": np.int64, "type": object, "id": object, "price": np.float64,
+                        "quantity": np.float64, "av_price": np.float64, "position": np.float64, "pnl": np.float64,
+                        "balance": np.float64, "drawdown": np.float64}
+
+
+class TradeJournal:
+    """
+    Trade log of the stub (paper trading and back tests), written to the order log CSV file (orders.csv).
+
+    Fills are appended as rows of preallocated typed column arrays (int64 nanoseconds for the time,
+    float64 for the numbers with NaN for no pnl, objects only for the type and the id),
+    and formatted and written to the file in bulk once `buffer_size` rows are pending (and on `flush`/`close`),
+    so a back test does not pay a formatted write and a flush per fill.
+    The file is the same, byte for byte, as when every row is written right away.
+    With `keep_rows` all rows are kept and can be exported with `to_data_frame` or `to_parquet`,
+    otherwise (paper trading) the rows are dropped once written and the arrays are reused.
+    """
+
+    def __init__(self, path, buffer_size=1, capacity=1024, keep_rows=True):
+        """
+        Constructor for TradeJournal class.
+        Args:
+            path (str): The path of the CSV file, it is overwritten.
+            buffer_size (int, optional): The number of rows written at once, 1 writes every row right away. Defaults to 1.
+            capacity (int, optional): The initial number of rows the column arrays can hold,
+                the arrays grow as needed. Defaults to 1024.
+            keep_rows (bool, optional): Keep the rows written to the file for `to_data_frame`. Defaults to True.
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.keep_rows = keep_rows
+        self.columns = {column: np.empty(capacity, dtype=TRADE_JOURNAL_DTYPES[column])
+                        for column in TRADE_JOURNAL_COLUMNS}
+        self.count = 0
+        # Number of rows written to the file
+        self.written = 0
+        self.file = open(path, "w")
+        self.file.write(",".join(TRADE_JOURNAL_COLUMNS) + "\n")
+        self.file.flush()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, time, type, id, price, quantity, av_price, position, pnl, balance, drawdown):
+        """
+        Add a fill.
+        Args:
+            time (str): The time of the fill, e.g. "2021-01-01 00:15:00+00:00" (UTC when there is no offset).
+            type (str): "BUY" or "SELL".
+            id (str): The order id, "Close" or "Reversal".
+            price (float): The fill price.
+            quantity (float): The signed quantity of the fill.
+            av_price (float): The average price of the position.
+            position (float): The position size after the fill.
+            pnl (float): The profit of the fill, None if it does not close a position.
+            balance (float): The balance after the fill.
+            drawdown (float): The drawdown from the balance all time high in percentage.
+        """
+        if self.count == len(self.columns["time"]):
+            for column, values in self.columns.items():
+                self.columns[column] = np.concatenate([values, np.empty_like(values)])
+        i = self.count
+        columns = self.columns
+        columns["time"][i] = pd.Timestamp(time).value
+        columns["type"][i] = type
+        columns["id"][i] = id
+        columns["price"][i] = price
+        columns["quantity"][i] = quantity
+        columns["av_price"][i] = av_price
+        columns["position"][i] = position
+        columns["pnl"][i] = np.nan if pnl is None else pnl
+        columns["balance"][i] = balance
+        columns["drawdown"][i] = drawdown
+        self.count += 1
+
+        if self.count - self.written >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the pending rows to the CSV file.
+        """
+        if self.written == self.count or self.file.closed:
+            return
+        rows = slice(self.written, self.count)
+        times = pd.to_datetime(self.columns["time"][rows], utc=True).astype(str)
+        self.file.write("".join(
+            f"{time},{type},{id},{price},{quantity},{av_price},{position},"
+            f"{'-' if pnl != pnl else format(pnl, '.2f')},{balance:.2f},{drawdown:.2f}\n"
+            for time, type, id, price, quantity, av_price, position, pnl, balance, drawdown
+            in zip(times, *(self.columns[column][rows].tolist() for column in TRADE_JOURNAL_COLUMNS[1:]))))
+        self.file.flush()
+        if self.keep_rows:
+            self.written = self.count
+        else:
+            self.count = self.written = 0
+
+    def close(self):
+        """
+        Write the pending rows and close the CSV file.
+        """
+        self.flush()
+        self.file.close()
+
+    def to_data_frame(self):
+        """
+        Get the rows as a DataFrame, all of them with `keep_rows`, else the ones not written yet.
+        Returns:
+            pd.DataFrame: The rows with a UTC datetime time column and float price, quantity, av_price, position,
+                pnl (NaN for the entries), balance and drawdown columns.
+        """
+        data_frame = pd.DataFrame({column: values[:self.count] for column, values in self.columns.items()})
+        data_frame["time"] = pd.to_datetime(data_frame["time"], utc=True)
+        return data_frame
+
+    def to_parquet(self, path):
+        """
+        Write all the rows to a Parquet file (needs pyarrow or fastparquet).
+        Args:
+            path (str): The path of the Parquet file.
+        """
+        self.to_data_frame().to_parquet(path, index=False)
@@ -0,0 +1,325 @@
+# coding: UTF-8
+
+import numpy as np
+
+
+#############            Vectorized Back Test            ###################################################################
+############################################################################################################################
+#
+# Back test of stateless strategies whose entries and exits only depend on the bars, given as boolean signal arrays.
+# The bars between two trades are never visited one by one: the next signal is found with a binary search
+# and the stop loss / take profit of an open position with a vectorized scan of the bars up to that signal,
+# so the cost grows with the number of trades and not with the number of bars.
+# The fills and the accounting are the same as the event-driven back test (`Stub.commit`) of a strategy calling
+#
+#   self.exchange.sltp(profit_long=..., profit_short=..., stop_long=..., stop_short=...)
+#   if long_exit: self.exchange.close_all()       # only when long
+#   if short_exit: self.exchange.close_all()      # only when short
+#   if long_entry: self.exchange.entry("Long", True, qty)
+#   if short_entry: self.exchange.entry("Short", False, qty)
+#
+# with market orders filled at the close of the bar, so it can pre-screen parameters before the full back test.
+# Limit, stop and pyramiding orders, trailing stops and `eval_tp_next_candle` need the event-driven back test.
+
+
+def exchange_settings(exchange):
+    """
+    Get the account settings of an exchange (e.g. a back test) for `vectorized_backtest`.
+    Args:
+        exchange: The exchange, e.g. an instance of BinanceFuturesBackTest.
+    Returns:
+        dict: The balance, leverage, commission, qty_in_usdt, asset_rounding and quote_rounding keyword arguments.
+    """
+    return {
+        "balance": exchange.get_balance(),
+        "leverage": exchange.get_leverage(),
+        "commission": exchange.get_commission(),
+        "qty_in_usdt": exchange.qty_in_usdt,
+        "asset_rounding": getattr(exchange, "asset_rounding", None),
+        "quote_rounding": getattr(exchange, "quote_rounding", None)
+    }
+
+
+def vectorized_backtest(
+    close,
+    high,
+    low,
+    long_entries,
+    long_exits=None,
+    short_entries=None,
+    short_exits=None,
+    qty=None,
+    profit_long=0,
+    profit_short=0,
+    stop_long=0,
+    stop_short=0,
+    start=0,
+    balance=1000,
+    leverage=1,
+    commission=0.0,
+    qty_in_usdt=False,
+    asset_rounding=None,
+    quote_rounding=None,
+    close_at_end=True
+):
+    """
+    Back test entry and exit signals with market orders and a simple stop loss / take profit.
+
+    On every bar from `start`, in the order of the event-driven back test: the stop loss and take profit
+    of the open position are evaluated with the high and low of the bar (the stop loss first, at the stop price),
+    then the exit and the entry signals of the bar are filled at its close.
+    An entry in the opposite direction of the position reverses it.
+
+    Args:
+        close (ndarray): The close prices.
+        high (ndarray): The high prices.
+        low (ndarray): The low prices.
+        long_entries (ndarray): Boolean array, True on the bars entering a long position.
+        long_exits (ndarray, optional): Boolean array, True on the bars closing a long position. Defaults to None.
+        short_entries (ndarray, optional): Boolean array, True on the bars entering a short position. Defaults to None.
+        short_exits (ndarray, optional): Boolean array, True on the bars closing a short position. Defaults to None.
+        qty (float, optional): The quantity of the entries, None for the lot of the stub
+            (balance * leverage / price). Defaults to None.
+        profit_long (float, optional): Take profit of long positions in percentage, as `sltp()`. Defaults to 0.
+        profit_short (float, optional): Take profit of short positions in percentage. Defaults to 0.
+        stop_long (float, optional): Stop loss of long positions in percentage. Defaults to 0.
+        stop_short (float, optional): Stop loss of short positions in percentage. Defaults to 0.
+        start (int, optional): The first bar evaluated, e.g. the warmup length. Defaults to 0.
+        balance (float, optional): The initial balance. Defaults to 1000.
+        leverage (float, optional): The leverage of the lot. Defaults to 1.
+        commission (float, optional): The commission rate charged when closing positions, as `get_commission()`.
+            Defaults to 0.0.
+        qty_in_usdt (bool, optional): True if the quantities are in quote currency. Defaults to False.
+        asset_rounding (int, optional): The decimals of the entry quantities, None for no rounding. Defaults to None.
+        quote_rounding (int, optional): The decimals of the stop loss and take profit prices,
+            None for no rounding. Defaults to None.
+        close_at_end (bool, optional): If True, the position left is closed at the last close. Defaults to True.
+    Returns:
+        dict: The per bar "balance", "equity" (balance with the unrealised profit at the close)
+            and "position" arrays, the "trades" as a dict of arrays (entry_index, exit_index, long, qty,
+            entry_price, exit_price, profit) and the statistics of the stub account (final balance, order_count,
+            win_count, lose_count, win_profit, lose_loss, max_draw_down, max_draw_down_session,
+            max_draw_down_session_perc).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    n = len(close)
+    long_entries = _signal(long_entries, n, start)
+    long_exits = _signal(long_exits, n, start)
+    short_entries = _signal(short_entries, n, start)
+    short_exits = _signal(short_exits, n, start)
+
+    # bars that can open a position, close a long one and close a short one
+    entry_bars = np.flatnonzero(long_entries | short_entries)
+    long_close_bars = np.flatnonzero(long_exits | short_entries)
+    short_close_bars = np.flatnonzero(short_exits | long_entries)
+
+    account = _Account(balance, leverage, commission, qty_in_usdt)
+
+    def on_bar(i):
+        # the strategy of the bar: exits first, then entries at the close
+        price = close[i]
+        if long_exits[i] and account.position_size > 0:
+            account.close(i, price)
+        if short_exits[i] and account.position_size < 0:
+            account.close(i, price)
+        for long in (True, False):
+            if not (long_entries[i] if long else short_entries[i]):
+                continue
+            position_size = account.position_size
+            if (long and position_size > 0) or (not long and position_size < 0):
+                continue
+            lot = account.balance * leverage / price if qty is None else qty
+            ord_qty = lot + abs(position_size)
+            if asset_rounding is not None:
+                ord_qty = round(ord_qty, asset_rounding)
+            account.commit(i, long, ord_qty, price)
+
+    i = start
+    while i < n:
+        position_size = account.position_size
+        if position_size == 0:
+            j = _next(entry_bars, i)
+            if j is None:
+                break
+            on_bar(j)
+            i = j + 1
+            continue
+
+        long = position_size > 0
+        j = _next(long_close_bars if long else short_close_bars, i)
+        end = n if j is None else j + 1
+
+        # first bar up to the next signal hitting the stop loss or the take profit
+        avg_price = account.position_avg_price
+        stop = (stop_long if long else stop_short) / 100
+        profit = (profit_long if long else profit_short) / 100
+        if stop > 0 or profit > 0:
+            sign = 1 if long else -1
+            stop_price = _round(avg_price - sign * avg_price * stop, quote_rounding)
+            profit_price = _round(avg_price + sign * avg_price * profit, quote_rounding)
+            stop_low, profit_high = (low, high) if long else (-high, -low)
+            stop_hit = stop_low[i:end] <= sign * stop_price if stop > 0 else np.zeros(end - i, dtype=bool)
+            profit_hit = profit_high[i:end] >= sign * profit_price if profit > 0 else np.zeros(end - i, dtype=bool)
+            hits = stop_hit | profit_hit
+            if hits.any():
+                k = int(np.argmax(hits))
+                account.close(i + k, stop_price if stop_hit[k] else profit_price)
+                on_bar(i + k)
+                i = i + k + 1
+                continue
+
+        if j is None:
+            break
+        on_bar(j)
+        i = j + 1
+
+    if close_at_end and account.position_size != 0 and n > 0:
+        account.close(n - 1, close[-1])
+
+    return account.result(close, qty_in_usdt)
+
+
+def _signal(signal, n, start):
+    if signal is None:
+        return np.zeros(n, dtype=bool)
+    signal = np.array(signal, dtype=bool)
+    if len(signal) != n:
+        raise ValueError(f"Signal length {len(signal)} does not match the {n} bars")
+    signal[:start] = False
+    return signal
+
+
+def _next(bars, i):
+    index = np.searchsorted(bars, i)
+    return int(bars[index]) if index < len(bars) else None
+
+
+def _round(price, decimals):
+    return price if decimals is None else round(price, decimals)
+
+
+class _Account:
+    """
+    Position and balance of the stub account, updated like `Stub.commit`.
+    """
+
+    def __init__(self, balance, leverage, commission, qty_in_usdt):
+        self.start_balance = balance
+        self.balance = balance
+        self.leverage = leverage
+        self.commission = commission
+        self.qty_in_usdt = qty_in_usdt
+        self.balance_ath = balance
+        self.position_size = 0
+        self.position_avg_price = 0
+        self.order_count = 0
+        self.win_count = 0
+        self.lose_count = 0
+        self.win_profit = 0
+        self.lose_loss = 0
+        self.max_draw_down = 0
+        self.max_draw_down_session = 0
+        self.max_draw_down_session_perc = 0
+        # (bar, balance, position size, average price) after each order
+        self.events = []
+        self.trades = []
+        self.entry_index = None
+
+    def close(self, index, price):
+        self.commit(index, self.position_size < 0, abs(self.position_size), price)
+
+    def commit(self, index, long, qty, price):
+        self.order_count += 1
+        position_size = self.position_size
+        order_qty = qty if long else -qty
+
+        if position_size * order_qty > 0 or abs(order_qty) > abs(position_size):
+            next_qty = position_size + order_qty
+        else:
+            next_qty = 0
+
+        if (position_size > 0 >= order_qty) or (position_size < 0 < order_qty):
+            avg_price = self.position_avg_price
+            closing_qty = -order_qty if abs(order_qty) < abs(position_size) else position_size
+            if position_size >= 0:
+                close_rate = ((price - avg_price) / avg_price) - self.commission
+            else:
+                close_rate = ((avg_price - price) / avg_price) - self.commission
+
+            profit = abs(closing_qty) * close_rate * (1 if self.qty_in_usdt else avg_price)
+
+            if profit > 0:
+                self.win_profit += profit
+                self.win_count += 1
+            else:
+                self.lose_loss += -1 * profit
+                self.lose_count += 1
+                if close_rate * self.leverage < self.max_draw_down:
+                    self.max_draw_down = close_rate * self.leverage
+
+            self.balance += profit
+
+            if self.balance_ath < self.balance:
+                self.balance_ath = self.balance
+            if self.balance_ath > self.balance:
+                draw_down_perc = (self.balance_ath - self.balance) / self.balance_ath * 100
+                if self.max_draw_down_session == 0 or self.max_draw_down_session_perc < draw_down_perc:
+                    self.max_draw_down_session = self.balance_ath - self.balance
+                    self.max_draw_down_session_perc = draw_down_perc
+
+            self.trades.append((self.entry_index, index, position_size > 0, abs(closing_qty),
+                                avg_price, price, profit))
+            self.position_size = position_size + order_qty
+
+        if next_qty != 0:
+            if long and 0 < self.position_size < next_qty:
+                self.position_avg_price = (self.position_avg_price * self.position_size + price * qty) / next_qty
+            elif not long and 0 > self.position_size > next_qty:
+                self.position_avg_price = (self.position_avg_price * self.position_size - price * qty) / next_qty
+            else:
+                self.position_avg_price = price
+            self.position_size = next_qty
+            self.entry_index = index
+
+        self.events.append((index, self.balance, self.position_size, self.position_avg_price))
+
+    def result(self, close, qty_in_usdt):
+        n = len(close)
+        events = np.array(self.events, dtype=np.float64).reshape(-1, 4)
+        # state of the last order at or before each bar
+        last = np.searchsorted(events[:, 0], np.arange(n), side="right") - 1
+        events = np.vstack([[-1, self.start_balance, 0.0, np.nan], events])[last + 1]
+        balance = events[:, 1]
+        position = events[:, 2]
+        avg_price = np.where(position != 0, events[:, 3], np.nan)
+
+        with np.errstate(invalid="ignore"):
+            unrealised = position * (close - avg_price) / avg_price * (1 if qty_in_usdt else avg_price)
+        equity = balance + np.where(position != 0, unrealised, 0.0)
+
+        trades = np.array(self.trades, dtype=np.float64).reshape(-1, 7)
+        return {
+            "balance": balance,
+            "equity": equity,
+            "position": position,
+            "trades": {
+                "entry_index": trades[:, 0].astype(np.int64),
+                "exit_index": trades[:, 1].astype(np.int64),
+                "long": trades[:, 2].astype(bool),
+                "qty": trades[:, 3],
+                "entry_price": trades[:, 4],
+                "exit_price": trades[:, 5],
+                "profit": trades[:, 6]
+            },
+            "final_balance": self.balance,
+            "order_count": self.order_count,
+            "win_count": self.win_count,
+            "lose_count": self.lose_count,
+            "win_profit": self.win_profit,
+            "lose_loss": self.lose_loss,
+            "max_draw_down": self.max_draw_down,
+            "max_draw_down_session": self.max_draw_down_session,
+            "max_draw_down_session_perc": self.max_draw_down_session_perc
+        }
@@ -0,0 +1,160 @@
+# coding: UTF-8
+
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.config import config as conf
+from src.exchange.binance_futures.binance_futures_backtest import BinanceFuturesBackTest
+from src.exchange.binance_futures.binance_futures_stub import BinanceFuturesStub
+from src.indicators import crossover, crossunder, sma
+
+
+def ohlcv(length, freq):
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, length)))
+    open = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({"time": pd.date_range("2021-01-01", periods=length, freq=freq, tz="UTC").astype(str),
+                         "open": open,
+                         "high": np.maximum(open, close) * (1 + rng.random(length) * 0.002),
+                         "low": np.minimum(open, close) * (1 - rng.random(length) * 0.002),
+                         "close": close,
+                         "volume": rng.random(length) * 10})
+
+
+class BackTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        args = Namespace(order_log=os.path.join(directory.name, "orders.csv"), from_date="epoch", to_date="now",
+                         html_report=False)
+        patcher = mock.patch.dict(conf, {"args": args})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestBackTestHistory(BackTestCase):
+
+    def run_backtest(self, data, bin_size, minute_granularity, array_mode, timeframes_sorted=True):
+        exchange = BinanceFuturesBackTest(account="binanceaccount1", pair="BTCUSDT")
+        exchange.enable_trade_log = False
+        exchange.asset_rounding = 3
+        exchange.quote_rounding = 2
+        exchange.ohlcv_len = 20
+        exchange.array_mode = array_mode
+        exchange.minute_granularity = minute_granularity
+        exchange.timeframes_sorted = timeframes_sorted
+        exchange.bin_size = bin_size
+        exchange.warmup_tf = bin_size[0]
+        exchange.df_ohlcv = data
+
+        # profit and session max drawdown at the end of every bar, after the strategies of all its timeframes
+        bars = {}
+
+        def strategy(action, open, close, high, low, volume):
+            if action == bin_size[-1]:
+                fast = sma(close, 3)
+                slow = sma(close, 10)
+                exchange.sltp(profit_long=1.0, profit_short=1.0, stop_long=0.5, stop_short=0.5)
+                if crossover(fast, slow):
+                    exchange.entry("Long", True, exchange.get_lot())
+                if crossunder(fast, slow):
+                    exchange.entry("Short", False, exchange.get_lot())
+            bars[exchange.bar_time] = (exchange.get_balance() - exchange.start_balance,
+                                       exchange.max_draw_down_session_perc)
+
+        # the OHLCV data is set above, only the strategy of the back test is set (no download)
+        BinanceFuturesStub.on_update(exchange, bin_size, strategy)
+        exchange.crawler_run()
+        exchange.order_log.close()
+        return exchange, np.array(list(bars.values()))
+
+    def assert_history(self, exchange, bars):
+        self.assertGreater(exchange.order_count, 10)
+        self.assertGreater(exchange.max_draw_down_session_perc, 0)
+        # one record per bar: the warmup bars, then every bar before its strategies,
+        # which is the profit and drawdown at the end of the previous bar
+        self.assertEqual(len(exchange.balance_history), len(exchange.df_ohlcv))
+        self.assertEqual(len(exchange.draw_down_history), len(exchange.df_ohlcv))
+        self.assertEqual(exchange.history_len, len(exchange.df_ohlcv))
+        warmup = len(exchange.df_ohlcv) - len(bars)
+        np.testing.assert_array_equal(exchange.balance_history[:warmup + 1], 0)
+        np.testing.assert_array_equal(exchange.draw_down_history[:warmup + 1], 0)
+        np.testing.assert_array_equal(exchange.balance_history[warmup + 1:], bars[:-1, 0])
+        np.testing.assert_array_equal(exchange.draw_down_history[warmup + 1:], bars[:-1, 1])
+
+    def test_history_of_every_bar(self):
+        for array_mode in [False, True]:
+            with self.subTest(array_mode=array_mode):
+                exchange, bars = self.run_backtest(ohlcv(1000, "15min"), ["15m"], False, array_mode)
+                self.assertEqual(len(bars), 1000 - 20)
+                self.assert_history(exchange, bars)
+
+    def test_history_of_multiple_timeframes(self):
+        for array_mode in [False, True]:
+            with self.subTest(array_mode=array_mode):
+                # the strategy runs for 1m, 5m and 15m on the same bars, the history is recorded once per bar,
+                # before the 1m strategy (lower timeframe first so it is the end of the previous bar)
+                exchange, bars = self.run_backtest(ohlcv(3000, "1min"), ["15m", "5m", "1m"], True, array_mode,
+                                                   timeframes_sorted=False)
+                self.assert_history(exchange, bars)
+
+
+class TestBackTestOHLCVStore(BackTestCase):
+
+    def test_update_appends_closed_candles(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        exchange = BinanceFuturesBackTest(account="binanceaccount1", pair="BTCUSDT")
+        exchange.OHLC_DIRNAME = os.path.join(directory.name, "store")
+        exchange.OHLC_FILENAME = os.path.join(directory.name, "data.csv")
+        exchange.update_data = True
+        exchange.ohlcv_mmap = False
+        data = ohlcv(30, "1min").set_index("time")
+        data.index = pd.to_datetime(data.index, utc=True)
+
+        def download_data(bin_size, start_time, end_time):
+            return data[(data.index >= start_time) & (data.index <= end_time + pd.Timedelta(minutes=1))]
+
+        with mock.patch.object(exchange, "download_data", download_data):
+            # the candle closing after the end of the download is still open and not stored
+            exchange._BackTest__load_ohlcv_store(["1m"], data.index[0], data.index[19])
+            self.assertEqual(exchange.df_ohlcv.index[-1], data.index[19])
+            exchange._BackTest__load_ohlcv_store(["1m"], data.index[0], data.index[-1])
+
+        store_files = os.listdir(exchange.OHLC_DIRNAME)
+        self.assertEqual([name for name in store_files if name.startswith("gen")], ["gen1"])
+        self.assertTrue((exchange.df_ohlcv.index == data.index).all())
+        self.assertTrue((exchange.df_ohlcv["close"].values == data["close"].values).all())
+
+    def test_oldest_data_is_only_searched_for_on_the_first_download(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        exchange = BinanceFuturesBackTest(account="binanceaccount1", pair="BTCUSDT")
+        exchange.OHLC_DIRNAME = os.path.join(directory.name, "store")
+        exchange.OHLC_FILENAME = os.path.join(directory.name, "data.csv")
+        exchange.minute_granularity = False
+        data = ohlcv(30, "1h").set_index("time")
+        data.index = pd.to_datetime(data.index, utc=True)
+        start_time, end_time = data.index[0] - pd.Timedelta(days=20), data.index[-1]
+        fetches = []
+
+        def fetch_ohlcv(bin_size, start_time, end_time):
+            fetches.append(start_time)
+            return data[(data.index >= start_time) & (data.index <= end_time)]
+
+        with mock.patch.object(exchange, "fetch_ohlcv", fetch_ohlcv), mock.patch("time.sleep"):
+            # nothing listed 20 days before the data, found after two 10 days steps
+            self.assertEqual(len(exchange.download_data(["1h"], start_time, end_time)), 30)
+            self.assertEqual(fetches, [start_time, start_time + pd.Timedelta(days=10), data.index[0], data.index[0]])
+
+            fetches.clear()
+            exchange.save_csv(data, exchange.OHLC_FILENAME)
+            self.assertEqual(len(exchange.download_data(["1h"], data.index[10], end_time)), 20)
+            self.assertEqual(fetches, [data.index[10]])
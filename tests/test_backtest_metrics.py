@@ -0,0 +1,59 @@
+# coding: UTF-8
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.backtest_metrics import equity_metrics, periods_per_year, rolling_metrics, trade_metrics
+
+
+class TestBacktestMetrics(unittest.TestCase):
+
+    def test_equity_metrics(self):
+        equity = np.array([100.0, 110.0, 99.0, 99.0, 105.0, 121.0, 115.0])
+        metrics = equity_metrics(equity)
+
+        returns = np.diff(equity) / equity[:-1]
+        downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        self.assertAlmostEqual(metrics["total_return"], 15.0)
+        self.assertAlmostEqual(metrics["sharpe"], returns.mean() / returns.std())
+        self.assertAlmostEqual(metrics["sortino"], returns.mean() / downside)
+        self.assertAlmostEqual(metrics["max_draw_down"], 11.0)
+        self.assertAlmostEqual(metrics["max_draw_down_perc"], 10.0)
+        self.assertAlmostEqual(metrics["calmar"], 1.5)
+        # below the high of 110 from the 3rd to the 5th bar
+        self.assertEqual(metrics["max_draw_down_duration"], 3)
+
+        annual = equity_metrics(equity, periods_per_year=4)
+        self.assertAlmostEqual(annual["sharpe"], metrics["sharpe"] * 2)
+        self.assertAlmostEqual(annual["annual_return"], (1.15 ** (4 / 6) - 1) * 100)
+
+    def test_trade_metrics(self):
+        metrics = trade_metrics([np.nan, 5.0, -2.0, -1.0, -3.0, np.nan, 4.0, 6.0, 0.0])
+        self.assertEqual(metrics["count"], 7)
+        self.assertAlmostEqual(metrics["profit_factor"], 2.5)
+        self.assertAlmostEqual(metrics["expectancy"], 9 / 7)
+        self.assertEqual((metrics["best"], metrics["worst"]), (6.0, -3.0))
+        self.assertAlmostEqual(metrics["average_loss"], -2.0)
+        self.assertEqual((metrics["max_consecutive_wins"], metrics["max_consecutive_losses"]), (2, 3))
+        self.assertEqual(trade_metrics([])["count"], 0)
+
+    def test_rolling_metrics(self):
+        equity = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.01, 200)))
+        window = 20
+        rolling = rolling_metrics(equity, window)
+
+        self.assertTrue(np.isnan(rolling["sharpe"][:window]).all())
+        for i in [window, 57, 199]:
+            returns = np.diff(equity[i - window:i + 1]) / equity[i - window:i]
+            self.assertAlmostEqual(rolling["sharpe"][i], returns.mean() / returns.std())
+            self.assertAlmostEqual(rolling["return"][i], (equity[i] / equity[i - window] - 1) * 100)
+
+    def test_periods_per_year(self):
+        index = pd.date_range("2021-01-01", periods=10, freq="15min", tz="UTC")
+        self.assertAlmostEqual(periods_per_year(index), 365 * 96)
+
+
+if __name__ == '__main__':
+    unittest.main()
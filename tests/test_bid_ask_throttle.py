@@ -0,0 +1,129 @@
+# coding: UTF-8
+
+import threading
+import time
+import unittest
+
+from src.exchange.bid_ask_throttle import BidAskThrottle
+
+
+class TestBidAskThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self.bid, self.ask = 100.0, 100.1
+        self.calls = []
+
+    def prices(self):
+        return self.bid, self.ask
+
+    def callback(self, best_bid_changed, best_ask_changed):
+        self.calls.append((best_bid_changed, best_ask_changed, self.bid, self.ask))
+
+    def test_pass_through(self):
+        throttle = BidAskThrottle(self.prices)
+        callback = throttle.wrap(self.callback)
+        self.bid = 100.05
+        callback(True, False)
+        self.ask = 100.15
+        callback(False, True)
+        self.assertEqual(self.calls, [(True, False, 100.05, 100.1), (False, True, 100.05, 100.15)])
+
+    def test_min_ticks(self):
+        throttle = BidAskThrottle(self.prices, min_ticks=3, tick_size=0.01)
+        callback = throttle.wrap(self.callback)
+        for bid in [100.01, 100.02, 99.99]:
+            self.bid = bid
+            callback(True, False)
+        self.assertEqual(self.calls, [])
+        # 3 ticks from the bid last reported
+        self.bid = 100.03
+        callback(True, False)
+        self.assertEqual(self.calls, [(True, False, 100.03, 100.1)])
+        self.assertEqual(throttle.stats(), {"calls": 1, "suppressed_ticks": 3, "suppressed_interval": 0})
+
+    def test_min_interval(self):
+        throttle = BidAskThrottle(self.prices, min_interval=0.2)
+        callback = throttle.wrap(self.callback)
+        for bid in [100.01, 100.02, 100.03]:
+            self.bid = bid
+            callback(True, False)
+        self.assertEqual(self.calls, [(True, False, 100.01, 100.1)])
+
+        # without call_later, no call once the interval is over
+        time.sleep(0.3)
+        self.assertEqual(len(self.calls), 1)
+        # the suppressed bid change is reported by the next change, with the latest prices
+        self.ask = 100.2
+        callback(False, True)
+        self.assertEqual(self.calls[1], (True, True, 100.03, 100.2))
+        self.assertEqual(throttle.stats(), {"calls": 2, "suppressed_ticks": 0, "suppressed_interval": 2})
+
+    def test_trailing_change(self):
+        scheduled = []
+        throttle = BidAskThrottle(self.prices, min_interval=0.2,
+                                  call_later=lambda delay, func: scheduled.append((delay, func)))
+        callback = throttle.wrap(self.callback)
+        for bid in [100.01, 100.02, 100.03]:
+            self.bid = bid
+            callback(True, False)
+        self.assertEqual(self.calls, [(True, False, 100.01, 100.1)])
+        # a single report of the suppressed changes, once the interval is over
+        self.assertEqual(len(scheduled), 1)
+        delay, flush = scheduled[0]
+        self.assertTrue(0 < delay <= 0.2)
+
+        # the book is quiet, the last change is reported with the latest prices
+        time.sleep(delay)
+        flush()
+        self.assertEqual(self.calls[1], (True, False, 100.03, 100.1))
+        self.assertEqual(throttle.stats(), {"calls": 2, "suppressed_ticks": 0, "suppressed_interval": 2})
+        # nothing left to report
+        flush()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_trailing_change_with_timer(self):
+        def call_later(delay, func):
+            threading.Timer(delay, func).start()
+
+        throttle = BidAskThrottle(self.prices, min_interval=0.1, call_later=call_later)
+        callback = throttle.wrap(self.callback)
+        for ask in [100.11, 100.12]:
+            self.ask = ask
+            callback(False, True)
+        time.sleep(0.3)
+        self.assertEqual(self.calls, [(False, True, 100.0, 100.11), (False, True, 100.0, 100.12)])
+
+    def test_cancel(self):
+        scheduled = []
+        throttle = BidAskThrottle(self.prices, min_interval=0.2,
+                                  call_later=lambda delay, func: scheduled.append(func))
+        callback = throttle.wrap(self.callback)
+        for bid in [100.01, 100.02]:
+            self.bid = bid
+            callback(True, False)
+        throttle.cancel()
+        time.sleep(0.2)
+        scheduled[0]()
+        self.assertEqual(len(self.calls), 1)
+
+    def test_callback_runs_outside_the_lock(self):
+        throttle = BidAskThrottle(self.prices)
+
+        def callback(best_bid_changed, best_ask_changed):
+            self.assertFalse(throttle.lock.locked())
+            self.calls.append(best_bid_changed)
+
+        self.bid = 100.01
+        throttle.wrap(callback)(True, False)
+        self.assertEqual(self.calls, [True])
+
+    def test_reset(self):
+        throttle = BidAskThrottle(self.prices)
+        callback = throttle.wrap(self.callback)
+        self.bid = 100.01
+        throttle.reset()
+        callback(True, False)
+        self.assertEqual(self.calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,13 @@
 
 import unittest
 from datetime import datetime, timezone, timedelta
+from unittest import mock
+
+import pandas as pd
 
 from src import delta, allowed_range
 from src.exchange.bitmex.bitmex import BitMex
+from src.exchange.messages import Kline
 
 
 class TestBitMex(unittest.TestCase):
@@ -62,3 +66,40 @@ class TestBitMex(unittest.TestCase):
         bitmex.cancel(id)
         assert bitmex.get_open_order(id) is None
 
+
+
+class TestBitMexOHLCV(unittest.TestCase):
+
+    def test_strategy_runs_on_the_trade_bin_of_its_bar(self):
+        bitmex = BitMex.__new__(BitMex)
+        bitmex.bin_size = ['5m', '15m']
+        bitmex.ohlcv_len = 10
+        bitmex.minute_granularity = False
+        bitmex.timeframes_sorted = True
+        bitmex.call_strat_on_start = False
+        bitmex.timeframe_data = None
+        bitmex.timeframe_info = {}
+        calls = []
+        bitmex.strategy = lambda action, open, close, high, low, volume: calls.append((action, bitmex.timestamp))
+
+        def fetch_ohlcv(bin_size, start_time, end_time):
+            index = pd.date_range(end=pd.Timestamp("2021-01-01 00:00", tz="UTC"), periods=12, freq=bin_size[:-1] + "min")
+            return pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 1.0}, index=index)
+
+        with mock.patch.object(bitmex, "fetch_ohlcv", fetch_ohlcv):
+            # tradeBin1m and tradeBin5m messages, sent once their candle is over and stamped with its end time,
+            # the 5m bars are built from the 1m candles and the 15m bars from the 5m candles
+            for minutes in range(1, 31):
+                timestamp = pd.Timestamp("2021-01-01 00:00", tz="UTC") + pd.Timedelta(minutes=minutes)
+                calls.clear()
+                bitmex._BitMex__update_ohlcv("1m", Kline(timestamp.value, 1.0, 2.0, 0.5, 1.5, 1.0))
+                # the bar ending with the candle runs its strategy on the same message
+                self.assertEqual(calls, [("5m", timestamp.isoformat())] if minutes % 5 == 0 else [])
+                if minutes % 5 == 0:
+                    self.assertEqual(bitmex.timeframe_data["5m"].last_time(), timestamp)
+                    calls.clear()
+                    bitmex._BitMex__update_ohlcv("5m", Kline(timestamp.value, 1.0, 2.0, 0.5, 1.5, 5.0))
+                    self.assertEqual(calls, [("15m", timestamp.isoformat())] if minutes % 15 == 0 else [])
+        self.assertEqual(bitmex.timeframe_data["15m"].last_time(), timestamp)
+        self.assertEqual(bitmex.timeframe_data["15m"].arrays()["volume"][-1], 15.0)
+        self.assertEqual(bitmex.timeframe_data["5m"].arrays()["volume"][-1], 5.0)
@@ -0,0 +1,114 @@
+# coding: UTF-8
+
+import os
+import unittest
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import numpy as np
+from hyperopt import STATUS_OK, hp
+
+from src.bot import Bot
+from src.config import config as conf
+from src.indicators import sma
+
+
+class FakeExchange:
+
+    def __init__(self, precomputed=None):
+        self.precomputed = precomputed
+
+    def get_indicator(self, name, t):
+        return None if self.precomputed is None else self.precomputed[name]
+
+    def on_update(self, bin_size, strategy):
+        close = np.arange(30, dtype=float)
+        strategy("1h", close, close, close, close, close)
+
+
+class IndicatorBot(Bot):
+
+    def __init__(self):
+        Bot.__init__(self, ['1h'])
+        self.values = None
+
+    def indicators(self):
+        return {'sma': lambda open, close, high, low, volume: sma(close, 3)}
+
+    def strategy(self, action, open, close, high, low, volume):
+        self.values = self.indicator('sma')
+
+
+class QuadraticBot(Bot):
+
+    hyperopt_max_evals = 7
+
+    def __init__(self):
+        Bot.__init__(self, ['1h'])
+        self.exchange = None
+
+    def options(self):
+        return {'x': hp.uniform('x', -10, 10)}
+
+    def hyperopt_objective(self, args):
+        # the evaluated parameters and the process are returned with the loss to check them in the trials
+        return {'status': STATUS_OK, 'loss': (args['x'] - 3) ** 2, 'x': args['x'], 'pid': os.getpid()}
+
+
+class BatchRecordingPool(ProcessPoolExecutor):
+
+    # Parameters of every batch passed to the workers
+    batches = []
+
+    def map(self, fn, *iterables, **kwargs):
+        params = list(iterables[0])
+        BatchRecordingPool.batches.append(params)
+        return ProcessPoolExecutor.map(self, fn, params, **kwargs)
+
+
+class TestBotIndicators(unittest.TestCase):
+
+    def test_indicator_computed_from_window(self):
+        bot = IndicatorBot()
+        bot.exchange = FakeExchange()
+        bot._Bot__on_update()
+        self.assertEqual(bot.values[-1], 28.0)
+        self.assertEqual(len(bot.values), 30)
+
+    def test_indicator_precomputed_by_exchange(self):
+        bot = IndicatorBot()
+        bot.back_test = True
+        bot.exchange = FakeExchange(precomputed={'sma': np.array([1.0, 2.0])})
+        bot._Bot__on_update()
+        self.assertEqual(bot.values.tolist(), [1.0, 2.0])
+        self.assertIn('sma', bot.exchange.indicators)
+
+
+class TestBotParamsSearch(unittest.TestCase):
+
+    def test_params_search_parallel(self):
+        bot = QuadraticBot()
+        BatchRecordingPool.batches = []
+        with mock.patch.dict(conf, {"args": Namespace(order_log=os.devnull)}), \
+                mock.patch("src.bot.ProcessPoolExecutor", BatchRecordingPool):
+            trials = bot._Bot__params_search_parallel(2)
+
+        # 1 trial in this process, then batches of 2, 2, 2 in the workers
+        self.assertEqual(len(trials.trials), 7)
+        self.assertEqual([len(batch) for batch in BatchRecordingPool.batches], [2, 2, 2])
+        self.assertEqual([params for batch in BatchRecordingPool.batches for params in batch],
+                         [{'x': trial['result']['x']} for trial in trials.trials[1:]])
+        self.assertEqual(trials.tids, list(range(7)))
+        pids = [trial['result']['pid'] for trial in trials.trials]
+        self.assertEqual(pids[0], os.getpid())
+        self.assertNotIn(os.getpid(), pids[1:])
+
+        # every suggested trial is evaluated once with its own parameters, and its result inserted
+        for trial in trials.trials:
+            self.assertEqual(trial['result']['x'], trial['misc']['vals']['x'][0])
+        self.assertEqual(trials.losses(), [(trial['result']['x'] - 3) ** 2 for trial in trials.trials])
+        self.assertEqual(trials.statuses(), [STATUS_OK] * 7)
+        best = min(trials.trials, key=lambda trial: trial['result']['loss'])
+        self.assertEqual(trials.best_trial['tid'], best['tid'])
+        self.assertEqual(trials.argmin, {'x': best['result']['x']})
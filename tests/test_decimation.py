@@ -0,0 +1,39 @@
+# coding: UTF-8
+
+import unittest
+
+import numpy as np
+
+from src.decimation import lttb_indices, min_max_indices
+
+
+class TestDecimation(unittest.TestCase):
+
+    def setUp(self):
+        self.y = np.cumsum(np.random.default_rng(5).normal(0, 1, 10007))
+        self.y[2000:2600] = np.nan
+
+    def test_min_max_keeps_the_extremes(self):
+        kept = min_max_indices(self.y, 500)
+        self.assertLessEqual(len(kept), 500)
+        self.assertTrue((np.diff(kept) > 0).all())
+        self.assertEqual((kept[0], kept[-1]), (0, len(self.y) - 1))
+        self.assertEqual(np.nanmax(self.y[kept]), np.nanmax(self.y))
+        self.assertEqual(np.nanmin(self.y[kept]), np.nanmin(self.y))
+        # the gap is still drawn as a gap
+        self.assertTrue(np.isnan(self.y[kept]).any())
+
+    def test_lttb(self):
+        x = np.arange(len(self.y)) * 60
+        kept = lttb_indices(x, self.y, 500)
+        self.assertEqual(len(kept), 500)
+        self.assertTrue((np.diff(kept) > 0).all())
+        self.assertEqual((kept[0], kept[-1]), (0, len(self.y) - 1))
+        self.assertTrue(np.isnan(self.y[kept]).any())
+
+        line = np.arange(100.0)
+        np.testing.assert_array_equal(lttb_indices(line, line, 200), np.arange(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
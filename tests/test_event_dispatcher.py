@@ -0,0 +1,110 @@
+# coding: UTF-8
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.exchange.event_dispatcher import EventDispatcher
+
+
+class TestEventDispatcher(unittest.TestCase):
+
+    def wait_for(self, condition, timeout=5):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_coalescing_keeps_klines_and_orders(self):
+        dispatcher = EventDispatcher("test-events", max_size=2, coalesce=["bookticker"])
+        handled = []
+        release = threading.Event()
+
+        def slow(action, value):
+            release.wait(5)
+            handled.append((action, value))
+
+        def handler(action, value):
+            handled.append((action, value))
+
+        # the first event holds the dispatching thread while the next ones are queued
+        dispatcher.put("1m", slow, "1m", 0)
+        self.wait_for(lambda: dispatcher.queue.qsize() == 0)
+        for price in range(100):
+            dispatcher.put("bookticker", handler, "", price)
+        dispatcher.put("order", handler, "", "filled")
+        dispatcher.put("bookticker", handler, "", 100)
+
+        # the queue is full, the next kline waits for room instead of being dropped
+        producer = threading.Thread(target=dispatcher.put, args=("1m", handler, "1m", 1))
+        producer.start()
+        time.sleep(0.05)
+        self.assertTrue(producer.is_alive())
+        release.set()
+        producer.join(5)
+        dispatcher.stop()
+        dispatcher.thread.join(5)
+
+        self.assertEqual(handled, [("1m", 0), ("", 100), ("", "filled"), ("1m", 1)])
+        stats = dispatcher.stats()
+        self.assertEqual(stats["dispatched"], 4)
+        self.assertEqual(stats["coalesced"], 100)
+        self.assertEqual(stats["blocked"], 1)
+
+    def test_handler_errors_do_not_stop_dispatching(self):
+        dispatcher = EventDispatcher("test-events")
+        handled = []
+
+        def failing(action, value):
+            raise ValueError("handler error")
+
+        dispatcher.put("order", failing, "", 1)
+        dispatcher.put("order", lambda action, value: handled.append(value), "", 2)
+        dispatcher.stop()
+        dispatcher.thread.join(5)
+        self.assertEqual(handled, [2])
+
+    def test_executor(self):
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="test-executor")
+        self.addCleanup(executor.shutdown)
+        dispatcher = EventDispatcher("test-events", max_size=5, coalesce=["bookticker"], executor=executor)
+        handled = []
+        threads = set()
+
+        def handler(action, value):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.001)
+            handled.append(value)
+
+        for value in range(50):
+            dispatcher.put("1m", handler, "1m", value)
+        self.wait_for(lambda: len(handled) == 50)
+        dispatcher.stop()
+
+        # handled in order, one at a time, in the threads of the executor
+        self.assertIsNone(dispatcher.thread)
+        self.assertEqual(handled, list(range(50)))
+        self.assertTrue(all(name.startswith("test-executor") for name in threads))
+        self.assertEqual(dispatcher.stats()["dispatched"], 50)
+
+    def test_executor_full_queue_put_from_executor(self):
+        # the websocket callbacks run in the same threads, when they all wait for room in the queue
+        # the events are handled by `put` instead of the submitted task
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        dispatcher = EventDispatcher("test-events", max_size=2, executor=executor)
+        handled = []
+
+        def produce():
+            for value in range(10):
+                dispatcher.put("1m", lambda action, value: handled.append(value), "1m", value)
+
+        executor.submit(produce).result(5)
+        self.wait_for(lambda: len(handled) == 10)
+        self.assertEqual(handled, list(range(10)))
+        self.assertGreater(dispatcher.stats()["blocked"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
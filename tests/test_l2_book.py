@@ -0,0 +1,48 @@
+# coding: UTF-8
+
+import unittest
+
+from src.exchange.bitmex.orderbook import OrderBook
+from src.exchange.l2_book import L2Book
+
+
+class TestL2Book(unittest.TestCase):
+
+    def test_snapshot_and_deltas(self):
+        book = L2Book()
+        self.assertIsNone(book.best_bid())
+        book.snapshot(bids=[("100.0", "2"), ("99.5", "1")], asks=[("100.5", "3"), ("101", "1")])
+        self.assertEqual(book.best_bid(), (100.0, 2.0))
+        self.assertEqual(book.best_ask(), (100.5, 3.0))
+
+        book.apply(bids=[(100.0, 0), (99.8, 4)], asks=[(100.2, 1.5), (101, 2)])
+        self.assertEqual(book.depth(), {"bids": [(99.8, 4.0), (99.5, 1.0)],
+                                        "asks": [(100.2, 1.5), (100.5, 3.0), (101.0, 2.0)]})
+        self.assertEqual(book.depth(1), {"bids": [(99.8, 4.0)], "asks": [(100.2, 1.5)]})
+        self.assertEqual(len(book), 5)
+
+    def test_bitmex_order_book(self):
+        class Ws:
+            def bind(self, key, func):
+                self.update = func
+
+        ws = Ws()
+        ob = OrderBook(ws)
+        ws.update("insert", [{"id": 1, "side": "Sell", "size": 5, "price": 101}])
+        self.assertEqual(ob.get_prices(), (0, 0))
+
+        ws.update("partial", [{"id": 1, "side": "Sell", "size": 5, "price": 101},
+                              {"id": 2, "side": "Sell", "size": 5, "price": 102},
+                              {"id": 3, "side": "Buy", "size": 5, "price": 100},
+                              {"id": 4, "side": "Buy", "size": 5, "price": 99}])
+        self.assertEqual(ob.get_prices(), (100, 101))
+        self.assertEqual((ob.bid_min_price, ob.ask_max_price), (99, 102))
+
+        ws.update("delete", [{"id": 1, "side": "Sell"}])
+        ws.update("update", [{"id": 3, "side": "Buy", "size": 7}])
+        self.assertEqual(ob.get_prices(), (100, 102))
+        self.assertEqual(ob.depth(1), {"bids": [(100.0, 7.0)], "asks": [(102.0, 5.0)]})
+
+
+if __name__ == '__main__':
+    unittest.main()
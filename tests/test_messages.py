@@ -0,0 +1,65 @@
+# coding: UTF-8
+
+import json
+import threading
+import unittest
+
+import pandas as pd
+
+from src.exchange import messages
+from src.exchange.binance_futures.binance_futures_websocket import BinanceFuturesWs
+from src.exchange.messages import BookTicker, Kline, ceil_minute, get_json_decoder
+
+
+class TestMessages(unittest.TestCase):
+
+    def test_json_decoders(self):
+        frame = '{"data": {"e": "bookTicker", "b": "25.35"}}'
+        name, loads = get_json_decoder()
+        self.assertIn(name, messages.JSON_DECODERS)
+        self.assertEqual(loads(frame), json.loads(frame))
+        self.assertEqual(loads(frame.encode()), json.loads(frame))
+        self.assertIs(get_json_decoder("json")[1], json.loads)
+
+    def test_json_decoder_config(self):
+        from src.exchange.binance_futures.binance_futures import BinanceFutures
+        from src.exchange.bitmex.bitmex import BitMex
+        from src.exchange.bybit.bybit import Bybit
+        from src.exchange_config import exchange_config
+
+        # the key of the config is synced to the exchange and passed to its websocket
+        for name, exchange in [("binance_f", BinanceFutures), ("bybit", Bybit), ("bitmex", BitMex)]:
+            self.assertIn("json_decoder", exchange_config[name])
+            self.assertIn("json_decoder", dir(exchange))
+
+        name = messages.json_decoder_name
+        self.addCleanup(messages.set_json_decoder, name)
+        messages.set_json_decoder("json")
+        self.assertEqual(messages.json_decoder_name, "json")
+        self.assertIs(messages.loads, json.loads)
+
+    def test_ceil_minute(self):
+        close_time = pd.Timestamp(1622045099999, unit="ms", tz="UTC")
+        self.assertEqual(ceil_minute(close_time.value), close_time.ceil("1min").value)
+        self.assertEqual(ceil_minute(close_time.ceil("1min").value), close_time.ceil("1min").value)
+
+    def test_binance_messages(self):
+        ws = BinanceFuturesWs.__new__(BinanceFuturesWs)
+        ws.use_healthcecks = False
+        ws.dispatcher = None
+        ws.lock = threading.Lock()
+        received = []
+        ws.handlers = {"1m": lambda action, value: received.append(value),
+                       "bookticker": lambda action, value: received.append(value)}
+
+        ws._BinanceFuturesWs__on_message(None, json.dumps({"data": {
+            "e": "kline", "k": {"T": 1622045099999, "i": "1m", "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "10"}}}))
+        ws._BinanceFuturesWs__on_message(None, json.dumps({"data": {
+            "e": "bookTicker", "T": 5, "b": "100.1", "B": "3", "a": "100.2", "A": "4"}}))
+
+        self.assertEqual(received, [Kline(1622045099999000000, 1.0, 2.0, 0.5, 1.5, 10.0),
+                                    BookTicker(100.1, 3.0, 100.2, 4.0, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+# coding: UTF-8
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import load_data
+from src.exchange.ohlcv_store import OHLCVStore
+
+
+def ohlcv(start, periods):
+    index = pd.date_range(start, periods=periods, freq="1min", tz="UTC")
+    values = np.arange(periods, dtype=float)
+    return pd.DataFrame({"high": values + 2, "low": values, "open": values + 0.5,
+                         "close": values + 1, "volume": values * 10}, index=index)
+
+
+class TestOHLCVStore(unittest.TestCase):
+
+    def test_write_read(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir + "/store")
+            data = ohlcv("2021-01-01", 10)
+            store.write(data)
+            assert store.exists()
+            assert len(store) == 10
+            df = store.read()
+            assert list(df.columns) == ["time", "high", "low", "open", "close", "volume"]
+            assert (df["time"].values == data.index.values).all()
+            assert (df["close"].values == data["close"].values).all()
+            assert store.last_time() == data.index[-1]
+
+    def test_append_skips_known_candles(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            store.write(ohlcv("2021-01-01", 10))
+            assert store.append(ohlcv("2021-01-01 00:05", 10)) == 5
+            assert len(store) == 15
+            times = store.read_arrays()["timestamp"]
+            assert (np.diff(times) == 60 * 10**9).all()
+
+    def test_append_replaces_last_candle(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 10)
+            store.write(data.iloc[:5])
+            assert store.last_time(4) == data.index[3]
+            assert store.append(data.iloc[4:], keep_rows=4) == 6
+            df = OHLCVStore(dir).read(set_index=True)
+            assert (df.index == data.index).all()
+            assert (df["close"].values == data["close"].values).all()
+
+    def test_updates_do_not_change_mapped_generations(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 20)
+            store.write(data.iloc[:10])
+            # another process mapping the store before the updates
+            reader = OHLCVStore(dir)
+            mapped = reader.read(mmap=True, set_index=True)
+            store.append(data.iloc[9:], keep_rows=9)
+            store.truncate(15)
+            store.append(data.iloc[15:])
+            store.truncate(12)
+            assert (mapped.index == data.index[:10]).all()
+            assert (mapped["close"].values == data["close"].values[:10]).all()
+            assert len(reader) == 10
+            assert (OHLCVStore(dir).read(set_index=True).index == data.index[:12]).all()
+            # only the current and the previous generations are kept
+            assert sorted(name for name in os.listdir(dir) if name.startswith("gen")) == ["gen2", "gen3"]
+            assert not os.path.exists(os.path.join(dir, "close.f8"))
+
+    def test_append_in_place(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 20)
+            store.write(data.iloc[:10])
+            mapped = OHLCVStore(dir).read(mmap=True, set_index=True)
+            # the candle replaced by keep_rows is the same, the new candles are written after the committed ones
+            assert store.append(data.iloc[9:15], keep_rows=9) == 6
+            assert store.merge(data.iloc[15:]) == 5
+            assert sorted(name for name in os.listdir(dir) if name.startswith("gen")) == ["gen1"]
+            assert os.path.getsize(os.path.join(dir, "gen1", "close.f8")) == 20 * 8
+            assert (OHLCVStore(dir).read(set_index=True)["close"].values == data["close"].values).all()
+            assert (mapped["close"].values == data["close"].values[:10]).all()
+
+    def test_changed_last_candle_links_unchanged_columns(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 10)
+            partial = data.iloc[:5].copy()
+            partial.iloc[-1, partial.columns.get_loc("close")] = -1.0
+            store.write(partial)
+            mapped = OHLCVStore(dir).read(mmap=True, set_index=True)
+            assert store.append(data.iloc[4:], keep_rows=4) == 6
+            # the close of the last candle changed and is copied, the other columns are shared
+            assert not os.path.samefile(os.path.join(dir, "gen1", "close.f8"), os.path.join(dir, "gen2", "close.f8"))
+            for name in ["time.i8", "open.f8", "high.f8", "low.f8", "volume.f8"]:
+                assert os.path.samefile(os.path.join(dir, "gen1", name), os.path.join(dir, "gen2", name))
+            assert (mapped["close"].values == partial["close"].values).all()
+            df = OHLCVStore(dir).read(set_index=True)
+            assert (df.index == data.index).all()
+            assert (df["close"].values == data["close"].values).all()
+
+    def test_legacy_layout(self):
+        with tempfile.TemporaryDirectory() as dir:
+            data = ohlcv("2021-01-01", 10)
+            for column, dtype in [("time.i8", "<i8"), ("open.f8", "<f8"), ("close.f8", "<f8")]:
+                values = data.index.asi8 if column == "time.i8" else data[column[:-3]].to_numpy()
+                values.astype(dtype).tofile(os.path.join(dir, column))
+            with open(os.path.join(dir, "meta.json"), "w") as f:
+                f.write('{"columns": ["open", "close"], "rows": 10}')
+            store = OHLCVStore(dir)
+            assert (store.read(set_index=True)["close"].values == data["close"].values).all()
+            store.truncate(8)
+            assert (OHLCVStore(dir).read(set_index=True).index == data.index[:8]).all()
+
+    def test_merge_fills_gaps(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 20)
+            store.write(data.drop(data.index[[3, 4, 12]]))
+            assert len(store) == 17
+            # the known candle at 00:05 is skipped
+            assert store.merge(data.iloc[[12, 3, 4, 5]]) == 3
+            assert len(store) == 20
+            df = store.read(set_index=True)
+            assert (df.index == data.index).all()
+            assert (df["close"].values == data["close"].values).all()
+            assert store.merge(data.iloc[[3]]) == 0
+
+    def test_merge_does_not_change_mapped_generation(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 20)
+            store.write(data.drop(data.index[[3, 4]]))
+            mapped = OHLCVStore(dir).read(mmap=True, set_index=True)
+            assert store.merge(data.iloc[[3, 4]]) == 2
+            assert (mapped.index == data.index.drop(data.index[[3, 4]])).all()
+            assert (mapped["close"].values == data["close"].drop(data.index[[3, 4]]).values).all()
+            assert (OHLCVStore(dir).read(set_index=True)["close"].values == data["close"].values).all()
+
+    def test_truncate(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 10)
+            store.write(data)
+            store.truncate(9)
+            assert len(OHLCVStore(dir)) == 9
+            assert store.last_time() == data.index[-2]
+
+    def test_mmap(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            store.write(ohlcv("2021-01-01", 10))
+            arrays = store.read_arrays(mmap=True)
+            assert isinstance(arrays["close"], np.memmap)
+            assert not arrays["close"].flags["WRITEABLE"]
+
+    def test_mmap_data_frame_is_not_copied(self):
+        with tempfile.TemporaryDirectory() as dir:
+            store = OHLCVStore(dir)
+            data = ohlcv("2021-01-01", 10)
+            store.write(data)
+            df = store.read(mmap=True, set_index=True)
+            assert (df.index == data.index).all()
+            # a copy would be writeable, the read-only mapping is not
+            assert not df["close"].to_numpy().flags["WRITEABLE"]
+
+    def test_csv_migration_and_export(self):
+        with tempfile.TemporaryDirectory() as dir:
+            csv_file = dir + "/data.csv"
+            ohlcv("2021-01-01", 10).to_csv(csv_file, index_label="time")
+            store = OHLCVStore(dir)
+            store.write(load_data(csv_file))
+            store.export_csv(dir + "/export.csv")
+            with open(csv_file, "rb") as a, open(dir + "/export.csv", "rb") as b:
+                assert a.read() == b.read()
@@ -0,0 +1,127 @@
+# coding: UTF-8
+
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.rate_limiter import RateLimiter, RateLimitedAdapter
+from src.exchange.binance_futures.binance_futures_api import request_weight, sync_used_weight
+
+
+class FakeExchange(BaseHTTPRequestHandler):
+    """
+    Local REST endpoint with a Binance like weight limit per fixed window,
+    answering 429 once the weight of the window is used up.
+    """
+    capacity = 20
+    period = 1
+    lock = threading.Lock()
+    window = None
+    used = 0
+    rejected = 0
+
+    def do_GET(self):
+        cls = type(self)
+        weight = 10 if "klines" in self.path else 1
+        with cls.lock:
+            window = int(time.time() // cls.period)
+            if window != cls.window:
+                cls.window = window
+                cls.used = 0
+            cls.used += weight
+            used = cls.used
+        if used > cls.capacity:
+            cls.rejected += 1
+            self.send_response(429)
+            self.send_header("Retry-After", str(cls.period))
+        else:
+            self.send_response(200)
+        self.send_header("X-MBX-USED-WEIGHT-1M", str(used))
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        FakeExchange.window = None
+        FakeExchange.used = 0
+        FakeExchange.rejected = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeExchange)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def session(self, limiter):
+        session = requests.Session()
+        session.mount("http://", RateLimitedAdapter(lambda r: [(limiter, request_weight(r))], sync=sync_used_weight))
+        return session
+
+    def test_burst_within_capacity(self):
+        limiter = RateLimiter(10, period=1)
+        start = time.monotonic()
+        for i in range(5):
+            assert limiter.acquire(2) == 0
+        assert time.monotonic() - start < 0.1
+
+    def test_shared_budget(self):
+        limiter = RateLimiter(10, period=0.5)
+        limiter.acquire(10)
+        start = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire, args=(5,)) for i in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # the two threads need one full refill of the bucket
+        assert 0.4 < time.monotonic() - start < 1.0
+
+    def test_request_weight(self):
+        klines = requests.Request("GET", "https://fapi.binance.com/fapi/v1/klines",
+                                  params={"symbol": "BTCUSDT", "limit": 1500}).prepare()
+        assert request_weight(klines) == 10
+        tickers = requests.Request("GET", "https://fapi.binance.com/fapi/v1/ticker/24hr").prepare()
+        assert request_weight(tickers) == 40
+        order = requests.Request("POST", "https://fapi.binance.com/fapi/v1/order", data={"symbol": "BTCUSDT"}).prepare()
+        assert request_weight(order) == 1
+
+    def test_no_429_from_fake_exchange(self):
+        limiter = RateLimiter(FakeExchange.capacity, FakeExchange.period, fixed_window=True)
+        session = self.session(limiter)
+        statuses = []
+
+        def worker(path):
+            for i in range(6):
+                statuses.append(session.get(self.url + path).status_code)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(p,)) for p in ["/fapi/v1/time"] * 4 + ["/fapi/v1/klines?limit=1500"]]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 4 * 6 * 1 + 6 * 10 = 84 weight needs at least 4 windows of 20
+        assert FakeExchange.rejected == 0
+        assert statuses.count(200) == 30
+        assert time.monotonic() - start > 3 * FakeExchange.period
+
+    def test_sync_with_used_weight(self):
+        limiter = RateLimiter(FakeExchange.capacity, FakeExchange.period, fixed_window=True)
+        session = self.session(limiter)
+        # weight used by another process in this window, not at its end
+        time.sleep((FakeExchange.period - time.time() % FakeExchange.period) % FakeExchange.period)
+        FakeExchange.window = int(time.time() // FakeExchange.period)
+        FakeExchange.used = FakeExchange.capacity - 2
+        session.get(self.url + "/fapi/v1/time")
+        assert limiter.tokens <= 1
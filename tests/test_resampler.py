@@ -0,0 +1,106 @@
+# coding: UTF-8
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import resample, to_ohlcv_arrays
+from src.resampler import IncrementalResampler, OHLCVRingBuffer
+
+
+class TestIncrementalResampler(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2021-01-01 03:17", periods=3000, freq="1min", tz="UTC", name="time")
+        df = pd.DataFrame(rng.random((len(index), 5)), columns=["open", "high", "low", "close", "volume"], index=index)
+        df = df.drop(df.index[1000:1400])
+        df.iloc[100:130] = np.nan
+        self.df = df
+
+    def test_matches_resample_without_lookahead(self):
+        arrays = to_ohlcv_arrays(self.df)
+        for bin_size, rule in [("15m", "15T"), ("1h", "1H"), ("4h", "4H")]:
+            expected = resample(self.df, bin_size)
+            resampler = IncrementalResampler(rule)
+            position = 0
+            for now in pd.date_range(self.df.index[0], self.df.index[-1], freq="37min"):
+                while position < len(arrays["timestamp"]) and arrays["timestamp"][position] <= now.value:
+                    resampler.update(*(arrays[c][position] for c in ["timestamp", "open", "high", "low", "close", "volume"]))
+                    position += 1
+                resampler.advance(now.value)
+                pd.testing.assert_frame_equal(resampler.to_data_frame(20, "time"), expected[:now].iloc[-20:],
+                                              check_freq=False)
+
+    def test_partial_bar(self):
+        resampler = IncrementalResampler("1H")
+        start = pd.Timestamp("2021-01-01 00:01", tz="UTC").value
+        minute = 60 * 10 ** 9
+        for i, close in enumerate([3.0, 5.0, 1.0]):
+            resampler.update(start + i * minute, close, close, close, close, 1.0)
+        self.assertEqual(len(resampler), 0)
+        self.assertEqual(resampler.partial()["time"], pd.Timestamp("2021-01-01 01:00", tz="UTC"))
+        self.assertEqual((resampler.partial()["high"], resampler.partial()["low"]), (5.0, 1.0))
+        with self.assertRaises(ValueError):
+            resampler.advance(start + 59 * minute)
+            resampler.update(start + 59 * minute, 2.0, 2.0, 2.0, 2.0, 1.0)
+        self.assertEqual(len(resampler), 1)
+        self.assertIsNone(resampler.partial())
+
+
+class TestOHLCVRingBuffer(unittest.TestCase):
+
+    def test_update_and_roll(self):
+        index = pd.date_range("2021-01-01 00:15", periods=4, freq="15min", tz="UTC")
+        history = pd.DataFrame({"open": [1.0, 2.0, 3.0, 4.0], "high": 5.0, "low": 0.5, "close": 1.5, "volume": 1.0},
+                               index=index)
+        buffer = OHLCVRingBuffer("15T", 2)
+        buffer.load(history)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.last_time(), index[2])
+
+        minute = pd.Timedelta(minutes=1).value
+        start = index[3].value - 15 * minute
+        # updates of the same candle replace it, a newer candle is added to the candle being built
+        self.assertFalse(buffer.update(start + minute, 9.0, 6.0, 0.4, 2.0, 1.0))
+        self.assertFalse(buffer.update(start + minute, 9.0, 7.0, 0.4, 2.5, 2.0))
+        self.assertFalse(buffer.update(start + 2 * minute, 9.0, 6.5, 0.3, 3.0, 1.0))
+        np.testing.assert_array_equal(buffer.partial, [4.0, 7.0, 0.3, 3.0, 4.0])
+
+        # a candle of a later bin closes the candle and an empty one for the skipped bin
+        self.assertTrue(buffer.update(index[3].value + 16 * minute, 8.0, 8.0, 8.0, 8.0, 1.0))
+        arrays = buffer.arrays()
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.last_time(), index[3] + pd.Timedelta(minutes=15))
+        np.testing.assert_array_equal(arrays["open"], [4.0, np.nan])
+        np.testing.assert_array_equal(arrays["volume"], [4.0, 0.0])
+        self.assertFalse(arrays["close"].flags.writeable)
+
+        for i in range(10):
+            buffer.update(index[3].value + (31 + 15 * i) * minute, i, i, i, i, 1.0)
+        self.assertEqual(buffer.arrays()["close"].tolist(), [7.0, 8.0])
+        self.assertTrue(buffer.arrays()["close"].flags.c_contiguous)
+        self.assertEqual(buffer.to_data_frame(partial=True)["close"].tolist(), [7.0, 8.0, 9.0])
+
+    def test_closed_candle_closes_its_bar(self):
+        minute = pd.Timedelta(minutes=1).value
+        start = pd.Timestamp("2021-01-01", tz="UTC").value
+        buffer = OHLCVRingBuffer("5T", 3)
+        buffer.load(pd.DataFrame({"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1.0},
+                                 index=pd.DatetimeIndex([start - 5 * minute, start], tz="UTC")))
+
+        # final candles stamped with their end time, as BitMEX tradeBin messages
+        self.assertTrue(buffer.update(start + minute, 2.0, 2.0, 2.0, 2.0, 1.0, closed=True))
+        self.assertEqual(buffer.last_time().value, start)
+        for i in range(2, 5):
+            self.assertFalse(buffer.update(start + i * minute, 2.0, 3.0, 2.0, 2.0, 1.0, closed=True))
+        self.assertTrue(buffer.update(start + 5 * minute, 2.0, 2.0, 1.5, 2.5, 1.0, closed=True))
+        self.assertEqual(buffer.last_time().value, start + 5 * minute)
+        self.assertEqual(buffer.to_data_frame().iloc[-1].tolist(), [2.0, 3.0, 1.5, 2.5, 5.0])
+        self.assertEqual(buffer.partial[4], 0.0)
+
+        # a bar without any candle is closed empty by the next candle
+        self.assertTrue(buffer.update(start + 15 * minute, 4.0, 4.0, 4.0, 4.0, 1.0, closed=True))
+        self.assertEqual(buffer.last_time().value, start + 15 * minute)
+        np.testing.assert_array_equal(buffer.arrays()["volume"], [5.0, 0.0, 1.0])
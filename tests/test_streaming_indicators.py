@@ -0,0 +1,56 @@
+# coding: UTF-8
+
+import unittest
+
+import numpy as np
+import talib
+
+from src.streaming_indicators import StreamingIndicator, SMA, EMA, ATR, RSI, Highest, Lowest, StdDev, BBands, MACD
+
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.close = 30000 + np.cumsum(rng.normal(0, 20, 2000))
+        self.high = self.close + rng.random(2000) * 30
+        self.low = self.close - rng.random(2000) * 30
+
+    def assert_matches(self, indicator, expected, *sources):
+        expected = np.asarray(expected, dtype=float)
+        values = np.array([indicator.update(*values) for values in zip(*sources)], dtype=float)
+        np.testing.assert_array_equal(np.isnan(values), np.isnan(expected))
+        np.testing.assert_allclose(values[~np.isnan(values)], expected[~np.isnan(expected)], rtol=1e-7)
+
+    def test_moving_averages(self):
+        self.assert_matches(SMA(20), talib.SMA(self.close, 20), self.close)
+        self.assert_matches(EMA(20), talib.EMA(self.close, 20), self.close)
+
+    def test_atr_rsi(self):
+        self.assert_matches(ATR(14), talib.ATR(self.high, self.low, self.close, 14), self.high, self.low, self.close)
+        self.assert_matches(RSI(14), talib.RSI(self.close, 14), self.close)
+
+    def test_highest_lowest(self):
+        self.assert_matches(Highest(20), talib.MAX(self.close, 20), self.close)
+        self.assert_matches(Lowest(20), talib.MIN(self.close, 20), self.close)
+
+    def test_bands(self):
+        self.assert_matches(StdDev(20, 2), talib.STDDEV(self.close, 20, 2), self.close)
+        self.assert_matches(BBands(20, 2, 2), np.array(talib.BBANDS(self.close, 20, 2, 2, 0)).T, self.close)
+
+    def test_macd(self):
+        self.assert_matches(MACD(12, 26, 9), np.array(talib.MACD(self.close, 12, 26, 9)).T, self.close)
+
+    def test_update_many(self):
+        rsi = RSI(14)
+        self.assertFalse(rsi.ready)
+        rsi.update_many(self.close[:-1])
+        self.assertTrue(rsi.ready)
+        self.assertAlmostEqual(rsi.update(self.close[-1]), talib.RSI(self.close, 14)[-1])
+
+    def test_update_is_abstract(self):
+        class Incomplete(StreamingIndicator):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
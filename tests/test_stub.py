@@ -0,0 +1,122 @@
+# coding: UTF-8
+
+import os
+import random
+import tempfile
+import unittest
+from argparse import Namespace
+from unittest import mock
+
+import numpy as np
+
+from src.config import config as conf
+from src.exchange.stub import OpenOrders, Stub, StubOrder
+
+
+class MatchingStub(Stub):
+    enable_trade_log = False
+    asset_rounding = 3
+    is_exit_order_active = False
+    is_sltp_active = False
+
+    def __init__(self, vectorized_order_matching):
+        Stub.__init__(self)
+        self.vectorized_order_matching = vectorized_order_matching
+        self.market_price = 100.0
+        self.trail_price = 0
+        self.timestamp = None
+        self.strategy = Stub.override_strategy(lambda self, *args: None)
+
+    def get_market_price(self):
+        return self.market_price
+
+    def get_commission(self):
+        return 0.0008
+
+    def get_trail_price(self):
+        return self.trail_price
+
+    def set_trail_price(self, value):
+        self.trail_price = value
+
+
+class TestStubOrderMatching(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.dict(conf, {"args": Namespace(order_log=os.path.join(directory.name, "orders.csv"))})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_vectorized_matching_fills_like_the_loop(self):
+        stubs = [MatchingStub(False), MatchingStub(True)]
+        rng = random.Random(7)
+        price = 100.0
+        for bar in range(300):
+            if bar % 25 == 0:
+                for j in range(30):
+                    long = rng.random() < 0.5
+                    offset = rng.uniform(-4, 4)
+                    kind = rng.random()
+                    for stub in stubs:
+                        if kind < 0.4:
+                            stub.order(f"L{j}", long, 1, limit=price + offset)
+                        elif kind < 0.6:
+                            stub.order(f"S{j}", long, 1, stop=price + offset)
+                        elif kind < 0.8:
+                            stub.order(f"SL{j}", long, 1, limit=price + offset, stop=price + offset / 2)
+                        else:
+                            stub.order(f"R{j}", long, 0.5, limit=price + offset, stop=price - offset,
+                                       reduce_only=True)
+            price += rng.gauss(0, 0.5)
+            close = np.full(3, price)
+            high, low = close + rng.random(), close - rng.random()
+            for stub in stubs:
+                stub.market_price = price
+                stub.strategy(stub, "1m", close, close, high, low, close)
+
+            self.assertEqual(stubs[0].open_orders, stubs[1].open_orders)
+            self.assertEqual(stubs[0].position_size, stubs[1].position_size)
+            self.assertEqual(stubs[0].balance, stubs[1].balance)
+        self.assertGreater(stubs[0].order_count, 50)
+        self.assertEqual(stubs[0].order_count, stubs[1].order_count)
+
+    def test_order_callbacks_go_through_the_loop(self):
+        stub = MatchingStub(True)
+        stub.order("Long", True, 1, limit=99, callback=lambda: stub.order("Exit", False, 1, limit=120))
+        stub.order("Far", True, 1, limit=50)
+        close = np.full(3, 100.0)
+        stub.strategy(stub, "1m", close, close, close + 1, close - 2, close)
+        self.assertEqual(stub.position_size, 1)
+        self.assertEqual([order["id"] for order in stub.open_orders], ["Far", "Exit"])
+
+
+    def test_close_partial_order_is_matched(self):
+        stub = MatchingStub(False)
+        stub.commit("Long", True, 2, 100.0)
+        stub.close_partial("TP", 1, limit=101)
+        close = np.full(3, 100.0)
+        stub.strategy(stub, "1m", close, close, close + 2, close - 1, close)
+        self.assertEqual(stub.position_size, 1)
+        self.assertEqual(len(stub.open_orders), 0)
+
+
+class TestOpenOrders(unittest.TestCase):
+
+    def test_find_by_id_prefix_in_placement_order(self):
+        orders = OpenOrders()
+        for id in ["TP2", "SL", "TP1", "TP10"]:
+            orders.append(StubOrder(id, True, 1, limit=10))
+        self.assertEqual([o.id for o in orders.find("TP1")], ["TP1", "TP10"])
+        self.assertEqual([o.id for o in orders.find("TP")], ["TP2", "TP1", "TP10"])
+        self.assertEqual(orders.find("X"), [])
+
+        orders.remove(orders.find("TP1")[0])
+        self.assertEqual([o.id for o in orders], ["TP2", "SL", "TP10"])
+        self.assertEqual(orders.find("TP1")[0]["limit"], 10)
+        self.assertEqual([o.id for o in orders.since(1)], ["TP10"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# coding: UTF-8
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.trade_journal import TradeJournal
+
+ROWS = [
+    ("2021-01-01 00:15:00+00:00", "BUY", "Long", 100.5, 2, 100.5, 2, None, 1000, 0.0),
+    ("2021-01-01 00:30:00+00:00", "SELL", "Reversal", np.float64(99.25), -2, 100.5, 0, -2.6599999, 997.34, 0.266),
+    ("2021-01-01 00:30:00+00:00", "SELL", "Short", np.float64(99.25), -1.5, 99.25, -1.5, None, 997.34, 0.266),
+]
+
+EXPECTED = (
+    "time,type,id,price,quantity,av_price,position,pnl,balance,drawdown\n"
+    "2021-01-01 00:15:00+00:00,BUY,Long,100.5,2.0,100.5,2.0,-,1000.00,0.00\n"
+    "2021-01-01 00:30:00+00:00,SELL,Reversal,99.25,-2.0,100.5,0.0,-2.66,997.34,0.27\n"
+    "2021-01-01 00:30:00+00:00,SELL,Short,99.25,-1.5,99.25,-1.5,-,997.34,0.27\n"
+)
+
+
+class TestTradeJournal(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "orders.csv")
+
+    def read(self):
+        with open(self.path) as file:
+            return file.read()
+
+    def test_buffered_rows_are_written_in_bulk(self):
+        journal = TradeJournal(self.path, buffer_size=2, capacity=1)
+        journal.append(*ROWS[0])
+        self.assertEqual(self.read(), EXPECTED.splitlines(keepends=True)[0])
+        journal.append(*ROWS[1])
+        journal.append(*ROWS[2])
+        self.assertEqual(len(self.read().splitlines()), 3)
+        journal.close()
+        self.assertEqual(self.read(), EXPECTED)
+
+    def test_unbuffered_rows_and_data_frame(self):
+        journal = TradeJournal(self.path)
+        for row in ROWS:
+            journal.append(*row)
+        self.assertEqual(self.read(), EXPECTED)
+
+        data_frame = journal.to_data_frame()
+        self.assertEqual(data_frame["id"].tolist(), ["Long", "Reversal", "Short"])
+        self.assertEqual(data_frame["quantity"].dtype, np.float64)
+        self.assertEqual(data_frame["quantity"].tolist(), [2.0, -2.0, -1.5])
+        self.assertTrue(np.isnan(data_frame["pnl"].iloc[0]))
+        self.assertEqual(data_frame["time"].iloc[0], pd.Timestamp("2021-01-01 00:15:00", tz="UTC"))
+        journal.close()
+
+    def test_rows_are_dropped_once_written(self):
+        journal = TradeJournal(self.path, buffer_size=2, capacity=2, keep_rows=False)
+        for row in ROWS:
+            journal.append(*row)
+        # the first two rows are written and dropped, the arrays are reused
+        self.assertEqual(len(journal), 1)
+        self.assertEqual(len(journal.columns["time"]), 2)
+        self.assertEqual(journal.to_data_frame()["id"].tolist(), ["Short"])
+        journal.close()
+        self.assertEqual(len(journal), 0)
+        self.assertEqual(self.read(), EXPECTED)
+
+
+if __name__ == '__main__':
+    unittest.main()
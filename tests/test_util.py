@@ -4,7 +4,10 @@ import datetime
 import os
 import unittest
 
-from src import to_data_frame, validate_continuous, load_data, ord_suffix
+import numpy as np
+import pandas as pd
+
+from src import to_data_frame, validate_continuous, load_data, ord_suffix, to_ohlcv_arrays, scan_candles
 
 
 class TestUtil(unittest.TestCase):
@@ -27,4 +30,30 @@ class TestUtil(unittest.TestCase):
     def test_order_suffix(self):
         suffix = ord_suffix()
         print(suffix)
-        assert len(suffix) > 0
\ No newline at end of file
+        assert len(suffix) > 0
+
+    def test_to_ohlcv_arrays(self):
+        data = [{'timestamp': datetime.datetime(2018, 6, 8, 23, 55), 'open': 1.0, 'high': 3.0, 'low': 0.5, 'close': 2.0, 'volume': 10},
+                {'timestamp': datetime.datetime(2018, 6, 8, 23, 56), 'open': 2.0, 'high': 4.0, 'low': 1.5, 'close': 3.0, 'volume': 20}]
+        arrays = to_ohlcv_arrays(to_data_frame(data))
+        assert arrays['timestamp'].dtype == np.int64
+        assert arrays['timestamp'][1] - arrays['timestamp'][0] == 60 * 10**9
+        assert arrays['close'].dtype == np.float64
+        assert arrays['close'].flags['C_CONTIGUOUS']
+        assert list(arrays['high']) == [3.0, 4.0]
+
+    def test_scan_candles(self):
+        times = ['2018-06-08 23:55:00+00:00', '2018-06-08 23:56:00+00:00', '2018-06-08 23:59:00+00:00',
+                 '2018-06-08 23:59:00+00:00', '2018-06-09 00:00:00+00:00', '2018-06-09 00:02:00+00:00']
+        report = scan_candles(pd.Series(times))
+        assert report.rows == 6
+        assert report.interval == pd.Timedelta(minutes=1)
+        assert report.missing == 3
+        assert report.gaps == [(pd.Timestamp('2018-06-08 23:57', tz='UTC'), pd.Timestamp('2018-06-08 23:58', tz='UTC')),
+                               (pd.Timestamp('2018-06-09 00:01', tz='UTC'), pd.Timestamp('2018-06-09 00:01', tz='UTC'))]
+        assert report.duplicates == [pd.Timestamp('2018-06-08 23:59', tz='UTC')]
+        assert not report.is_continuous()
+
+        report = scan_candles(pd.date_range('2018-06-08', periods=100, freq='5min', tz='UTC'))
+        assert report.is_continuous()
+        assert report.missing == 0
@@ -0,0 +1,131 @@
+# coding: UTF-8
+
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.config import config as conf
+from src.indicators import crossover, crossunder, sma
+from src.vectorized_backtest import exchange_settings, vectorized_backtest
+
+
+class TestVectorizedBacktest(unittest.TestCase):
+
+    def test_sltp_and_exits(self):
+        close = np.array([100.0, 105.0, 108.0, 100.0, 100.0, 97.0])
+        high = np.array([101.0, 106.0, 111.0, 102.0, 101.0, 98.0])
+        low = np.array([99.0, 104.0, 107.0, 99.0, 99.0, 94.0])
+        long_entries = np.array([True, False, False, False, True, False])
+        short_entries = np.array([False, False, True, False, False, False])
+        short_exits = np.array([False, False, False, True, False, False])
+
+        result = vectorized_backtest(close, high, low, long_entries, short_entries=short_entries,
+                                     short_exits=short_exits, qty=1, profit_long=10, stop_long=5,
+                                     commission=0.001)
+
+        trades = result["trades"]
+        # take profit at 110 on bar 2, short at the close of bar 2, exit on bar 3, stop loss at 95 on bar 5
+        np.testing.assert_array_equal(trades["exit_index"], [2, 3, 5])
+        np.testing.assert_array_equal(trades["exit_price"], [110.0, 100.0, 95.0])
+        np.testing.assert_array_equal(trades["long"], [True, False, True])
+        np.testing.assert_allclose(trades["profit"], [9.9, 7.892, -5.1])
+        np.testing.assert_allclose(result["balance"], [1000, 1000, 1009.9, 1017.792, 1017.792, 1012.692])
+        self.assertAlmostEqual(result["equity"][1], 1005.0)
+        self.assertEqual((result["order_count"], result["win_count"], result["lose_count"]), (6, 2, 1))
+
+    def test_reversal_with_balance_lot(self):
+        close = np.array([100.0, 110.0, 100.0])
+        long_entries = np.array([True, False, False])
+        short_entries = np.array([False, True, False])
+
+        result = vectorized_backtest(close, close, close, long_entries, short_entries=short_entries, asset_rounding=3)
+
+        # the reversal closes the long position and opens the lot of the balance before the close
+        np.testing.assert_allclose(result["position"], [10.0, -9.091, 0.0])
+        np.testing.assert_allclose(result["trades"]["profit"], [100.0, 90.91])
+        self.assertAlmostEqual(result["final_balance"], 1190.91)
+        self.assertEqual(result["order_count"], 3)
+
+    def test_same_result_as_event_driven_backtest(self):
+        from src.exchange.binance_futures.binance_futures_backtest import BinanceFuturesBackTest
+        from src.exchange.binance_futures.binance_futures_stub import BinanceFuturesStub
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        args = Namespace(order_log=os.path.join(directory.name, "orders.csv"), from_date="epoch", to_date="now",
+                         html_report=False)
+        with mock.patch.dict(conf, {"args": args}):
+            exchange = BinanceFuturesBackTest(account="binanceaccount1", pair="BTCUSDT")
+            exchange.enable_trade_log = False
+            exchange.asset_rounding = 3
+            exchange.quote_rounding = 2
+            exchange.ohlcv_len = 50
+            exchange.bin_size = ["15m"]
+            exchange.warmup_tf = "15m"
+            exchange.df_ohlcv = self.__ohlcv(2000)
+
+            signals = {}
+
+            def strategy(action, open, close, high, low, volume):
+                fast = sma(close, 5)
+                slow = sma(close, 20)
+                long_entry = crossover(fast, slow)
+                short_entry = crossunder(fast, slow)
+                long_exit = close[-1] < fast[-1] - 0.3
+                short_exit = close[-1] > fast[-1] + 0.3
+                signals[exchange.bar_time] = (long_entry, long_exit, short_entry, short_exit)
+
+                exchange.sltp(profit_long=1.0, profit_short=1.0, stop_long=0.5, stop_short=0.5)
+                if long_exit and exchange.get_position_size() > 0:
+                    exchange.close_all()
+                if short_exit and exchange.get_position_size() < 0:
+                    exchange.close_all()
+                if long_entry:
+                    exchange.entry("Long", True, exchange.get_lot())
+                if short_entry:
+                    exchange.entry("Short", False, exchange.get_lot())
+
+            settings = exchange_settings(exchange)
+            # the OHLCV data is set above, only the strategy of the back test is set (no download)
+            BinanceFuturesStub.on_update(exchange, exchange.bin_size, strategy)
+            exchange.crawler_run()
+            exchange.order_log.close()
+
+        data = exchange.timeframe_data["15m"]
+        signals = np.array([signals.get(t, (False,) * 4) for t in data.index], dtype=bool)
+        result = vectorized_backtest(data["close"].values, data["high"].values, data["low"].values,
+                                     signals[:, 0], signals[:, 1], signals[:, 2], signals[:, 3],
+                                     profit_long=1.0, profit_short=1.0, stop_long=0.5, stop_short=0.5,
+                                     start=exchange.ohlcv_len, **settings)
+
+        # the commission is paid on every trade, the profits and the balance only match if it is the same
+        self.assertGreater(settings["commission"], 0)
+        self.assertEqual(settings["commission"], exchange.get_commission())
+        self.assertGreater(exchange.order_count, 10)
+        self.assertEqual(result["order_count"], exchange.order_count)
+        self.assertEqual((result["win_count"], result["lose_count"]), (exchange.win_count, exchange.lose_count))
+        self.assertAlmostEqual(result["win_profit"], exchange.win_profit, places=9)
+        self.assertAlmostEqual(result["lose_loss"], exchange.lose_loss, places=9)
+        self.assertAlmostEqual(result["final_balance"], exchange.get_balance(), places=9)
+
+    @staticmethod
+    def __ohlcv(length):
+        rng = np.random.default_rng(1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, length)))
+        open = np.r_[close[0], close[:-1]]
+        data = pd.DataFrame({"time": pd.date_range("2021-01-01", periods=length, freq="15min", tz="UTC").astype(str),
+                             "open": open,
+                             "high": np.maximum(open, close) * (1 + rng.random(length) * 0.002),
+                             "low": np.minimum(open, close) * (1 - rng.random(length) * 0.002),
+                             "close": close,
+                             "volume": rng.random(length) * 10})
+        return data
+
+
+if __name__ == '__main__':
+    unittest.main()
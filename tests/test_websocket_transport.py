@@ -0,0 +1,112 @@
+# coding: UTF-8
+
+import asyncio
+import threading
+import time
+import unittest
+
+from src.exchange.websocket_transport import AsyncTransport
+
+try:
+    from websockets.asyncio.server import serve
+except ImportError:
+    serve = None
+
+
+@unittest.skipIf(serve is None, "websockets is not installed")
+class TestAsyncTransport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.headers = []
+        cls.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def handler(connection):
+            cls.headers.append(connection.request.headers.get("api-key"))
+            async for message in connection:
+                if message == "burst":
+                    for i in range(500):
+                        await connection.send(str(i))
+                elif message == "bye":
+                    await connection.close()
+
+        async def main():
+            cls.server = await serve(handler, "127.0.0.1", 0)
+            cls.url = f"ws://127.0.0.1:{cls.server.sockets[0].getsockname()[1]}"
+            started.set()
+            await cls.server.serve_forever()
+
+        threading.Thread(target=cls.loop.run_until_complete, args=(main(),), daemon=True).start()
+        started.wait(5)
+
+    def wait_for(self, condition, timeout=5):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def setUp(self):
+        self.transport = AsyncTransport(max_workers=2, queue_size=10)
+
+    def tearDown(self):
+        self.transport.stop()
+
+    def test_messages_in_order_with_backpressure(self):
+        received, closed, queue_sizes = [], [], []
+        release = threading.Event()
+
+        def on_message(stream, message):
+            # the first callback blocks until the stream stopped reading its socket
+            release.wait(5)
+            received.append(int(message))
+            queue_sizes.append(stream.queue.qsize())
+
+        stream = self.transport.connect(self.url,
+                                        on_open=lambda stream: stream.send("burst"),
+                                        on_message=on_message,
+                                        on_close=lambda stream, code, reason: closed.append(code),
+                                        header=["api-key: abc"])
+        self.wait_for(lambda: stream.queue is not None and stream.queue.full())
+        time.sleep(0.2)
+        # one message in the callback, 10 in the queue and one waiting for room, the others are left in the socket
+        self.assertEqual(stream.received, 12)
+        self.assertEqual(stream.queue.qsize(), 10)
+
+        release.set()
+        self.wait_for(lambda: len(received) == 500)
+        self.assertEqual(received, list(range(500)))
+        self.assertLessEqual(max(queue_sizes), 10)
+        self.assertIn("abc", self.headers)
+
+        stream.send("bye")
+        self.wait_for(lambda: closed == [1000])
+
+    def test_close_and_call_every(self):
+        opened, closed, calls = [], [], []
+        stream = self.transport.connect(self.url, on_open=opened.append,
+                                        on_close=lambda stream, code, reason: closed.append(code))
+        self.wait_for(lambda: opened == [stream])
+        stream.close()
+        self.wait_for(lambda: len(closed) == 1)
+
+        self.transport.call_every(0.01, lambda: calls.append(1), condition=lambda: len(calls) < 3)
+        self.wait_for(lambda: len(calls) == 3)
+        time.sleep(0.05)
+        self.assertEqual(len(calls), 3)
+
+
+    def test_stop(self):
+        transport = AsyncTransport(max_workers=1, queue_size=10)
+        opened = []
+        transport.connect(self.url, on_open=opened.append)
+        self.wait_for(lambda: len(opened) == 1)
+        transport.stop()
+        self.assertFalse(transport.thread.is_alive())
+        self.assertTrue(transport.loop.is_closed())
+        self.assertFalse(any(thread.name.startswith("ws-callback") and thread.is_alive()
+                             for thread in transport.executor._threads))
+
+
+if __name__ == '__main__':
+    unittest.main()